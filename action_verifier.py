@@ -0,0 +1,112 @@
+"""
+Action Verifier - Optimistic commit / verify for planting actions
+Actions are applied to the AI state right after the clicks; during the next
+ticks the shared frame is checked for evidence that the game accepted them
+(seed packet started recharging, target cell and sun counter changed).
+Unconfirmed actions are rolled back. Nothing here waits or sleeps
+"""
+
+import time
+import cv2
+import numpy as np
+from config import *
+
+
+def _thumbnail(frame, rect):
+    """Small grayscale float thumbnail of a (x, y, w, h) region, None if outside"""
+    x, y, w, h = rect
+    if x < 0 or y < 0 or w <= 0 or h <= 0 or y + h > frame.shape[0] or x + w > frame.shape[1]:
+        return None
+    gray = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def _changed(before, after, threshold) -> bool:
+    if before is None or after is None:
+        return False
+    return float(np.abs(after - before).mean()) > threshold
+
+
+class PendingAction:
+    """Planting action applied optimistically, waiting for confirmation"""
+
+    def __init__(self, action: dict, seed_coord: tuple, cost: int):
+        self.plant = action["plant"]
+        self.col = action["col"]
+        self.row = action["row"]
+        self.seed_coord = seed_coord
+        self.cost = cost
+        self.issued_at = time.time()
+        self.ticks = 0
+
+        # Evidence captured from the frame taken before the clicks
+        self.cell_before = None
+        self.counter_before = None
+        self.seed_before = None
+
+
+class ActionVerifier:
+    """Подтверждение посадок по кадру или откат состояния"""
+
+    def __init__(self):
+        self.pending = []
+        self.confirmed = 0
+        self.rolled_back = 0
+
+    def reset(self):
+        self.pending.clear()
+
+    def _cell_rect(self, col, row):
+        cx, cy = GRID[row][col]
+        w, h = CELL_WIDTH // 2, CELL_HEIGHT // 2
+        return (cx - w // 2, cy - h // 2, w, h)
+
+    def _seed_rect(self, coord):
+        w, h = SEED_PACKET_SIZE
+        return (coord[0] - w // 2, coord[1] - h // 2, w, h)
+
+    def begin(self, frame, action: dict, seed_coord: tuple, cost: int) -> PendingAction:
+        """Register an action that was just applied; frame is from before the clicks"""
+        pending = PendingAction(action, seed_coord, cost)
+        if frame is not None:
+            pending.cell_before = _thumbnail(frame, self._cell_rect(pending.col, pending.row))
+            pending.counter_before = _thumbnail(frame, SUN_COUNTER_REGION)
+            pending.seed_before = _thumbnail(frame, self._seed_rect(seed_coord))
+        self.pending.append(pending)
+        return pending
+
+    def verify(self, frame):
+        """
+        Check pending actions against a new frame
+        Returns (confirmed, rolled_back) lists of PendingAction
+        """
+        confirmed, rolled_back = [], []
+        if not self.pending:
+            return confirmed, rolled_back
+
+        still_pending = []
+        for pending in self.pending:
+            pending.ticks += 1
+            if pending.seed_before is None or self._accepted(frame, pending):
+                confirmed.append(pending)
+            elif pending.ticks >= VERIFY_MAX_TICKS:
+                rolled_back.append(pending)
+            else:
+                still_pending.append(pending)
+        self.pending = still_pending
+
+        self.confirmed += len(confirmed)
+        self.rolled_back += len(rolled_back)
+        return confirmed, rolled_back
+
+    def _accepted(self, frame, pending: PendingAction) -> bool:
+        # A recharging packet is the strongest sign the game took the plant
+        seed_after = _thumbnail(frame, self._seed_rect(pending.seed_coord))
+        if seed_after is not None and seed_after.mean() < pending.seed_before.mean() * VERIFY_SEED_DARKEN:
+            return True
+
+        # Otherwise both the target cell and the sun counter must have changed
+        cell_after = _thumbnail(frame, self._cell_rect(pending.col, pending.row))
+        counter_after = _thumbnail(frame, SUN_COUNTER_REGION)
+        return (_changed(pending.cell_before, cell_after, VERIFY_CHANGE_THRESHOLD)
+                and _changed(pending.counter_before, counter_after, VERIFY_CHANGE_THRESHOLD))
@@ -0,0 +1,4 @@
+"""
+Benchmarks - Timings of the hot paths on a plain Linux box
+Run from the repository root: python -m benchmarks.run
+"""
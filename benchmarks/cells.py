@@ -0,0 +1,219 @@
+"""
+Cell Classifier Tool - Training set, training and comparison with YOLO
+
+    python -m benchmarks.cells dataset --frames recordings/ --model assets/yolov8_pvz.pt --output cells.npz
+    python -m benchmarks.cells train --data cells.npz
+    python -m benchmarks.cells compare --frames recordings/ --model assets/yolov8_pvz.pt
+
+Labels are the zombie counts per cell that detect_zombies reports on recorded
+frames. --synthetic N uses generated boards with known zombies instead, which
+needs neither recordings nor ultralytics
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import FakeYOLO, install_stubs
+
+# Stubs must be in place before project modules import pyautogui/keyboard
+install_stubs()
+
+import numpy as np
+
+from config import *
+import cell_classifier
+from cell_classifier import CellClassifier
+from game_controller import GameController
+from benchmarks.collectibles import time_call
+from benchmarks.scenarios import Scenario, default_plants, draw_scenario, lawn_frame, load_recorded_frames
+
+
+def synthetic_boards(count, seed=0) -> list:
+    """Boards with 0-12 zombies anywhere on the lawn"""
+    rng = np.random.default_rng(seed)
+    boards = []
+    for index in range(count):
+        n = int(rng.integers(0, 13))
+        zombies = [(int(c), int(r)) for c, r in zip(rng.integers(0, GRID_COLS, n), rng.integers(0, GRID_ROWS, n))]
+        plants = default_plants()
+        frame = draw_scenario(lawn_frame(rng), zombies, [], plants)
+        boards.append(Scenario(f"cells_{index}", frame, zombies, [], plants))
+    return boards
+
+
+def cell_counts(zombies) -> np.ndarray:
+    """(GRID_ROWS, GRID_COLS) zombie count from [(col, row, ...)] cells"""
+    counts = np.zeros((GRID_ROWS, GRID_COLS), dtype=np.intp)
+    for zombie in zombies:
+        counts[zombie[1], zombie[0]] += 1
+    return counts
+
+
+def _load_model(path):
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        raise SystemExit("❌ ultralytics не установлен: разметка YOLO недоступна, используйте --synthetic")
+    return YOLO(path)
+
+
+def labeled_frames(args) -> list:
+    """[(frame, counts)] from recordings labeled by YOLO, or synthetic boards"""
+    if args.synthetic:
+        return [(board.frame, cell_counts(board.zombies)) for board in synthetic_boards(args.synthetic, args.seed)]
+    if not args.frames or not args.model:
+        raise SystemExit("❌ Нужны --frames и --model (или --synthetic N)")
+    frames = load_recorded_frames(args.frames)
+    if not frames:
+        raise SystemExit(f"❌ В {args.frames} нет кадров *.png")
+    model = _load_model(args.model)
+    controller = GameController()
+    return [(frame, cell_counts(controller.detect_zombies(model, frame))) for frame in frames]
+
+
+def cmd_dataset(args):
+    classifier = CellClassifier(path=None)
+    tiles, labels, frame_ids = [], [], []
+    for index, (frame, counts) in enumerate(labeled_frames(args)):
+        tiles.append((classifier.features(frame) * 255).round().astype(np.uint8))
+        labels.append(counts.ravel())
+        frame_ids.append(np.full(counts.size, index))
+    np.savez_compressed(args.output, tiles=np.concatenate(tiles), labels=np.concatenate(labels),
+                        frame_ids=np.concatenate(frame_ids), tile_size=np.array(classifier.tile_size))
+    total = np.concatenate(labels)
+    print(f"💾 {args.output}: {len(tiles)} кадров, {total.size} клеток, с зомби: {int((total > 0).sum())}")
+
+
+def _split(frame_ids, holdout):
+    """Train/test masks by whole frames (neighbouring cells of one frame are not independent)"""
+    frames = np.unique(frame_ids)
+    test_frames = frames[::max(1, int(round(1 / holdout)))] if holdout > 0 else frames[:0]
+    test = np.isin(frame_ids, test_frames)
+    return ~test, test
+
+
+def cell_metrics(predicted, expected) -> dict:
+    """Presence precision/recall and count error over cells"""
+    predicted = np.asarray(predicted).ravel()
+    expected = np.minimum(np.asarray(expected).ravel(), CELL_MAX_COUNT)
+    hit = (predicted > 0) & (expected > 0)
+    return {
+        "accuracy": float((predicted == expected).mean()),
+        "presence_precision": float(hit.sum() / max(1, (predicted > 0).sum())),
+        "presence_recall": float(hit.sum() / max(1, (expected > 0).sum())),
+        "count_mae": float(np.abs(predicted - expected).mean()),
+    }
+
+
+def _print_metrics(title, metrics):
+    print(f"  {title}: точность {metrics['accuracy']:.3f} | присутствие: precision "
+          f"{metrics['presence_precision']:.3f}, recall {metrics['presence_recall']:.3f} | "
+          f"ошибка числа {metrics['count_mae']:.3f}")
+
+
+def cmd_train(args):
+    data = np.load(args.data)
+    pixels = data["tiles"].astype(np.float32)
+    labels = data["labels"]
+    train_mask, test_mask = _split(data["frame_ids"], args.holdout)
+
+    print(f"🧠 Обучение: {int(train_mask.sum())} клеток, проверка: {int(test_mask.sum())}")
+    classifier = CellClassifier(path=None)
+    classifier.tile_size = tuple(int(v) for v in data["tile_size"])
+    classifier.set_params(cell_classifier.train(pixels[train_mask] / 255.0, labels[train_mask],
+                                                hidden=args.hidden, epochs=args.epochs,
+                                                learning_rate=args.lr, seed=args.seed))
+
+    for title, mask in (("обучение", train_mask), ("проверка", test_mask)):
+        if mask.any():
+            logits = classifier._logits(pixels[mask])
+            _print_metrics(title, cell_metrics(logits.argmax(axis=1), labels[mask]))
+    classifier.save(args.output)
+    print(f"💾 Модель: {args.output}")
+
+
+def cmd_compare(args):
+    classifier = CellClassifier(args.classifier)
+    if not classifier.available:
+        raise SystemExit(f"❌ Нет модели {args.classifier}, сначала: python -m benchmarks.cells train")
+    samples = labeled_frames(args)
+    controller = GameController()
+
+    predicted = np.stack([classifier.predict(frame)[0] for frame, _ in samples])
+    expected = np.stack([counts for _, counts in samples])
+    print(f"🔍 {len(samples)} кадров, эталон: {'известные зомби' if args.synthetic else 'YOLO'}")
+    _print_metrics("клетки", cell_metrics(predicted, expected))
+
+    # End to end, as the bot sees it: detect_points → points_to_cells
+    routed = np.stack([
+        cell_counts(controller.points_to_cells((x, y, t) for x, y, _, t in classifier.detect_points(frame)))
+        for frame, _ in samples])
+    _print_metrics("через points_to_cells", cell_metrics(routed, expected))
+    if not np.array_equal(np.minimum(routed, CELL_MAX_COUNT), predicted):
+        print("  ⚠️ detect_points → points_to_cells не совпадает с предсказанием по клеткам")
+
+    cells_ms = statistics.median(time_call(lambda: classifier.predict(frame), args.number) for frame, _ in samples)
+    if args.model and not args.synthetic:
+        model = _load_model(args.model)
+        yolo_label = "detect_zombies"
+    else:
+        model = FakeYOLO()
+        yolo_label = "detect_zombies*"
+
+    def detect(frame, counts):
+        if isinstance(model, FakeYOLO):
+            w, h = 60, 110
+            model.set_detections([("zombie", (GRID[r][c][0], GRID[r][c][1] - 20, w, h), 0.8)
+                                  for r, c in zip(*np.nonzero(counts)) for _ in range(counts[r, c])])
+        return controller.detect_zombies(model, frame)
+    yolo_ms = statistics.median(time_call(lambda: detect(frame, counts), args.number) for frame, counts in samples)
+
+    print(f"  ⏱️ классификатор клеток: {cells_ms:.2f} мс | {yolo_label}: {yolo_ms:.2f} мс")
+    if isinstance(model, FakeYOLO):
+        print("  * только постобработка фиксированных рамок, без инференса")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Классификатор клеток: данные, обучение, сравнение с YOLO")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def source(command):
+        command.add_argument("--frames", help="папка с записанными кадрами (*.png)")
+        command.add_argument("--model", help="YOLO модель (.pt) для разметки и сравнения")
+        command.add_argument("--synthetic", type=int, default=0, help="N синтетических досок вместо записей")
+        command.add_argument("--seed", type=int, default=0)
+
+    dataset = commands.add_parser("dataset", help="разметить кадры и сохранить плитки клеток")
+    source(dataset)
+    dataset.add_argument("--output", default="cells_dataset.npz")
+
+    train = commands.add_parser("train", help="обучить классификатор на наборе данных")
+    train.add_argument("--data", default="cells_dataset.npz")
+    train.add_argument("--output", default=CELL_CLASSIFIER_PATH)
+    train.add_argument("--hidden", type=int, default=CELL_HIDDEN_UNITS)
+    train.add_argument("--epochs", type=int, default=300)
+    train.add_argument("--lr", type=float, default=0.01)
+    train.add_argument("--holdout", type=float, default=0.2, help="доля кадров для проверки")
+    train.add_argument("--seed", type=int, default=0)
+
+    compare = commands.add_parser("compare", help="точность и задержка против detect_zombies")
+    source(compare)
+    compare.add_argument("--classifier", default=CELL_CLASSIFIER_PATH)
+    compare.add_argument("--number", type=int, default=10, help="замеров времени на кадр")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return {"dataset": cmd_dataset, "train": cmd_train, "compare": cmd_compare}[args.command](args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
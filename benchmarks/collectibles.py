@@ -0,0 +1,140 @@
+"""
+Collectible Detector Comparison - Recall, precision and speed of the blob
+detector against the YOLO path on boards with known sun/coin positions
+
+    python -m benchmarks.collectibles
+    python -m benchmarks.collectibles --model assets/yolov8_pvz.pt --frames recordings/
+
+Without --model the YOLO column times only our post-processing of fixed
+boxes (the fake detector is always right); with a real model it runs inference
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import FakeYOLO, install_stubs
+
+# Stubs must be in place before project modules import pyautogui/keyboard
+install_stubs()
+
+from config import *
+from blob_detector import BlobDetector
+from game_controller import GameController
+from benchmarks.scenarios import collectibles_board, load_recorded_frames
+
+LABELS = ("sun", "coin")
+
+
+def match(found, truth, radius=BLOB_MATCH_RADIUS) -> int:
+    """Number of truth points with a found point within radius (each found point used once)"""
+    remaining = list(found)
+    matched = 0
+    for tx, ty in truth:
+        for i, (fx, fy) in enumerate(remaining):
+            if (tx - fx) ** 2 + (ty - fy) ** 2 <= radius * radius:
+                del remaining[i]
+                matched += 1
+                break
+    return matched
+
+
+def time_call(fn, number) -> float:
+    """Median time of one fn() call in milliseconds"""
+    fn()  # Warm-up
+    samples = []
+    for _ in range(number):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def evaluate(detect, scenarios, number) -> dict:
+    """Recall/precision per label and median time of detect(scenario) -> {label: [(x, y)]}"""
+    totals = {label: {"truth": 0, "found": 0, "matched": 0} for label in LABELS}
+    times = []
+    for scenario in scenarios:
+        found = detect(scenario)
+        truth = {"sun": scenario.suns, "coin": scenario.coins}
+        for label in LABELS:
+            totals[label]["truth"] += len(truth[label])
+            totals[label]["found"] += len(found.get(label, []))
+            totals[label]["matched"] += match(found.get(label, []), truth[label])
+        times.append(time_call(lambda: detect(scenario), number))
+
+    result = {"median_ms": statistics.median(times)}
+    for label, t in totals.items():
+        result[label] = {
+            "recall": t["matched"] / t["truth"] if t["truth"] else None,
+            "precision": t["matched"] / t["found"] if t["found"] else None,
+        }
+    return result
+
+
+def _load_model(path):
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("⚠️ ultralytics не установлен, YOLO заменён фиксированными рамками")
+        return None
+    return YOLO(path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Blob vs YOLO: поиск солнц и монет")
+    parser.add_argument("--model", help="YOLO модель (.pt); без неё YOLO заменяется фиксированными рамками")
+    parser.add_argument("--frames", help="папка с записанными кадрами (*.png) для фона")
+    parser.add_argument("--boards", type=int, default=20, help="число синтетических досок")
+    parser.add_argument("--number", type=int, default=20, help="замеров времени на доску")
+    return parser.parse_args(argv)
+
+
+def _print_row(name, result):
+    cells = [f"{name:8}", f"{result['median_ms']:9.2f} мс"]
+    for label in LABELS:
+        recall, precision = result[label]["recall"], result[label]["precision"]
+        cells.append(f"{label}: recall {'—' if recall is None else f'{recall:.2f}':>4} "
+                     f"precision {'—' if precision is None else f'{precision:.2f}':>4}")
+    print("  " + " | ".join(cells))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    frames = load_recorded_frames(args.frames) if args.frames else []
+    scenarios = [
+        collectibles_board(1 + seed % 5, seed % 3, seed=seed,
+                           background=frames[seed % len(frames)] if frames else None)
+        for seed in range(args.boards)
+    ]
+
+    blob = BlobDetector()
+    controller = GameController()
+    model = _load_model(args.model) if args.model else None
+    fake = FakeYOLO()
+
+    def blob_detect(scenario):
+        return blob.detect(scenario.frame, scenario.sunflower_heads())
+
+    def yolo_detect(scenario):
+        if model is not None:
+            return controller._detect_collectibles(model, scenario.frame)
+        fake.set_detections(scenario.detections())
+        return controller._detect_collectibles(fake, scenario.frame)
+
+    print(f"🔍 {len(scenarios)} досок, фон: {'записанные кадры' if frames else 'синтетический'}")
+    _print_row("blob", evaluate(blob_detect, scenarios, args.number))
+    _print_row("yolo" if model is not None else "yolo*", evaluate(yolo_detect, scenarios, args.number))
+    if model is None:
+        print("  * только постобработка фиксированных рамок, без инференса")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+"""
+Detector Evaluation - Accuracy vs. CPU latency of detector configurations
+on a folder of labeled frames
+
+    python -m benchmarks.detectors --frames labeled/
+    python -m benchmarks.detectors --frames labeled/ --variants variants.json --only yolo-fast,blob
+
+Labels are YOLO txt files next to the frames (frame_001.png + frame_001.txt,
+one "class cx cy w h" line per object, normalized); class names come from
+classes.txt in the folder or --names. Every zombie type counts as "zombie".
+Results are cached per variant in benchmarks/results/detectors/ and reused
+while the variant, its model file, the frames and the geometry are unchanged
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import install_stubs
+
+# Stubs must be in place before project modules import pyautogui/keyboard
+install_stubs()
+
+import cv2
+import numpy as np
+
+from config import *
+from blob_detector import BlobDetector, collectible_roi
+from cell_classifier import CellClassifier
+from game_controller import GameController
+
+HARNESS_VERSION = 2  # Bump when matching or metrics change: old cache entries are ignored
+CACHE_DIR = os.path.join(ROOT, "benchmarks", "results", "detectors")
+DEFAULT_NAMES = ("zombie", "sun", "coin")
+CLASSES = ("zombie", "sun", "coin")
+
+# Settings the metrics depend on besides the variant itself
+GEOMETRY_SETTINGS = ("GRID_START_X", "GRID_START_Y", "CELL_WIDTH", "CELL_HEIGHT", "GRID_ROWS", "GRID_COLS",
+                     "ZOMBIE_ROW_OFFSET", "SEED_SLOTS", "SEED_PACKET_SIZE")
+BLOB_SETTINGS = ("BLOB_CLASSES", "BLOB_DOWNSCALE", "BLOB_MIN_FILL")
+
+
+def class_name(label) -> str:
+    """Label as scored: every zombie type is "zombie" """
+    return "zombie" if label == "zombie" or label in ZOMBIE_TYPES else label
+
+
+# ===== DATASET =====
+
+def read_names(directory, names=None) -> list:
+    """Class names by id: classes.txt in the folder, then --names, then DEFAULT_NAMES"""
+    path = os.path.join(directory, "classes.txt")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    return list(names or DEFAULT_NAMES)
+
+
+def read_labels(path, names, shape) -> list:
+    """[(class, x0, y0, x1, y1)] in pixels from a YOLO txt file; no file = nothing on the frame"""
+    if not os.path.exists(path):
+        return []
+    height, width = shape[:2]
+    boxes = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cls_id = int(parts[0])
+            cx, cy, w, h = (float(v) for v in parts[1:5])
+            label = names[cls_id] if cls_id < len(names) else str(cls_id)
+            boxes.append((class_name(label), (cx - w / 2) * width, (cy - h / 2) * height,
+                          (cx + w / 2) * width, (cy + h / 2) * height))
+    return boxes
+
+
+def load_dataset(directory, names=None) -> list:
+    """[(name, frame, labels)] for every *.png in the folder, sorted by name"""
+    names = read_names(directory, names)
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.png"))):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            continue
+        labels = read_labels(os.path.splitext(path)[0] + ".txt", names, frame.shape)
+        samples.append((os.path.basename(path), frame, labels))
+    return samples
+
+
+def _file_stat(path) -> list:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def dataset_fingerprint(directory) -> list:
+    """Name, size and mtime of every frame and label file"""
+    files = sorted(glob.glob(os.path.join(directory, "*.png")) + glob.glob(os.path.join(directory, "*.txt")))
+    return [[os.path.basename(path)] + _file_stat(path) for path in files]
+
+
+# ===== VARIANTS =====
+
+def default_variants(model_path=YOLO_MODEL_PATH) -> list:
+    """
+    The configurations the bot can run with: YOLO at each fusion profile's
+    input size and threshold, the plain detect_zombies settings, YOLO on the
+    lawn crop, the blob detector and the cell classifier (if trained)
+    """
+    variants = [{"name": "yolo-default", "detector": "yolo", "model": model_path,
+                 "imgsz": None, "conf": YOLO_CONFIDENCE}]
+    for profile, settings in FUSION_PROFILES.items():
+        variants.append({"name": f"yolo-{profile}", "detector": "yolo", "model": model_path,
+                         "imgsz": settings["imgsz"], "conf": settings["detector_confidence"]})
+    variants.append({"name": "yolo-lawn-480", "detector": "yolo", "model": model_path,
+                     "imgsz": 480, "conf": FUSION_PROFILES["balanced"]["detector_confidence"], "roi": "lawn"})
+    variants.append({"name": "blob", "detector": "blob"})
+    if os.path.exists(CELL_CLASSIFIER_PATH):
+        variants.append({"name": "cells", "detector": "cells", "model": CELL_CLASSIFIER_PATH})
+    return variants
+
+
+def load_variants(path) -> list:
+    """
+    Variants from a JSON list: {"name", "detector": "yolo" | "blob" | "cells",
+    "model", "imgsz", "conf", "roi": "lawn" | [x0, y0, x1, y1]}
+    Any model file ultralytics opens works as a backend (.pt, .onnx, OpenVINO folder)
+    """
+    with open(path, encoding="utf-8") as f:
+        variants = json.load(f)
+    for variant in variants:
+        if variant.get("detector") not in ("yolo", "blob", "cells") or not variant.get("name"):
+            raise SystemExit(f"❌ {path}: у варианта нужны name и detector (yolo, blob, cells): {variant}")
+        if variant["detector"] == "yolo":
+            variant.setdefault("model", YOLO_MODEL_PATH)
+            variant.setdefault("conf", YOLO_CONFIDENCE)
+    return variants
+
+
+def roi_rect(roi, shape) -> tuple:
+    """(x0, y0, x1, y1) crop for a variant's roi, None for the full frame"""
+    if not roi:
+        return None
+    if roi == "lawn":
+        return collectible_roi(shape)
+    height, width = shape[:2]
+    x0, y0, x1, y1 = (int(v) for v in roi)
+    return max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+
+
+def _load_yolo(path):
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print(f"⚠️ ultralytics не установлен, варианты с {path} пропущены")
+        return None
+    if not os.path.exists(path):
+        print(f"⚠️ Нет модели {path}, варианты с ней пропущены")
+        return None
+    return YOLO(path)
+
+
+def build_detector(variant, models):
+    """
+    detect(frame) -> [(class, x0, y0, x1, y1, confidence)] for a variant, None if it cannot run
+    Point detectors (blob, cells) report zero-size boxes and set detect.classes
+    to what they look for (None = everything)
+    models: {path: loaded YOLO model}, shared between variants
+    """
+    if variant["detector"] == "blob":
+        blob = BlobDetector()
+
+        def detect(frame):
+            return [(label, x, y, x, y, 1.0) for label, points in blob.detect(frame).items() for x, y in points]
+        detect.classes = tuple(blob.classes)
+        return detect
+
+    if variant["detector"] == "cells":
+        classifier = CellClassifier(variant.get("model") or CELL_CLASSIFIER_PATH)
+        if not classifier.available:
+            print(f"⚠️ Нет классификатора клеток {variant.get('model')}, вариант {variant['name']} пропущен")
+            return None
+
+        def detect(frame):
+            return [("zombie", x, y, x, y, confidence) for x, y, confidence, _ in classifier.detect_points(frame)]
+        detect.classes = ("zombie",)
+        return detect
+
+    if variant["model"] not in models:
+        models[variant["model"]] = _load_yolo(variant["model"])
+    model = models[variant["model"]]
+    if model is None:
+        return None
+    options = {"imgsz": variant["imgsz"]} if variant.get("imgsz") else {}
+
+    def detect(frame):
+        rect = roi_rect(variant.get("roi"), frame.shape)
+        x0, y0 = 0, 0
+        if rect is not None:
+            x0, y0, x1, y1 = rect
+            frame = np.ascontiguousarray(frame[y0:y1, x0:x1])
+        results = model.predict(source=frame, conf=variant["conf"], verbose=False, device="cpu", **options)[0]
+        found = []
+        for box in results.boxes:
+            x, y, w, h = box.xywh[0].cpu().numpy()
+            found.append((class_name(model.names[int(box.cls[0])]), float(x - w / 2 + x0), float(y - h / 2 + y0),
+                          float(x + w / 2 + x0), float(y + h / 2 + y0), float(box.conf[0])))
+        return found
+    return detect
+
+
+# ===== METRICS =====
+
+def iou(a, b) -> float:
+    """Intersection over union of two (x0, y0, x1, y1) boxes"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def match(found, truth, iou_threshold) -> int:
+    """
+    True positives of one class on one frame, greedy by confidence
+    A box matches a label box with IoU >= iou_threshold; a point matches a label box it lies in
+    """
+    remaining = list(truth)
+    matched = 0
+    for box in sorted(found, key=lambda d: -d[4]):
+        point = box[0] == box[2] and box[1] == box[3]
+        best, best_score = None, 0.0
+        for index, label in enumerate(remaining):
+            if point:
+                inside = label[0] <= box[0] <= label[2] and label[1] <= box[1] <= label[3]
+                score = 1.0 if inside else 0.0
+            else:
+                score = iou(box[:4], label)
+                score = score if score >= iou_threshold else 0.0
+            if score > best_score:
+                best, best_score = index, score
+        if best is not None:
+            del remaining[best]
+            matched += 1
+    return matched
+
+
+def zombie_cells(controller, boxes) -> Counter:
+    """
+    Multiset of (col, row) the strategy would see: box foot points as in
+    detect_zombie_points, points as they are, through _pixel_to_grid
+    """
+    cells = Counter()
+    for x0, y0, x1, y1 in boxes:
+        if not (x0 == x1 and y0 == y1):
+            x, y = (x0 + x1) / 2, y1 + ZOMBIE_ROW_OFFSET
+        else:
+            x, y = x0, y0
+        cells[controller._pixel_to_grid(x, y)] += 1
+    return cells
+
+
+def evaluate(detect, samples, number, iou_threshold) -> dict:
+    """
+    Per-class precision/recall, zombie cell accuracy and p50/p95 time of detect()
+    Cell accuracy per frame is |labeled ∩ detected cells| / max(labeled, detected)
+    zombies, so both missed and extra zombies count against it. Classes the
+    detector does not look for (detect.classes) are left out
+    """
+    controller = GameController()
+    scored = getattr(detect, "classes", None)
+    totals = {label: {"truth": 0, "found": 0, "matched": 0} for label in CLASSES}
+    cells_correct, cells_total = 0, 0
+    times = []
+
+    detect(samples[0][1])  # Warm-up
+    for _, frame, labels in samples:
+        for _ in range(number):
+            started = time.perf_counter()
+            found = detect(frame)
+            times.append(time.perf_counter() - started)
+
+        for label in set(CLASSES) | {box[0] for box in labels} | {box[0] for box in found}:
+            truth = [box[1:] for box in labels if box[0] == label]
+            predicted = [box[1:] for box in found if box[0] == label]
+            t = totals.setdefault(label, {"truth": 0, "found": 0, "matched": 0})
+            t["truth"] += len(truth)
+            t["found"] += len(predicted)
+            t["matched"] += match(predicted, truth, iou_threshold)
+
+        expected = zombie_cells(controller, [box[1:] for box in labels if box[0] == "zombie"])
+        detected = zombie_cells(controller, [box[1:5] for box in found if box[0] == "zombie"])
+        cells_correct += sum((expected & detected).values())
+        cells_total += max(sum(expected.values()), sum(detected.values()))
+
+    result = {
+        "frames": len(samples),
+        "p50_ms": float(np.percentile(times, 50)) * 1000,
+        "p95_ms": float(np.percentile(times, 95)) * 1000,
+        "cell_accuracy": cells_correct / cells_total if cells_total else None,
+        "classes": {},
+    }
+    if scored is not None and "zombie" not in scored:
+        result["cell_accuracy"] = None
+    for label, t in totals.items():
+        if scored is not None and label not in scored:
+            continue
+        result["classes"][label] = {
+            "truth": t["truth"],
+            "found": t["found"],
+            "precision": t["matched"] / t["found"] if t["found"] else None,
+            "recall": t["matched"] / t["truth"] if t["truth"] else None,
+        }
+    return result
+
+
+# ===== CACHE =====
+
+def cache_key(variant, dataset, number, iou_threshold) -> str:
+    """Hash of everything a variant's result depends on"""
+    settings = GEOMETRY_SETTINGS + (BLOB_SETTINGS if variant["detector"] == "blob" else ())
+    key = {
+        "harness": HARNESS_VERSION,
+        "variant": variant,
+        "model": _file_stat(variant["model"]) if variant.get("model") else None,
+        "dataset": dataset,
+        "settings": {name: globals()[name] for name in settings},
+        "number": number,
+        "iou": iou_threshold,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _cache_path(variant, key) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in variant["name"])
+    return os.path.join(CACHE_DIR, f"{safe}-{key[:12]}.json")
+
+
+def load_cached(variant, key) -> dict:
+    try:
+        with open(_cache_path(variant, key), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry.get("result") if entry.get("key") == key else None
+
+
+def save_cached(variant, key, result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(variant, key), "w", encoding="utf-8") as f:
+        json.dump({"key": key, "variant": variant, "result": result}, f, ensure_ascii=False, indent=2)
+
+
+# ===== REPORT =====
+
+def _fmt(value) -> str:
+    return "—" if value is None else f"{value:.2f}"
+
+
+def print_table(rows):
+    """One line per variant: precision/recall per class, cell accuracy, p50/p95"""
+    width = max(8, max(len(name) for name, _, _ in rows))
+    header = [f"{'вариант':{width}}"] + [f"{label:>11}" for label in CLASSES] + ["клетки", "  p50 мс", "  p95 мс"]
+    print("  " + " | ".join(header))
+    print("  " + " | ".join([f"{'':{width}}"] + [f"{'P / R':>11}"] * len(CLASSES)) + " |")
+    for name, result, cached in rows:
+        cells = [f"{name:{width}}"]
+        for label in CLASSES:
+            stats = result["classes"].get(label, {})
+            cells.append(f"{_fmt(stats.get('precision')):>4} / {_fmt(stats.get('recall')):>4}")
+        cells += [f"{_fmt(result['cell_accuracy']):>6}", f"{result['p50_ms']:8.2f}", f"{result['p95_ms']:8.2f}"]
+        print("  " + " | ".join(cells) + (" (кэш)" if cached else ""))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Детекторы: точность и задержка на размеченных кадрах")
+    parser.add_argument("--frames", required=True, help="папка с кадрами (*.png) и разметкой YOLO (*.txt)")
+    parser.add_argument("--names", help="имена классов по id через запятую (если нет classes.txt)")
+    parser.add_argument("--model", default=YOLO_MODEL_PATH, help="YOLO модель для вариантов по умолчанию")
+    parser.add_argument("--variants", help="JSON со списком вариантов вместо вариантов по умолчанию")
+    parser.add_argument("--only", help="только эти варианты (имена через запятую)")
+    parser.add_argument("--number", type=int, default=3, help="замеров времени на кадр")
+    parser.add_argument("--iou", type=float, default=0.5, help="минимальный IoU для совпадения рамок")
+    parser.add_argument("--no-cache", action="store_true", help="пересчитать все варианты")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = load_dataset(args.frames, args.names.split(",") if args.names else None)
+    if not samples:
+        raise SystemExit(f"❌ В {args.frames} нет кадров *.png")
+    variants = load_variants(args.variants) if args.variants else default_variants(args.model)
+    if args.only:
+        wanted = set(args.only.split(","))
+        variants = [variant for variant in variants if variant["name"] in wanted]
+
+    labeled = Counter(box[0] for _, _, labels in samples for box in labels)
+    print(f"🔍 {len(samples)} кадров, разметка: "
+          + (", ".join(f"{label} {count}" for label, count in sorted(labeled.items())) or "пусто"))
+
+    dataset = dataset_fingerprint(args.frames)
+    models = {}
+    rows = []
+    for variant in variants:
+        key = cache_key(variant, dataset, args.number, args.iou)
+        result = None if args.no_cache else load_cached(variant, key)
+        cached = result is not None
+        if result is None:
+            detect = build_detector(variant, models)
+            if detect is None:
+                continue
+            print(f"  ⏳ {variant['name']}...")
+            result = evaluate(detect, samples, args.number, args.iou)
+            save_cached(variant, key, result)
+        rows.append((variant["name"], result, cached))
+
+    if not rows:
+        raise SystemExit("❌ Ни один вариант не удалось запустить")
+    print()
+    print_table(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({name: result for name, result, _ in rows}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результаты: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""
+Benchmark Runner - Times the hot paths and stores the results as JSON
+Results are written to benchmarks/results/<commit>.json so two commits can
+be compared with --compare
+
+    python -m benchmarks.run
+    python -m benchmarks.run --frames recordings/ --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import SCREEN, FakeYOLO, install_stubs, no_sleep
+
+# Stubs must be in place before project modules import pyautogui/keyboard
+install_stubs()
+
+import cv2
+import numpy as np
+
+from config import *
+from game_controller import GameController
+from plant_manager import PlantManager
+from strategy import PlantingStrategy
+from sun_forecast import SunForecaster
+from tracker import DetectionFuser
+from blob_detector import BlobDetector
+from cell_classifier import CellClassifier
+from benchmarks.scenarios import collectibles_board, dense_board, load_recorded_frames
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BENCH_PLANTS = ("sunflower", "peashooter", "snow pea", "repeater", "cherry bomb", "wall-nut", "jalapeno", "squash")
+
+
+def measure(fn, number, repeat, ops=1) -> dict:
+    """Best-of/median timing of fn; ops = operations done by one fn() call"""
+    fn()  # Warm-up (first-call caches, lazy allocations)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / (number * ops))
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": min(samples) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "number": number,
+        "repeat": repeat,
+        "ops": ops,
+        "alloc_peak_bytes": measure_allocations(fn),
+    }
+
+
+def measure_allocations(fn, calls=3) -> int:
+    """Largest memory peak (bytes above the starting level) of one fn() call"""
+    tracemalloc.start()
+    try:
+        peak_max = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            fn()
+            peak_max = max(peak_max, tracemalloc.get_traced_memory()[1] - start)
+        return peak_max
+    finally:
+        tracemalloc.stop()
+
+
+def _plant_manager():
+    manager = PlantManager()
+    manager.plants = {name: {"slot": i + 1, "coord": SEED_SLOTS[i + 1]} for i, name in enumerate(BENCH_PLANTS)}
+    manager.slot_count = len(BENCH_PLANTS)
+    manager._build_lookups()
+    return manager
+
+
+def _defending_strategy(scenario, sun_count):
+    """Strategy past the sunflower phase with the scenario's plants on the lawn"""
+    forecaster = SunForecaster()
+    forecaster.update(sun_count, 0.5, 5)
+    strategy = PlantingStrategy(_plant_manager(), forecaster)
+    for (col, row), name in scenario.plants.items():
+        strategy.mark_planted(col, row, name)
+    strategy.seed_ready_at.clear()
+    strategy.sunflowers_planted = strategy.sunflowers_needed = 5
+    strategy.production_phase = False
+    strategy.defense_started = True
+    return strategy
+
+
+# ===== BENCHMARKS =====
+# Each returns (fn, number, ops)
+
+def bench_pixel_to_grid(scenario, frames):
+    controller = GameController()
+    rng = np.random.default_rng(0)
+    points = [(float(x), float(y)) for x, y in zip(rng.uniform(0, 800, 1000), rng.uniform(0, 600, 1000))]
+
+    def run():
+        for x, y in points:
+            controller._pixel_to_grid(x, y)
+    return run, 20, len(points)
+
+
+def bench_capture_frame(scenario, frames):
+    controller = GameController()
+    return controller.capture_frame, 100, 1
+
+
+def bench_detect_zombies(scenario, frames):
+    controller = GameController()
+    model = FakeYOLO(scenario.detections())
+    return lambda: controller.detect_zombies(model, scenario.frame), 200, 1
+
+
+def bench_detection_fusion(scenario, frames):
+    """DetectionFuser.update with the scenario's zombies, jittered every call"""
+    controller = GameController()
+    points = controller.detect_zombie_points(FakeYOLO(scenario.detections()), scenario.frame)
+    rng = np.random.default_rng(0)
+    jitter = rng.normal(0, 3, size=(16, len(points), 2))
+    fuser = DetectionFuser()
+    state = {"tick": 0}
+
+    def run():
+        tick = state["tick"]
+        state["tick"] += 1
+        offsets = jitter[tick % len(jitter)]
+        fuser.update([(x + dx, y + dy, c, t) for (x, y, c, t), (dx, dy) in zip(points, offsets)], tick * 0.5)
+        fuser.positions()
+    return run, 200, 1
+
+
+def bench_collect_collectibles(scenario, frames):
+    from main import SunTracker
+    controller = GameController()
+    model = FakeYOLO(scenario.detections())
+    tracker = SunTracker()
+    return lambda: controller.collect_collectibles(model, tracker, scenario.frame), 200, 1
+
+
+def bench_blob_detect(scenario, frames):
+    """Blob detector on a board with suns and coins (zombie count ignored)"""
+    board = collectibles_board(4, 2, background=frames[0] if frames else None)
+    detector = BlobDetector()
+    exclude = board.sunflower_heads()
+    return lambda: detector.detect(board.frame, exclude), 200, 1
+
+
+def bench_cell_classifier(scenario, frames):
+    """Per-cell zombie counts for the whole lawn (random weights: timing only)"""
+    classifier = CellClassifier(path=None)
+    dim = classifier.tile_size[0] * classifier.tile_size[1] * 3
+    rng = np.random.default_rng(0)
+    classifier.set_params({
+        "w1": rng.normal(0, 0.05, (dim, CELL_HIDDEN_UNITS)).astype(np.float32),
+        "b1": np.zeros(CELL_HIDDEN_UNITS, dtype=np.float32),
+        "w2": rng.normal(0, 0.2, (CELL_HIDDEN_UNITS, CELL_MAX_COUNT + 1)).astype(np.float32),
+        "b2": np.zeros(CELL_MAX_COUNT + 1, dtype=np.float32),
+        "mean": np.full(dim, 0.5, dtype=np.float32),
+        "std": np.full(dim, 0.25, dtype=np.float32),
+    })
+    return lambda: classifier.detect_points(scenario.frame), 100, 1
+
+
+def bench_check_seed_ready(scenario, frames):
+    controller = GameController()
+    SCREEN.frame = scenario.frame
+    coords = [SEED_SLOTS[slot] for slot in sorted(SEED_SLOTS)]
+
+    def run():
+        for coord in coords:
+            controller.check_seed_ready(coord)
+    return run, 50, len(coords)
+
+
+def bench_get_next_action(scenario, frames):
+    strategy = _defending_strategy(scenario, 400)
+    return lambda: strategy.get_next_action(scenario.zombies, 400), 200, 1
+
+
+def bench_get_next_actions(scenario, frames):
+    strategy = _defending_strategy(scenario, 1000)
+    return lambda: strategy.get_next_actions(scenario.zombies, 1000), 100, 1
+
+
+def _bench_ai(scenario):
+    from main import PvZAI
+    ai = PvZAI(headless=True)
+    ai.plant_manager = _plant_manager()
+    ai.strategy = PlantingStrategy(ai.plant_manager, ai.forecaster)
+    ai.model_loader.model = FakeYOLO(scenario.detections())
+    ai.model_loader._ready.set()
+    ai.ready_time = ai.first_tick_time = 0.0
+    ai.last_checkpoint = float("inf")  # No checkpoint files from benchmarks
+    return ai
+
+
+def bench_ai_loop_tick(scenario, frames):
+    """Full tick: capture, detection post-processing, lawn, strategy, clicks"""
+    ai = _bench_ai(scenario)
+
+    backgrounds = frames or [scenario.frame]
+    base_plants = dict(scenario.plants)
+    state = {"tick": 0}
+
+    def run():
+        # Same starting board every tick so timings don't drift as it fills up
+        background = backgrounds[state["tick"] % len(backgrounds)]
+        if SCREEN.frame is not background:
+            SCREEN.frame = background
+        state["tick"] += 1
+        ai.strategy.restore_plants(base_plants)
+        ai.strategy.seed_ready_at.clear()
+        ai.strategy.sunflowers_planted = ai.strategy.sunflowers_needed = 5
+        ai.strategy.production_phase = False
+        ai.strategy.defense_started = True
+        ai.sun_tracker.sun_count = 400
+        ai.last_sun_check = 0
+        ai.verifier.reset()
+        ai.ai_loop()
+    return run, 30, 1
+
+
+def bench_checkpoint(scenario, frames):
+    """Main-thread part of a checkpoint: the snapshot of a played board (encoding is off-thread)"""
+    ai = _bench_ai(scenario)
+    SCREEN.frame = scenario.frame
+    ai.strategy.restore_plants(dict(scenario.plants))
+    ai.lawn_monitor.update(scenario.frame, ai.strategy.plant_types)
+    ai.fuser.update([(float(GRID[row][col][0]), float(GRID[row][col][1]), 0.8, ZOMBIE_DEFAULT_TYPE)
+                     for col, row in scenario.zombies], time.time())
+    return ai._checkpoint_snapshot, 200, 1
+
+
+BENCHMARKS = [
+    ("pixel_to_grid", bench_pixel_to_grid, (20,)),
+    ("capture_frame", bench_capture_frame, (20,)),
+    ("detect_zombies_postprocess", bench_detect_zombies, (20, 50)),
+    ("detection_fusion", bench_detection_fusion, (20, 50)),
+    ("cell_classifier", bench_cell_classifier, (20,)),
+    ("collect_collectibles_postprocess", bench_collect_collectibles, (20,)),
+    ("blob_detect", bench_blob_detect, (0,)),
+    ("check_seed_ready", bench_check_seed_ready, (20,)),
+    ("get_next_action", bench_get_next_action, (20, 35, 50)),
+    ("get_next_actions_batch", bench_get_next_actions, (50,)),
+    ("ai_loop_tick", bench_ai_loop_tick, (20, 50)),
+    ("checkpoint_snapshot", bench_checkpoint, (50,)),
+]
+
+
+def run_benchmarks(frames=None, name_filter=None, quick=False) -> dict:
+    """Run every benchmark (or those containing name_filter) and return results"""
+    background = frames[0] if frames else None
+    repeat = 3 if quick else 7
+    results = {}
+    with open(os.devnull, "w", encoding="utf-8") as devnull, no_sleep():
+        for name, factory, zombie_counts in BENCHMARKS:
+            for count in zombie_counts:
+                key = f"{name}[{count}]"
+                if name_filter and name_filter not in key:
+                    continue
+                scenario = dense_board(count, seed=count, background=background)
+                SCREEN.frame = scenario.frame
+                with contextlib.redirect_stdout(devnull):
+                    fn, number, ops = factory(scenario, frames)
+                    if quick:
+                        number = max(1, number // 5)
+                    results[key] = measure(fn, number, repeat, ops)
+                print(f"  {key:45} {results[key]['median_us']:10.1f} мкс "
+                      f"{results[key]['alloc_peak_bytes'] / 1024:9.1f} КБ", flush=True)
+    return results
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+def save_results(env, results, output=None) -> str:
+    if output is None:
+        name = env["commit"] + ("-dirty" if env["dirty"] else "")
+        output = os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": env, "results": results}, f, indent=2)
+    return output
+
+
+def compare(baseline_path, results, threshold) -> list:
+    """Print a comparison table; returns names slower than baseline × threshold"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 Сравнение с {baseline['environment'].get('commit', '?')} ({baseline_path})")
+    regressions = []
+    for key, current in results.items():
+        before = baseline["results"].get(key)
+        if before is None:
+            print(f"  {key:45} {'—':>10} {current['median_us']:10.1f}   новый")
+            continue
+        ratio = current["median_us"] / before["median_us"] if before["median_us"] > 0 else float("inf")
+        mark = ""
+        if ratio > threshold:
+            mark = "🔺 медленнее"
+            regressions.append(key)
+        elif ratio < 1 / threshold:
+            mark = "🟢 быстрее"
+        print(f"  {key:45} {before['median_us']:10.1f} {current['median_us']:10.1f}  ×{ratio:.2f} {mark}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PvZ AI benchmarks")
+    parser.add_argument("--frames", help="папка с записанными кадрами (*.png) вместо синтетического фона")
+    parser.add_argument("--filter", help="запускать только бенчмарки, содержащие эту строку")
+    parser.add_argument("--quick", action="store_true", help="меньше повторов (быстрая проверка)")
+    parser.add_argument("--output", help="путь к JSON (по умолчанию benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="JSON с результатами для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.10, help="во сколько раз медленнее считать регрессией")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    frames = load_recorded_frames(args.frames) if args.frames else []
+    if args.frames and not frames:
+        print(f"⚠️ В {args.frames} нет кадров *.png, используем синтетические")
+
+    env = environment()
+    print(f"⏱️ Бенчмарки @ {env['commit']}{' (есть изменения)' if env['dirty'] else ''}")
+    results = run_benchmarks(frames, args.filter, args.quick)
+    path = save_results(env, results, args.output)
+    print(f"💾 Результаты: {path}")
+
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"\n🔺 Регрессии: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark Scenarios - Reproducible synthetic boards and recorded frames
+Synthetic frames draw a striped lawn, a seed bar, zombies and suns at
+known positions; the matching detector boxes come with them. Recorded
+frames (PNG screenshots) can replace the synthetic background
+"""
+
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from config import *
+
+FRAME_SHAPE = YOLO_WARMUP_SHAPE  # (height, width) of synthetic frames
+ZOMBIE_SIZE = (60, 110)  # (w, h) of a zombie box
+SUN_SIZE = 50
+COIN_SIZE = 28
+
+
+class Scenario:
+    """One reproducible game situation"""
+
+    def __init__(self, name, frame, zombies, suns, plants, coins=()):
+        self.name = name
+        self.frame = frame  # BGR screenshot
+        self.zombies = zombies  # [(col, row)] cells the zombies stand in
+        self.suns = suns  # [(x, y)] sun centers
+        self.plants = plants  # {(col, row): plant_name} already on the lawn
+        self.coins = list(coins)  # [(x, y)] silver coin centers
+
+    def detections(self):
+        """Detector output for this scenario: [(label, (x, y, w, h), confidence)]"""
+        w, h = ZOMBIE_SIZE
+        result = []
+        for col, row in self.zombies:
+            x, y = GRID[row][col]
+            # Box bottom lands inside the row band, as with real zombie hitboxes
+            result.append(("zombie", (x, y - 20, w, h), 0.8))
+        for x, y in self.suns:
+            result.append(("sun", (x, y, SUN_SIZE, SUN_SIZE), 0.9))
+        for x, y in self.coins:
+            result.append(("coin", (x, y, COIN_SIZE, COIN_SIZE), 0.9))
+        return result
+
+    def sunflower_heads(self):
+        """Pixel centers of the sunflowers (yellow blobs that are not collectibles)"""
+        return [GRID[row][col] for (col, row), name in self.plants.items() if name == "sunflower"]
+
+
+def lawn_frame(rng=None):
+    """Striped lawn with a seed bar, no plants or zombies"""
+    height, width = FRAME_SHAPE
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:] = (40, 150, 60)
+    for row in range(GRID_ROWS):
+        y0 = GRID_START_Y + row * CELL_HEIGHT
+        frame[y0:y0 + CELL_HEIGHT:, :] = (40, 165, 70) if row % 2 else (35, 140, 55)
+    frame[:GRID_START_Y] = (30, 70, 110)
+
+    # Bright (ready) seed packets
+    w, h = SEED_PACKET_SIZE
+    for slot, (x, y) in SEED_SLOTS.items():
+        cv2.rectangle(frame, (x - w // 2, max(0, y - h // 2)), (x + w // 2, y + h // 2), (170, 200, 210), -1)
+        cv2.circle(frame, (x, y), 12, (40 + 20 * slot, 180, 60), -1)
+
+    if rng is not None:
+        noise = rng.integers(-6, 7, size=frame.shape, dtype=np.int16)
+        frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return frame
+
+
+def draw_scenario(frame, zombies, suns, plants, coins=()):
+    """Paint plants, zombies, suns and coins onto a copy of frame"""
+    frame = frame.copy()
+    for (col, row), name in plants.items():
+        x, y = GRID[row][col]
+        color = (0, 220, 240) if name == "sunflower" else (30, 200, 30)
+        cv2.circle(frame, (x, y), 25, color, -1)
+    w, h = ZOMBIE_SIZE
+    for col, row in zombies:
+        x, y = GRID[row][col]
+        y -= 20
+        cv2.rectangle(frame, (x - w // 2, y - h // 2), (x + w // 2, y + h // 2), (110, 110, 120), -1)
+    for x, y in suns:
+        cv2.circle(frame, (x, y), SUN_SIZE // 2, (40, 220, 250), -1)
+    for x, y in coins:
+        cv2.circle(frame, (x, y), COIN_SIZE // 2, (215, 215, 220), -1)
+    return frame
+
+
+def default_plants():
+    """Typical mid-level board: sunflowers in column 0, shooters behind them"""
+    plants = {(0, row): "sunflower" for row in range(GRID_ROWS)}
+    for row in range(GRID_ROWS):
+        for col in (1, 2):
+            plants[(col, row)] = "peashooter"
+    return plants
+
+
+def _random_points(rng, count, margin=40):
+    """Points over the lawn, away from the frame edges"""
+    xs = rng.integers(GRID[0][0][0], GRID[0][-1][0], size=count)
+    ys = rng.integers(GRID[0][0][1] - margin, GRID[-1][0][1] + margin, size=count)
+    return [(int(x), int(y)) for x, y in zip(xs, ys)]
+
+
+def collectibles_board(sun_count, coin_count, seed=0, background=None):
+    """Scenario for collectible detection: suns and coins scattered over a planted lawn"""
+    rng = np.random.default_rng(seed)
+    plants = default_plants()
+    suns = _random_points(rng, sun_count)
+    coins = _random_points(rng, coin_count)
+    base = lawn_frame(rng) if background is None else background
+    frame = draw_scenario(base, [], suns, plants, coins)
+    return Scenario(f"collectibles_{sun_count}_{coin_count}", frame, [], suns, plants, coins)
+
+
+def dense_board(zombie_count, seed=0, background=None):
+    """Scenario with zombie_count zombies spread over the right half of the lawn"""
+    rng = np.random.default_rng(seed)
+    cols = rng.integers(GRID_COLS // 2, GRID_COLS, size=zombie_count)
+    rows = rng.integers(0, GRID_ROWS, size=zombie_count)
+    zombies = [(int(c), int(r)) for c, r in zip(cols, rows)]
+    suns = [(int(x), int(y)) for x, y in zip(rng.integers(100, FRAME_SHAPE[1] - 50, size=4),
+                                             rng.integers(120, FRAME_SHAPE[0] - 50, size=4))]
+    plants = default_plants()
+    base = lawn_frame(rng) if background is None else background
+    frame = draw_scenario(base, zombies, suns, plants)
+    return Scenario(f"dense_{zombie_count}", frame, zombies, suns, plants)
+
+
+def load_recorded_frames(directory):
+    """BGR frames from *.png screenshots in a directory, sorted by name"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.png"))):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            frames.append(frame)
+    return frames
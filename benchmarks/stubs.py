@@ -0,0 +1,117 @@
+"""
+Benchmark Stubs - Screen, input and detector replacements
+pyautogui and keyboard are replaced before any project module is imported,
+so benchmarks never touch the real mouse or screen and run without a display.
+The fake YOLO model returns pre-built boxes, which isolates our own
+post-processing from inference cost
+"""
+
+import sys
+import time
+import types
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class Screen:
+    """Frame that the stubbed pyautogui.screenshot() returns"""
+
+    def __init__(self):
+        self._frame = None
+        self._rgb = None
+
+    @property
+    def frame(self):
+        return self._frame
+
+    @frame.setter
+    def frame(self, frame):
+        """Set the screen content from a BGR frame"""
+        self._frame = frame
+        # pyautogui returns RGB images; convert once, not per screenshot
+        self._rgb = None if frame is None else np.ascontiguousarray(frame[:, :, ::-1])
+
+    def screenshot(self, region=None):
+        if region is None:
+            return self._rgb
+        x, y, w, h = region
+        return self._rgb[y:y + h, x:x + w]
+
+
+SCREEN = Screen()
+
+
+def install_stubs():
+    """Register fake pyautogui/keyboard modules (idempotent)"""
+    pyautogui = types.ModuleType("pyautogui")
+    pyautogui.PAUSE = 0.0
+    pyautogui.FAILSAFE = False
+    pyautogui.screenshot = SCREEN.screenshot
+    pyautogui.click = lambda *args, **kwargs: None
+    pyautogui.moveTo = lambda *args, **kwargs: None
+    sys.modules["pyautogui"] = pyautogui
+
+    keyboard = types.ModuleType("keyboard")
+    keyboard.is_pressed = lambda key: False
+    sys.modules["keyboard"] = keyboard
+
+
+@contextmanager
+def no_sleep():
+    """Make time.sleep a no-op so click and loop delays don't dominate timings"""
+    original = time.sleep
+    time.sleep = lambda seconds: None
+    try:
+        yield
+    finally:
+        time.sleep = original
+
+
+class _Tensor:
+    """Just enough of a torch tensor for box.xywh[0].cpu().numpy()"""
+
+    def __init__(self, values):
+        self._values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._values
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+
+class _Box:
+    def __init__(self, cls_id, xywh, conf):
+        self.cls = [cls_id]
+        self.conf = [conf]
+        self.xywh = [_Tensor(xywh)]
+        self.xyxy = [_Tensor((xywh[0] - xywh[2] / 2, xywh[1] - xywh[3] / 2,
+                              xywh[0] + xywh[2] / 2, xywh[1] + xywh[3] / 2))]
+
+
+class _Results:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class FakeYOLO:
+    """
+    Detector returning fixed boxes for a scenario
+    detections: [(label, (x, y, w, h), confidence)]
+    """
+
+    names = {0: "zombie", 1: "sun", 2: "coin"}
+
+    def __init__(self, detections=()):
+        self.set_detections(detections)
+
+    def set_detections(self, detections):
+        ids = {label: cls_id for cls_id, label in self.names.items()}
+        self._results = [_Results([_Box(ids[label], xywh, conf) for label, xywh, conf in detections])]
+
+    def predict(self, source=None, conf=0.25, verbose=False, **kwargs):
+        return self._results
@@ -0,0 +1,129 @@
+"""
+Blob Detector - Classical sun and coin detection without YOLO
+The lawn/sky ROI is downscaled into a preallocated buffer and converted to HSV
+once. Each class is thresholded into the same mask buffer and split into
+connected components (16-bit labels, several times faster than 32-bit); the
+area and roundness limits reject the specks an opening used to remove.
+Classes are labeled separately because a coin touching a yellow sunflower
+would merge with it in a combined mask. Everything works in reused buffers;
+only the (small) component statistics are allocated per call
+"""
+
+import time
+import cv2
+import numpy as np
+from config import *
+from event_log import get_logger
+
+log = get_logger("blob")
+
+
+def collectible_roi(frame_shape) -> tuple:
+    """(x0, y0, x1, y1): lawn plus the sky above it, below the seed bar"""
+    height, width = frame_shape[:2]
+    seed_bottom = max(y for _, y in SEED_SLOTS.values()) + SEED_PACKET_SIZE[1] // 2
+    x0 = max(0, GRID[0][0][0] - CELL_WIDTH)
+    x1 = min(width, GRID[0][-1][0] + CELL_WIDTH)
+    y1 = min(height, GRID[-1][0][1] + CELL_HEIGHT)
+    return x0, min(max(0, seed_bottom), y1), x1, y1
+
+
+class BlobDetector:
+    """Поиск солнц и монет по цвету (HSV порог + связные компоненты)"""
+
+    def __init__(self, classes=None):
+        self.classes = classes or BLOB_CLASSES  # {label: {lower, upper, min_area, max_area}}
+        self.scale = BLOB_DOWNSCALE
+
+        # Buffers, rebuilt only when the frame size or geometry changes
+        self._geometry = None
+        self._roi = None
+        self._small = None
+        self._hsv = None
+        self._mask = None
+        self._labels = None
+
+        # YOLO cross-check statistics per label
+        self.last_cross_check = 0.0
+        self.cross_checks = 0
+        self.yolo_found = {label: 0 for label in self.classes}
+        self.blob_matched = {label: 0 for label in self.classes}
+
+    def _ensure_buffers(self, frame):
+        geometry = (frame.shape, id(GRID), id(SEED_SLOTS))
+        if geometry == self._geometry:
+            return
+        self._geometry = geometry
+        self._roi = collectible_roi(frame.shape)
+        x0, y0, x1, y1 = self._roi
+        size = (max(1, int((x1 - x0) * self.scale)), max(1, int((y1 - y0) * self.scale)))
+        shape = (size[1], size[0])
+        self._small = np.empty(shape + (3,), dtype=np.uint8)
+        self._hsv = np.empty_like(self._small)
+        self._mask = np.empty(shape, dtype=np.uint8)
+        self._labels = np.empty(shape, dtype=np.uint16)
+
+    def detect(self, frame, exclude=(), labels=None) -> dict:
+        """
+        Centroids of collectibles in full-frame pixels: {label: [(x, y)]}
+        exclude: [(x, y)] points (e.g. sunflower heads) whose nearby blobs are ignored
+        labels: classes to look for (default: all configured classes)
+        """
+        self._ensure_buffers(frame)
+        x0, y0, x1, y1 = self._roi
+        small = self._small
+        cv2.resize(frame[y0:y1, x0:x1], (small.shape[1], small.shape[0]), dst=small,
+                   interpolation=cv2.INTER_NEAREST)
+        cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=self._hsv)
+
+        area_scale = self.scale * self.scale
+        radius2 = BLOB_EXCLUDE_RADIUS * BLOB_EXCLUDE_RADIUS
+        found = {}
+        for label, spec in self.classes.items():
+            if labels is not None and label not in labels:
+                continue
+            cv2.inRange(self._hsv, spec["lower"], spec["upper"], dst=self._mask)
+            count, _, stats, centroids = cv2.connectedComponentsWithStats(
+                self._mask, self._labels, None, None, 8, cv2.CV_16U)
+
+            points = []
+            for i in range(1, count):
+                area = stats[i, cv2.CC_STAT_AREA] / area_scale
+                if not spec["min_area"] <= area <= spec["max_area"]:
+                    continue
+                # Round things fill about π/4 of their bounding box
+                box = stats[i, cv2.CC_STAT_WIDTH] * stats[i, cv2.CC_STAT_HEIGHT]
+                if stats[i, cv2.CC_STAT_AREA] < BLOB_MIN_FILL * box:
+                    continue
+                x = x0 + centroids[i, 0] / self.scale
+                y = y0 + centroids[i, 1] / self.scale
+                if any((x - ex) ** 2 + (y - ey) ** 2 < radius2 for ex, ey in exclude):
+                    continue
+                points.append((int(x), int(y)))
+            found[label] = points
+        return found
+
+    def cross_check_due(self, now=None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.last_cross_check >= BLOB_CROSS_CHECK_INTERVAL
+
+    def record_cross_check(self, blob_found: dict, yolo_found: dict, now=None):
+        """Count how many YOLO collectibles the blob detector also found"""
+        self.last_cross_check = time.time() if now is None else now
+        self.cross_checks += 1
+        radius2 = BLOB_MATCH_RADIUS * BLOB_MATCH_RADIUS
+        for label, yolo_points in yolo_found.items():
+            blobs = blob_found.get(label, [])
+            matched = sum(1 for yx, yy in yolo_points
+                          if any((yx - bx) ** 2 + (yy - by) ** 2 <= radius2 for bx, by in blobs))
+            self.yolo_found[label] = self.yolo_found.get(label, 0) + len(yolo_points)
+            self.blob_matched[label] = self.blob_matched.get(label, 0) + matched
+            if matched < len(yolo_points):
+                log.info("🔍 Сверка с YOLO: %s найдено %d/%d", label, matched, len(yolo_points),
+                         extra={"key": ("cross_check", label),
+                                "fields": {"label": label, "matched": matched, "yolo": len(yolo_points)}})
+
+    def recall(self, label) -> float:
+        """Share of YOLO-confirmed collectibles the blob detector found (None if unknown)"""
+        total = self.yolo_found.get(label, 0)
+        return self.blob_matched.get(label, 0) / total if total else None
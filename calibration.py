@@ -0,0 +1,285 @@
+"""
+Calibration - Locates the game window in a captured frame
+Derives GRID, SEED_SLOTS, SUN_COUNTER_REGION and the window position from a
+template match against a reference captured once with a known-good config.
+Results are cached per screen resolution; routine re-checks only match a
+small ROI around the expected anchor position
+"""
+
+import json
+import os
+import time
+import cv2
+import numpy as np
+from config import *
+from event_log import get_logger
+from profile_loader import apply_settings
+
+log = get_logger("calibration")
+
+# Config values a calibration sets (see derive_geometry)
+GEOMETRY_NAMES = ("GAME_WINDOW_X", "GAME_WINDOW_Y", "SEED_SLOTS", "SUN_COUNTER_REGION", "SEED_PACKET_SIZE",
+                  "GRID", "GRID_START_X", "GRID_START_Y", "CELL_WIDTH", "CELL_HEIGHT")
+
+
+class Calibrator:
+    """Калибровка окна игры и сетки по одному кадру"""
+
+    ANCHOR_FILE = "anchor.png"
+    REFERENCE_FILE = "reference.json"
+    CACHE_FILE = "cache.json"
+
+    def __init__(self, directory=CALIBRATION_DIR):
+        self.directory = directory
+        self.template = None  # Grayscale anchor template at reference scale
+        self.reference = None  # {"anchor": [x, y], "geometry": {...}}
+        self.cache = {}  # {"WxH": {"scale": s, "anchor": [x, y]}}
+
+        # Current calibration
+        self.scale = None
+        self.anchor = None  # (x, y) of anchor top-left in the frame
+        self._scaled_template = None
+        self.last_check = 0
+        self.full_scans = 0
+        self.rechecks = 0
+
+        self._load()
+
+    @property
+    def has_reference(self) -> bool:
+        return self.template is not None and self.reference is not None
+
+    @property
+    def calibrated(self) -> bool:
+        return self.anchor is not None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        """Load reference anchor and resolution cache if they exist"""
+        try:
+            if os.path.exists(self._path(self.REFERENCE_FILE)):
+                with open(self._path(self.REFERENCE_FILE), "r", encoding="utf-8") as f:
+                    self.reference = json.load(f)
+                self.template = cv2.imread(self._path(self.ANCHOR_FILE), cv2.IMREAD_GRAYSCALE)
+            if os.path.exists(self._path(self.CACHE_FILE)):
+                with open(self._path(self.CACHE_FILE), "r", encoding="utf-8") as f:
+                    self.cache = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Не удалось загрузить калибровку: {e}")
+            self.template = None
+            self.reference = None
+
+    def _save_cache(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(self.CACHE_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.cache, f, indent=2)
+        except Exception as e:
+            log.warning("⚠️ Не удалось сохранить кэш калибровки: %s", e, extra={"key": "calibration_cache"})
+
+    def capture_reference(self, frame) -> bool:
+        """
+        Store the anchor template and current geometry from a frame in which
+        the values in config.py are known to be correct
+        """
+        x, y, w, h = CALIBRATION_ANCHOR
+        x += GAME_WINDOW_X
+        y += GAME_WINDOW_Y
+        crop = frame[y:y + h, x:x + w]
+        if crop.shape[:2] != (h, w):
+            print("❌ Якорь калибровки выходит за пределы кадра")
+            return False
+
+        self.template = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        self.reference = {"anchor": [x, y], "geometry": _current_geometry()}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            cv2.imwrite(self._path(self.ANCHOR_FILE), self.template)
+            with open(self._path(self.REFERENCE_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.reference, f, indent=2)
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить эталон калибровки: {e}")
+            return False
+
+        # The reference frame is calibrated by definition
+        self.cache = {}
+        self._set(1.0, (x, y), self.template)
+        self._remember(frame)
+        print(f"💾 Эталон калибровки сохранён в {self.directory}")
+        return True
+
+    def calibrate(self, frame) -> bool:
+        """
+        Calibrate from a frame: cached result for this resolution if it still
+        matches, full multi-scale search otherwise. Applies the geometry
+        """
+        if not self.has_reference:
+            return False
+
+        cached = self.cache.get(_resolution_key(frame))
+        if cached:
+            scale, anchor = cached["scale"], tuple(cached["anchor"])
+            template = self._template_at(scale)
+            score, found = _match_roi(frame, template, anchor, CALIBRATION_RECHECK_MARGIN)
+            if score >= CALIBRATION_MIN_SCORE:
+                self._set(scale, found, template)
+                self._remember(frame)
+                log.info("📐 Калибровка из кэша (%s), масштаб %.2f", _resolution_key(frame), scale,
+                         extra={"event": "calibration", "fields": {"scale": scale, "cached": True}})
+                return True
+
+        return self._full_scan(frame)
+
+    def recheck(self, frame, force=False) -> bool:
+        """
+        Cheap drift check: match the anchor only inside a small ROI around
+        its expected position. Small shifts are corrected in place, a lost
+        anchor triggers a full rescan. Returns True if calibrated afterwards
+        """
+        if not self.calibrated:
+            return False
+        now = time.time()
+        if not force and now - self.last_check < CALIBRATION_RECHECK_INTERVAL:
+            return True
+        self.last_check = now
+        self.rechecks += 1
+
+        score, found = _match_roi(frame, self._scaled_template, self.anchor, CALIBRATION_RECHECK_MARGIN)
+        if score < CALIBRATION_MIN_SCORE:
+            log.warning("⚠️ Калибровка потеряна (совпадение %.2f), полный поиск...", score,
+                        extra={"event": "calibration_lost", "key": "calibration_lost", "fields": {"score": score}})
+            return self._full_scan(frame)
+
+        if found != self.anchor:
+            ax, ay = self.anchor
+            log.info("📐 Окно сместилось на (%d, %d), корректируем", found[0] - ax, found[1] - ay,
+                     extra={"event": "calibration_shift", "key": "calibration_shift",
+                            "fields": {"dx": found[0] - ax, "dy": found[1] - ay}})
+            self._set(self.scale, found, self._scaled_template)
+            self._remember(frame)
+        return True
+
+    def _full_scan(self, frame) -> bool:
+        """Multi-scale template search: coarse on a downscaled frame, refined at full size"""
+        self.full_scans += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        factor = CALIBRATION_SEARCH_DOWNSCALE
+        small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+
+        best = (-1.0, None, None)  # (score, scale, location in small frame)
+        for scale in CALIBRATION_SCALES:
+            template = cv2.resize(self.template, None, fx=scale * factor, fy=scale * factor,
+                                  interpolation=cv2.INTER_AREA)
+            if template.shape[0] > small.shape[0] or template.shape[1] > small.shape[1]:
+                continue
+            result = cv2.matchTemplate(small, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, loc = cv2.minMaxLoc(result)
+            if score > best[0]:
+                best = (score, scale, loc)
+
+        _, scale, loc = best
+        if scale is None:
+            log.error("❌ Калибровка не удалась: окно игры не найдено", extra={"key": "calibration_failed"})
+            return False
+
+        # Refine at full resolution around the coarse hit
+        template = self._template_at(scale)
+        coarse = (int(loc[0] / factor), int(loc[1] / factor))
+        score, found = _match_roi(frame, template, coarse, int(2 / factor) + 2)
+        if score < CALIBRATION_MIN_SCORE:
+            log.error("❌ Калибровка не удалась (совпадение %.2f)", score, extra={"key": "calibration_failed"})
+            return False
+
+        self._set(scale, found, template)
+        self._remember(frame)
+        geometry = self.reference["geometry"]
+        log.info("📐 Откалибровано: окно (%d,%d), масштаб %.2f, клетка %d×%d (эталон %d×%d)",
+                 GAME_WINDOW_X, GAME_WINDOW_Y, scale, CELL_WIDTH, CELL_HEIGHT,
+                 geometry["CELL_WIDTH"], geometry["CELL_HEIGHT"],
+                 extra={"event": "calibration", "fields": {"scale": scale, "cached": False}})
+        return True
+
+    def _template_at(self, scale):
+        if scale == 1.0:
+            return self.template
+        return cv2.resize(self.template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def _remember(self, frame):
+        self.cache[_resolution_key(frame)] = {"scale": self.scale, "anchor": list(self.anchor)}
+        self._save_cache()
+
+    def _set(self, scale, anchor, template):
+        """Switch to a calibration and push the derived geometry into config"""
+        self._scaled_template = template
+        self.scale = scale
+        self.anchor = anchor
+        self.last_check = time.time()
+        apply_settings(derive_geometry(self.reference, scale, anchor))
+
+
+def _match_roi(frame, template, anchor, margin):
+    """Best TM_CCOEFF_NORMED match of template within margin px of anchor"""
+    th, tw = template.shape[:2]
+    ax, ay = anchor
+    x0 = max(0, ax - margin)
+    y0 = max(0, ay - margin)
+    roi = frame[y0:ay + th + margin, x0:ax + tw + margin]
+    if roi.shape[0] < th or roi.shape[1] < tw:
+        return -1.0, anchor
+
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, loc = cv2.minMaxLoc(result)
+    return score, (x0 + loc[0], y0 + loc[1])
+
+
+def _resolution_key(frame) -> str:
+    return f"{frame.shape[1]}x{frame.shape[0]}"
+
+
+def _current_geometry() -> dict:
+    return {
+        "GAME_WINDOW_X": GAME_WINDOW_X,
+        "GAME_WINDOW_Y": GAME_WINDOW_Y,
+        "SEED_SLOTS": {str(k): list(v) for k, v in SEED_SLOTS.items()},
+        "SUN_COUNTER_REGION": list(SUN_COUNTER_REGION),
+        "SEED_PACKET_SIZE": list(SEED_PACKET_SIZE),
+        "GRID": [[list(cell) for cell in row] for row in GRID],
+        "GRID_START_X": GRID_START_X,
+        "GRID_START_Y": GRID_START_Y,
+        "CELL_WIDTH": CELL_WIDTH,
+        "CELL_HEIGHT": CELL_HEIGHT,
+    }
+
+
+def derive_geometry(reference: dict, scale: float, anchor: tuple) -> dict:
+    """Map reference geometry through p' = (p - anchor_ref) * scale + anchor"""
+    ref_x, ref_y = reference["anchor"]
+    ax, ay = anchor
+    g = reference["geometry"]
+
+    def px(x):
+        return int(round((x - ref_x) * scale + ax))
+
+    def py(y):
+        return int(round((y - ref_y) * scale + ay))
+
+    rx, ry, rw, rh = g["SUN_COUNTER_REGION"]
+    pw, ph = g.get("SEED_PACKET_SIZE", SEED_PACKET_SIZE)
+    grid = np.asarray(g["GRID"], dtype=np.float64)
+    grid[..., 0] = np.round((grid[..., 0] - ref_x) * scale + ax)
+    grid[..., 1] = np.round((grid[..., 1] - ref_y) * scale + ay)
+    return {
+        "GAME_WINDOW_X": px(g["GAME_WINDOW_X"]),
+        "GAME_WINDOW_Y": py(g["GAME_WINDOW_Y"]),
+        "SEED_SLOTS": {int(k): (px(x), py(y)) for k, (x, y) in g["SEED_SLOTS"].items()},
+        "SUN_COUNTER_REGION": (px(rx), py(ry), int(round(rw * scale)), int(round(rh * scale))),
+        "SEED_PACKET_SIZE": (int(round(pw * scale)), int(round(ph * scale))),
+        "GRID": [[(int(x), int(y)) for x, y in row] for row in grid],
+        "GRID_START_X": px(g["GRID_START_X"]),
+        "GRID_START_Y": py(g["GRID_START_Y"]),
+        "CELL_WIDTH": int(round(g["CELL_WIDTH"] * scale)),
+        "CELL_HEIGHT": int(round(g["CELL_HEIGHT"] * scale)),
+    }
@@ -0,0 +1,174 @@
+"""
+Cell Classifier - Zombie count per lawn cell from a tiny CPU model
+The lawn is cut into its GRID_ROWS × GRID_COLS cells, each cell is shrunk to a
+small tile and all tiles go through a two-layer perceptron in one batched
+matrix product. The model is trained offline (benchmarks/cells.py) on labels
+the YOLO detector produced for recorded frames
+"""
+
+import os
+import cv2
+import numpy as np
+from config import *
+
+
+class CellClassifier:
+    """Число зомби в каждой клетке газона по маленькой нейросети (numpy)"""
+
+    def __init__(self, path=CELL_CLASSIFIER_PATH):
+        self.path = path
+        self.params = None  # {"w1", "b1", "w2", "b2", "mean", "std"}
+        self.tile_size = CELL_TILE_SIZE
+        self._w1 = None  # First layer with pixel scaling and normalization folded in
+        self._b1 = None
+
+        self._geometry = None
+        self._rects = []
+        self._tiles = None  # (cells, h, w, 3) preallocated tile buffer
+        self._pixels = None  # (cells, D) float32 copy of the tiles
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @property
+    def available(self) -> bool:
+        return self.params is not None
+
+    def load(self, path):
+        data = np.load(path)
+        self.tile_size = tuple(int(v) for v in data["tile_size"])
+        self.set_params({name: data[name] for name in ("w1", "b1", "w2", "b2", "mean", "std")})
+        self._geometry = None
+        print(f"🧩 Классификатор клеток загружен: {path}")
+
+    def set_params(self, params):
+        """Use trained weights; (pixels / 255 - mean) / std is folded into the first layer"""
+        self.params = params
+        scale = 1.0 / (255.0 * params["std"])
+        self._w1 = (params["w1"] * scale[:, None]).astype(np.float32)
+        self._b1 = (params["b1"] - (params["mean"] / params["std"]) @ params["w1"]).astype(np.float32)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, tile_size=np.array(self.tile_size), **self.params)
+
+    def _ensure_geometry(self, frame):
+        geometry = (id(GRID), CELL_WIDTH, CELL_HEIGHT, frame.shape[:2], self.tile_size)
+        if geometry == self._geometry:
+            return
+        self._geometry = geometry
+        height, width = frame.shape[:2]
+        self._rects = []
+        for row in range(GRID_ROWS):
+            for col in range(GRID_COLS):
+                cx, cy = GRID[row][col]
+                x0 = min(max(0, cx - CELL_WIDTH // 2), max(0, width - CELL_WIDTH))
+                y0 = min(max(0, cy - CELL_HEIGHT // 2), max(0, height - CELL_HEIGHT))
+                self._rects.append((x0, y0, min(width, x0 + CELL_WIDTH), min(height, y0 + CELL_HEIGHT)))
+        w, h = self.tile_size
+        self._tiles = np.empty((len(self._rects), h, w, 3), dtype=np.uint8)
+        self._pixels = np.empty((len(self._rects), h * w * 3), dtype=np.float32)
+
+    def _fill_tiles(self, frame) -> np.ndarray:
+        """Shrink every cell into the tile buffer; (cells, D) uint8 view, row-major cell order"""
+        self._ensure_geometry(frame)
+        for index, (x0, y0, x1, y1) in enumerate(self._rects):
+            cv2.resize(frame[y0:y1, x0:x1], self.tile_size, dst=self._tiles[index], interpolation=cv2.INTER_AREA)
+        return self._tiles.reshape(len(self._rects), -1)
+
+    def features(self, frame) -> np.ndarray:
+        """(cells, D) float32 tile pixels in [0, 1], the model's training input"""
+        return self._fill_tiles(frame).astype(np.float32) * (1.0 / 255.0)
+
+    def _logits(self, pixels) -> np.ndarray:
+        """Class scores for (cells, D) raw tile pixels (0-255)"""
+        hidden = pixels @ self._w1
+        hidden += self._b1
+        np.maximum(hidden, 0.0, out=hidden)
+        return hidden @ self.params["w2"] + self.params["b2"]
+
+    def predict(self, frame) -> tuple:
+        """
+        (counts, confidence) as (GRID_ROWS, GRID_COLS) arrays
+        counts are capped at CELL_MAX_COUNT
+        """
+        tiles = self._fill_tiles(frame)
+        np.copyto(self._pixels, tiles)
+        logits = self._logits(self._pixels)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        counts = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(counts)), counts]
+        return counts.reshape(GRID_ROWS, GRID_COLS), confidence.reshape(GRID_ROWS, GRID_COLS)
+
+    def detect_points(self, frame) -> list:
+        """
+        Zombies as fuser detections: [(x, y, confidence, zombie_type)]
+        Points are the centers of the _pixel_to_grid cells (not GRID, whose
+        centers sit on cell edges there), so points_to_cells maps them back
+        """
+        counts, confidence = self.predict(frame)
+        points = []
+        for row, col in zip(*np.nonzero(counts)):
+            x = GRID_START_X + (col + 0.5) * CELL_WIDTH
+            y = GRID_START_Y + (row + 0.5) * CELL_HEIGHT
+            points.extend([(float(x), float(y), float(confidence[row, col]), ZOMBIE_DEFAULT_TYPE)]
+                          * int(counts[row, col]))
+        return points
+
+
+def train(features, labels, hidden=CELL_HIDDEN_UNITS, epochs=300, learning_rate=0.01, seed=0) -> dict:
+    """
+    Fit the two-layer perceptron with Adam on full batches
+    features: (N, D) tiles from CellClassifier.features; labels: (N,) zombie counts
+    Classes are weighted by inverse frequency: most cells are empty
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(features, dtype=np.float32)
+    y = np.minimum(np.asarray(labels, dtype=np.intp), CELL_MAX_COUNT)
+    classes = CELL_MAX_COUNT + 1
+
+    mean = x.mean(axis=0)
+    std = x.std(axis=0) + 1e-3
+    x = (x - mean) / std
+
+    frequency = np.bincount(y, minlength=classes).astype(np.float32)
+    weights = np.where(frequency > 0, len(y) / (classes * np.maximum(frequency, 1)), 0.0)[y]
+    weights = weights / weights.sum()
+    onehot = np.eye(classes, dtype=np.float32)[y]
+
+    params = {
+        "w1": rng.normal(0, np.sqrt(2.0 / x.shape[1]), (x.shape[1], hidden)).astype(np.float32),
+        "b1": np.zeros(hidden, dtype=np.float32),
+        "w2": rng.normal(0, np.sqrt(1.0 / hidden), (hidden, classes)).astype(np.float32),
+        "b2": np.zeros(classes, dtype=np.float32),
+    }
+    moments = {name: (np.zeros_like(v), np.zeros_like(v)) for name, v in params.items()}
+    beta1, beta2 = 0.9, 0.999
+
+    for step in range(1, epochs + 1):
+        pre = x @ params["w1"] + params["b1"]
+        h = np.maximum(pre, 0.0)
+        logits = h @ params["w2"] + params["b2"]
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        d_logits = (probs - onehot) * weights[:, None]
+        d_h = d_logits @ params["w2"].T
+        d_h[pre <= 0] = 0.0
+        grads = {"w2": h.T @ d_logits, "b2": d_logits.sum(axis=0),
+                 "w1": x.T @ d_h, "b1": d_h.sum(axis=0)}
+
+        for name, grad in grads.items():
+            m, v = moments[name]
+            m[:] = beta1 * m + (1 - beta1) * grad
+            v[:] = beta2 * v + (1 - beta2) * grad * grad
+            m_hat = m / (1 - beta1 ** step)
+            v_hat = v / (1 - beta2 ** step)
+            params[name] -= (learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)).astype(np.float32)
+
+    params["mean"] = mean.astype(np.float32)
+    params["std"] = std.astype(np.float32)
+    return params
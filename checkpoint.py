@@ -0,0 +1,150 @@
+"""
+Checkpoint - Crash-safe snapshots of the AI state for an instant resume
+A snapshot is a dict of sections ({"strategy": {...}, "sun": {...}, ...}).
+Numpy arrays in a section are stored as arrays, everything else as one JSON
+document, all in a single compressed .npz (no pickle, safe to load). The
+main loop only builds the snapshot; a background thread encodes it and
+replaces the file atomically (temp file, fsync, os.replace), so a crash
+leaves either the previous or the new checkpoint, never a torn one
+"""
+
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+import numpy as np
+from config import *
+from event_log import get_logger
+
+log = get_logger("checkpoint")
+
+FORMAT_VERSION = 1
+
+
+def encode(snapshot: dict) -> bytes:
+    """Sections of plain values and numpy arrays → compressed npz bytes"""
+    meta = {"version": FORMAT_VERSION, "sections": {}}
+    arrays = {}
+    for section, values in snapshot.items():
+        plain = {}
+        for key, value in values.items():
+            if isinstance(value, np.ndarray):
+                arrays[f"{section}.{key}"] = value
+            else:
+                plain[key] = value
+        meta["sections"][section] = plain
+    arrays["meta"] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode(data: bytes) -> dict:
+    """Inverse of encode(); raises ValueError on a foreign or corrupt file"""
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+            if meta.get("version") != FORMAT_VERSION:
+                raise ValueError(f"версия {meta.get('version')}, ожидалась {FORMAT_VERSION}")
+            snapshot = {section: dict(values) for section, values in meta["sections"].items()}
+            for name in archive.files:
+                if name != "meta":
+                    section, key = name.split(".", 1)
+                    snapshot.setdefault(section, {})[key] = archive[name]
+    except (OSError, EOFError, KeyError, zipfile.BadZipFile, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(str(e)) from e
+    return snapshot
+
+
+def write_atomic(path: str, data: bytes):
+    """Write next to the target, flush to disk, then swap it in"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp = f"{path}.tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def load(path=None) -> dict:
+    """Snapshot from a checkpoint file, None if missing or unreadable"""
+    path = path or CHECKPOINT_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    except ValueError as e:
+        log.warning("⚠️ Контрольная точка %s повреждена: %s", path, e)
+        return None
+
+
+class CheckpointWriter:
+    """Фоновая запись контрольных точек: в очереди только последний снимок"""
+
+    def __init__(self, path=None):
+        self.path = path or CHECKPOINT_PATH
+        self.writes = 0
+        self.last_write_ms = 0.0
+        self.last_size = 0
+        self._pending = None
+        self._condition = threading.Condition()
+        self._file_lock = threading.Lock()  # A write in progress finishes before discard()
+        self._thread = None
+        self._stopping = False
+
+    def submit(self, snapshot: dict):
+        """Queue a snapshot; an older one still waiting is replaced"""
+        with self._condition:
+            self._pending = snapshot
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                snapshot, self._pending = self._pending, None
+            self._write(snapshot)
+
+    def _write(self, snapshot):
+        started = time.perf_counter()
+        try:
+            data = encode(snapshot)
+            with self._file_lock:
+                write_atomic(self.path, data)
+        except Exception as e:
+            log.warning("⚠️ Ошибка записи контрольной точки: %s", e, extra={"key": "checkpoint_error"})
+            return
+        self.writes += 1
+        self.last_size = len(data)
+        self.last_write_ms = (time.perf_counter() - started) * 1000
+
+    def stop(self):
+        """Write what is still queued and end the thread"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self._stopping = False
+
+    def discard(self):
+        """Drop the queued snapshot and delete the file (the level is over)"""
+        with self._condition:
+            self._pending = None
+        with self._file_lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
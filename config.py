@@ -24,6 +24,17 @@ SEED_SLOTS = {
     10: (655, 40),  # Slot 10 (if exists)
 }
 
+# Size of a seed packet (width, height) centered on its SEED_SLOTS coordinate
+SEED_PACKET_SIZE = (50, 70)
+
+# ===== SEED BAR RECOGNITION =====
+# Identify plants in the seed bar from templates instead of asking
+SEED_RECOGNITION_ENABLED = True
+SEED_TEMPLATE_DIR = "assets/seed_packets"  # <plant name>.png, saved with [T]
+SEED_FEATURE_SIZE = (12, 16)  # Packets are resized to this (w, h) before matching
+SEED_MATCH_MIN_SCORE = 0.6  # Minimum correlation to accept a template match
+SEED_BAR_CHANGE_THRESHOLD = 0.9  # Re-recognize when a slot's similarity drops below
+
 # ===== SUN COUNTER =====
 # Region where sun counter is displayed (x, y, width, height)
 SUN_COUNTER_REGION = (21, 60, 56, 24)
@@ -118,11 +129,91 @@ ZOMBIE_ROW_OFFSET = -5  # Добавляем смещение вниз для д
 YOLO_MODEL_PATH = "assets/yolov8_pvz.pt"
 YOLO_CONFIDENCE = 0.4  # Понижено для лучшей детекции
 YOLO_CHECK_INTERVAL = 0.5  # Reduced from 2.0 to 0.5 for faster detection
+YOLO_WARMUP_SHAPE = (600, 800)  # (height, width) of the dummy warm-up frame
+
+# ===== COLLECTIBLE DETECTION =====
+# Detector per collectible class: "blob" (color threshold, no YOLO) or "yolo"
+COLLECTIBLE_DETECTORS = {"sun": "blob", "coin": "yolo"}
+BLOB_DOWNSCALE = 0.33  # ROI is thresholded at this scale (same recall as 0.5 on the benchmark boards)
+BLOB_CLASSES = {
+    # HSV bounds (OpenCV ranges) and blob area in full-resolution pixels
+    "sun": {"lower": (15, 120, 180), "upper": (35, 255, 255), "min_area": 900, "max_area": 8000},
+    "coin": {"lower": (0, 0, 190), "upper": (180, 40, 255), "min_area": 150, "max_area": 1500},
+}
+BLOB_MIN_FILL = 0.5  # Minimum blob area / bounding box area (round objects)
+BLOB_EXCLUDE_RADIUS = 20  # Blobs this close (px) to a sunflower head are the flower itself
+BLOB_CROSS_CHECK_INTERVAL = 10.0  # Seconds between YOLO cross-checks of blob classes
+BLOB_MATCH_RADIUS = 30  # Max distance (px) between a YOLO box center and a blob
+
+# ===== CELL CLASSIFIER =====
+# Alternative zombie perception: zombie count per lawn cell from a tiny model
+# trained on YOLO labels (python -m benchmarks.cells), no YOLO needed at runtime
+ZOMBIE_DETECTOR = "yolo"  # "yolo" or "cells" (falls back to YOLO without a trained model)
+CELL_CLASSIFIER_PATH = "assets/cell_classifier.npz"
+CELL_TILE_SIZE = (16, 20)  # (w, h) each cell is shrunk to
+CELL_MAX_COUNT = 3  # Counts above this are reported as this
+CELL_HIDDEN_UNITS = 32
+
+# ===== DETECTION FUSION =====
+# Zombie detections are merged over the last frames so a lower detector input
+# size or fewer detector runs don't make zombies flicker in and out
+FUSION_PROFILE = "balanced"
+FUSION_PROFILES = {
+    # imgsz: detector input size, detect_interval: seconds between detector runs,
+    # window: detector runs a track survives unseen, half_life: confidence decay (s),
+    # min_confidence: track confidence shown to the strategy,
+    # detector_confidence: YOLO threshold (lower is fine, fusion filters noise)
+    "accurate": {"imgsz": 640, "detect_interval": 0.0, "window": 2, "half_life": 0.5,
+                 "min_confidence": 0.35, "detector_confidence": 0.4},
+    "balanced": {"imgsz": 480, "detect_interval": 0.0, "window": 4, "half_life": 1.5,
+                 "min_confidence": 0.3, "detector_confidence": 0.3},
+    "fast": {"imgsz": 320, "detect_interval": 1.0, "window": 5, "half_life": 2.0,
+             "min_confidence": 0.25, "detector_confidence": 0.25},
+}
+FUSION_MATCH_DISTANCE = 1.0  # Max horizontal gap (cells) between a track and a detection
+
+# ===== ZOMBIE TYPES =====
+# hp: total toughness including armor, speed: cells per second while walking
+ZOMBIE_TYPES = {
+    "basic": {"hp": 270, "speed": 0.21},
+    "flag": {"hp": 270, "speed": 0.27},
+    "conehead": {"hp": 640, "speed": 0.21},
+    "buckethead": {"hp": 1370, "speed": 0.21},
+    "pole_vaulting": {"hp": 500, "speed": 0.42},
+    "newspaper": {"hp": 420, "speed": 0.21},
+    "screen_door": {"hp": 1370, "speed": 0.21},
+    "football": {"hp": 1670, "speed": 0.42},
+    "dancing": {"hp": 500, "speed": 0.42},
+}
+ZOMBIE_DEFAULT_TYPE = "basic"  # Type of a generic "zombie" box nobody classified
+# Optional crop classifier (YOLO classification model) for generic "zombie" boxes;
+# without it the armor color above the head tells cones and buckets apart
+ZOMBIE_CLASSIFIER_PATH = "assets/zombie_types.pt"
+ZOMBIE_CROP_SIZE = 64  # Classifier input (square crops)
+ZOMBIE_HEAD_FRACTION = 0.3  # Top share of the box checked for armor color
+ZOMBIE_ARMOR_COLORS = {
+    # HSV bounds of the armor and the share of the head region it must cover
+    "conehead": {"lower": (5, 120, 120), "upper": (22, 255, 255), "min_share": 0.2},
+    "buckethead": {"lower": (0, 0, 150), "upper": (180, 40, 255), "min_share": 0.3},
+}
 
 # ===== TIMING =====
 LOOP_DELAY = 0.5  # Main loop delay in seconds
 CLICK_DELAY = 0.15  # Delay between clicks
 STATUS_CHECK_COOLDOWN = 2.0  # Seconds between status checks for same seed
+SUN_SWEEP_INTERVAL = 2.0  # Seconds between sun/coin sweeps
+
+# ===== TICK WATCHDOG =====
+# Optional work is dropped level by level while ticks run over budget
+# (no_sun_sweep → low_res → reuse_tracks → predicted_cooldowns) and restored with headroom
+WATCHDOG_ENABLED = True
+TICK_BUDGET = 0.3  # Seconds of work per tick (LOOP_DELAY sleep not included)
+WATCHDOG_ESCALATE_TICKS = 3  # Late ticks in a row before dropping a level
+WATCHDOG_RECOVER_TICKS = 10  # Ticks with headroom in a row before restoring a level
+WATCHDOG_HEADROOM = 0.6  # A tick has headroom below this share of the budget
+WATCHDOG_SUN_INTERVAL = 8.0  # no_sun_sweep: seconds between sun/coin sweeps
+WATCHDOG_LOW_IMGSZ = 320  # low_res: detector input size cap
+WATCHDOG_DETECT_INTERVAL = 1.0  # reuse_tracks: seconds between detector runs
 
 # ===== STRATEGY SETTINGS =====
 # Sunflower strategy
@@ -130,6 +221,14 @@ INITIAL_SUNFLOWERS = 3  # Plant 3 sunflowers first (rows 1,2,3)
 ADDITIONAL_SUNFLOWERS = 2  # Plant 2 more when economy is good (rows 0,4)
 ECONOMY_THRESHOLD = 300  # Sun amount to trigger additional sunflowers
 
+# Sun economy forecast
+SUN_VALUE = 25  # Sun per collected sun drop
+SUNFLOWER_SUN_INTERVAL = 24.0  # Seconds between drops of one sunflower
+SKY_SUN_INTERVAL = 10.0  # Seconds between sky drops (0 for night levels)
+FORECAST_RATE_WINDOW = 30.0  # Window (s) of the observed income rate
+FORECAST_WARMUP = 60.0  # Seconds until observations fully replace the model
+SAVE_HORIZON = 8.0  # Save for a better plant if affordable within this many seconds
+
 # Sunflower column (always column 0)
 SUNFLOWER_COLUMN = 0
 
@@ -143,6 +242,11 @@ ZOMBIE_MEMORY_TIME = 20  # Remember zombie rows for 20 seconds (уменьшен
 # Panic mode threshold (zombie column)
 PANIC_COLUMN = 3  # If zombie reaches this column, use emergency plants
 
+# HP-weighted threat: zombie HP × speed / cells left to the house, i.e. the
+# damage per second the row needs to stop the zombie in time
+EMERGENCY_THREAT = 14.0  # Row threat that triggers emergency plants (≈ basic zombie at PANIC_COLUMN)
+EMERGENCY_THREAT_COLUMN = 5  # Zombies further right don't count toward an emergency
+
 # Defensive plant placement
 DEFENSE_TRIGGER_COLUMN = 4  # Plant walls when zombies reach this column
 
@@ -150,23 +254,141 @@ DEFENSE_TRIGGER_COLUMN = 4  # Plant walls when zombies reach this column
 AGGRESSIVE_MODE = True  # После 3 подсолнухов сразу начинаем защиту
 MIN_SUN_FOR_OFFENSE = 150  # Минимум солнц для начала атаки
 
+# Action batching
+MAX_ACTIONS_PER_TICK = 4  # Non-conflicting plantings executed back-to-back per tick
+SUN_SURPLUS_THRESHOLD = 200  # Sun at decision time that counts as a surplus tick
+
+# Time-series history (ring buffers for stats and metrics)
+HISTORY_CAPACITY = 2048  # Samples kept per series
+HISTORY_WINDOW = 300.0  # Seconds of sun level / action history kept
+
 # ===== PEASHOOTER PLACEMENT RESTRICTIONS =====
 # Restrict peashooters to specific rows and columns
 PEASHOOTER_ALLOWED_ROWS = [1, 2, 3]  # Rows 2, 3, 4 (0-indexed: 1, 2, 3)
 PEASHOOTER_ALLOWED_COLS = [1, 2, 3, 4, 5]  # Columns 1-5
 
+# ===== FORMATIONS =====
+# Where each role goes. A role entry gives "cols" (filled in this order) and
+# optionally "rows" (order within a column, default middle rows first); a role
+# left out uses the classic layout from SUNFLOWER_COLUMN / OFFENSE_*_COLUMN
+# ("wall" and "mine" then get no fixed slots). "constraints" limits single
+# plants further, on top of PEASHOOTER_ALLOWED_ROWS/COLS
+FORMATION = "classic"
+FORMATIONS = {
+    "classic": {},
+    "double_sun": {  # Two sunflower columns for long levels
+        "sunflower": {"cols": [0, 1]},
+        "shooter": {"cols": [2, 3, 4, 5, 6]},
+        "wall": {"cols": [7]},
+    },
+    "fortress": {  # Compact shooter block behind a wall line and a mine field
+        "sunflower": {"cols": [0]},
+        "shooter": {"cols": [1, 2, 3]},
+        "wall": {"cols": [4]},
+        "mine": {"cols": [5, 6]},
+    },
+    "snow_center": {  # Slowing lanes in the middle, damage on the edges
+        "sunflower": {"cols": [0]},
+        "shooter": {"cols": [1, 2, 3, 4, 5]},
+        "wall": {"cols": [6]},
+        "constraints": {"snow pea": {"rows": [1, 2, 3]}, "repeater": {"rows": [0, 2, 4]}},
+    },
+}
+PLANT_ROLES = {
+    "sunflower": "sunflower",
+    "peashooter": "shooter",
+    "snow pea": "shooter",
+    "repeater": "shooter",
+    "wall-nut": "wall",
+    "tall-nut": "wall",
+    "potato mine": "mine",
+}
+MINE_LEAD_CELLS = 3  # Zombie must be this many cells past a mine slot (mines arm slowly)
+
 # ===== PLANT EATEN DETECTION =====
 # Distance threshold for considering a plant eaten
 PLANT_EATEN_THRESHOLD = 1  # If zombie is 1 cell away, consider plant eaten
 
+# ===== LAWN MONITOR =====
+# Vision check of planted cells (eaten plants, damaged wall-nuts)
+LAWN_MONITOR_ENABLED = True
+LAWN_CELL_INSET = 0.6  # Fraction of the cell examined (keeps neighbours out)
+LAWN_SAMPLE_GRID = 5  # N×N sparse pixels per cell for change detection
+LAWN_CHANGE_THRESHOLD = 12.0  # Mean abs difference of samples that marks a cell changed
+LAWN_EMPTY_DISTANCE = 0.25  # Bhattacharyya distance below which a cell looks empty
+LAWN_CONFIRM_FRAMES = 2  # Consecutive "empty" looks before a plant counts as eaten
+WALLNUT_DAMAGE_DISTANCE = 0.35  # Distance from the fresh wall-nut that counts as damaged
+
+# ===== LEVEL MONITOR =====
+# Seed selection / playing / level end detection for unattended multi-level runs
+LEVEL_MONITOR_ENABLED = True
+LEVEL_STATE_DIR = "assets/level_states"  # <state>_<n>.png references, saved with [L]
+LEVEL_FRAME_STRIDE = 8  # Pixel stride of the view the thumbnail is built from
+LEVEL_THUMB_SIZE = (32, 24)  # (w, h) thumbnail compared against references
+LEVEL_STATE_MIN_SCORE = 0.8  # Minimum correlation to accept a reference match
+LEVEL_CONFIRM_FRAMES = 3  # Agreeing frames before a state change is accepted
+LEVEL_LAWN_GREEN_MIN = 0.35  # Green share of the lawn that means "playing" without references
+LEVEL_REFERENCE_TIMEOUT = 5.0  # Seconds to pick the state (keys 1/2/3) after [L]
+
+# ===== ACTION VERIFICATION =====
+# Plantings are committed optimistically and confirmed from the next frames
+VERIFY_MAX_TICKS = 2  # Ticks to wait for evidence before rolling back
+VERIFY_SEED_DARKEN = 0.85  # Seed packet brightness ratio that means "recharging"
+VERIFY_CHANGE_THRESHOLD = 8.0  # Mean abs gray difference that counts as changed
+
 # ===== CHERRY BOMB SETTINGS =====
 # Minimum zombies in 3x3 area to use cherry bomb
 CHERRY_BOMB_3X3_THRESHOLD = 3
 # Distance threshold for placing cherry bomb near peashooter
-CHERRY_BOMB_CLOSE_DISTANCE = 2  # If zombie is 2 cells from peashooter
+CHERRY_BOMB_CLOSE_DISTANCE = 2  # Zombies this close to a shooter count double
+# Minimum zombies in one row to use jalapeno
+JALAPENO_ROW_THRESHOLD = 4
+
+# Plants that shoot along their row
+SHOOTER_PLANTS = ("peashooter", "snow pea", "repeater")
+
+# Lane damage budget: shooters go to the row whose threat exceeds its DPS the most
+PLANT_DPS = {"peashooter": 14.0, "snow pea": 21.0, "repeater": 28.0}  # Snow pea counts its slow
+LANE_BASE_THREAT = 14.0  # Threat assumed for every row, seen zombies or not (one peashooter)
 
 # ===== CURSOR MOVEMENT =====
 # Smooth cursor movement settings
 SMOOTH_CURSOR_ENABLED = False  # Toggle smooth cursor movement
 SMOOTH_CURSOR_FPS = 60  # Target FPS for smooth movement
 SMOOTH_CURSOR_DURATION = 0.3  # Duration of movement in seconds
+
+# ===== CALIBRATION =====
+# Automatic window/grid calibration against a reference captured with [K]
+CALIBRATION_ENABLED = True
+CALIBRATION_DIR = "assets/calibration"  # Reference anchor + per-resolution cache
+CALIBRATION_ANCHOR = (0, 0, 200, 90)  # (x, y, w, h) from window origin: sun counter + first seeds
+CALIBRATION_SCALES = (0.75, 0.875, 1.0, 1.125, 1.25, 1.5)  # Window scales tried in a full scan
+CALIBRATION_SEARCH_DOWNSCALE = 0.5  # Full scan runs on a frame downscaled by this factor
+CALIBRATION_MIN_SCORE = 0.7  # Minimum normalized correlation to accept a match
+CALIBRATION_RECHECK_INTERVAL = 5.0  # Seconds between cheap ROI re-checks
+CALIBRATION_RECHECK_MARGIN = 12  # ROI margin (px) around the expected anchor
+
+# ===== CHECKPOINTS =====
+# Periodic snapshots of the level state; restart with --resume to continue the level
+CHECKPOINT_ENABLED = True
+CHECKPOINT_PATH = "checkpoints/state.npz"
+CHECKPOINT_INTERVAL = 2.0  # Seconds between snapshots
+CHECKPOINT_MAX_AGE = 300.0  # Older checkpoints are ignored (the level has moved on)
+
+# ===== PROFILES =====
+# Directory with JSON profiles (selected with --profile or PVZ_PROFILE)
+PROFILES_DIR = "configs"
+
+# ===== PROFILER =====
+# Built-in sampling profiler (toggle with [F] while running)
+PROFILER_INTERVAL = 0.005  # Seconds between stack samples
+PROFILER_OUTPUT_DIR = "profiles"  # Folded stacks are written here
+ALLOC_TRACE_FRAMES = 1  # Stack depth recorded per allocation ([A] allocation tracking)
+ALLOC_REPORT_TOP = 10  # Code lines listed in the allocation report
+
+# ===== LOGGING =====
+# Console and JSON-lines output written by a background thread (event_log.py)
+LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING or ERROR
+LOG_JSON_PATH = ""  # JSON-lines file with every record and its fields ("" = console only)
+LOG_RATE_LIMIT = 2.0  # Seconds between repeats of a keyed message (danger warnings, skipped actions)
+LOG_QUEUE_SIZE = 10000  # Records waiting for the writer; further records are dropped and counted
@@ -0,0 +1,190 @@
+"""
+Event Log - Structured logging that stays off the main loop
+Records are put on a bounded queue and a background thread (QueueListener)
+formats and writes them, so a tick only pays for an enqueue. Messages use
+%-style arguments and are formatted in the writer thread. Messages logged
+with a key are rate-limited before they reach the queue. The console keeps
+the usual emoji lines; LOG_JSON_PATH adds a JSON-lines file with the same
+records and their structured fields
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from config import *
+
+LOGGER_NAME = "pvz"
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+def get_logger(name: str = None) -> logging.Logger:
+    """Project logger, or a child of it ("pvz.strategy")"""
+    return log.getChild(name) if name else log
+
+
+class RateLimitFilter(logging.Filter):
+    """Пропускает сообщение с ключом не чаще раза в interval секунд"""
+
+    def __init__(self, interval=None):
+        super().__init__()
+        self.interval = LOG_RATE_LIMIT if interval is None else interval
+        self._last = {}  # {key: (time emitted, suppressed since)}
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        key = getattr(record, "key", None)
+        if key is None or self.interval <= 0:
+            return True
+        with self._lock:
+            emitted, suppressed = self._last.get(key, (None, 0))
+            if emitted is not None and record.created - emitted < self.interval:
+                self._last[key] = (emitted, suppressed + 1)
+                return False
+            self._last[key] = (record.created, 0)
+        record.suppressed = suppressed
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The console lines as before: the message itself, plus a count of hidden repeats"""
+
+    def format(self, record) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (ещё ×{suppressed})"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, event and fields"""
+
+    def format(self, record) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in ("event", "key", "suppressed"):
+            value = getattr(record, name, None)
+            if value:
+                entry[name] = value if name != "key" else str(value)
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry["fields"] = fields
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class AsyncHandler(logging.handlers.QueueHandler):
+    """Enqueues records untouched; never blocks, drops and counts records when the queue is full"""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener runs in this process: formatting is left to the writer thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is when the record is emitted (redirect_stdout applies)"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+def _console_handler() -> logging.Handler:
+    handler = StdoutHandler()
+    handler.setFormatter(ConsoleFormatter())
+    return handler
+
+
+_listener = None
+_async_handler = None
+
+
+def setup_logging(level=None, json_path=None):
+    """
+    Route the project logger through the background writer
+    level: LOG_LEVEL by default; json_path: LOG_JSON_PATH by default ("" = console only)
+    """
+    global _listener, _async_handler
+    stop_logging()
+
+    handlers = [_console_handler()]
+    json_path = LOG_JSON_PATH if json_path is None else json_path
+    if json_path:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        file_handler = logging.FileHandler(json_path, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    record_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _async_handler = AsyncHandler(record_queue)
+    _async_handler.addFilter(RateLimitFilter())
+    log.handlers[:] = [_async_handler]
+    log.setLevel(level or LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(record_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Write out everything queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        log.handlers[:] = [_sync_handler]
+    if _async_handler is not None and _async_handler.dropped:
+        print(f"⚠️ Журнал: потеряно {_async_handler.dropped} записей (очередь переполнена)")
+        _async_handler.dropped = 0
+
+
+def flush_logging(timeout=1.0):
+    """
+    Wait until the writer thread has written everything queued so far
+    Call before printing directly, so the output stays in order
+    """
+    if _listener is not None:
+        deadline = time.monotonic() + timeout
+        while _listener.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.001)
+    sys.stdout.flush()
+
+
+def dropped_records() -> int:
+    return _async_handler.dropped if _async_handler is not None else 0
+
+
+# Until setup_logging() runs (tools, benchmarks), records are written synchronously
+_sync_handler = _console_handler()
+_sync_handler.addFilter(RateLimitFilter())
+log.addHandler(_sync_handler)
+log.setLevel(LOG_LEVEL)
+log.propagate = False
+
+atexit.register(stop_logging)
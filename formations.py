@@ -0,0 +1,109 @@
+"""
+Formations - Declarative lawn layouts compiled into placement lists
+A formation says which columns and rows each role (sunflower, shooter, wall,
+mine) may use. It is compiled once into an ordered slot list per plant type
+and per (plant type, row); with an occupancy mask and a cursor per list the
+next free slot is found in amortized O(1)
+"""
+
+import numpy as np
+from config import *
+
+
+def middle_out_rows() -> list:
+    """Rows ordered from the middle of the lawn outwards (2, 1, 3, 0, 4)"""
+    return sorted(range(GRID_ROWS), key=lambda row: (abs(row - GRID_ROWS // 2), row))
+
+
+def _default_area(role) -> dict:
+    """Role area when a formation leaves it out: the classic layout from the config"""
+    if role == "sunflower":
+        return {"cols": [SUNFLOWER_COLUMN]}
+    if role == "shooter":
+        return {"cols": list(range(OFFENSE_START_COLUMN, OFFENSE_END_COLUMN + 1))}
+    return {"cols": []}
+
+
+def formation_key() -> tuple:
+    """Settings a compiled formation depends on; recompile when it changes"""
+    return (FORMATION, id(FORMATIONS), GRID_ROWS, GRID_COLS, SUNFLOWER_COLUMN,
+            OFFENSE_START_COLUMN, OFFENSE_END_COLUMN,
+            tuple(PEASHOOTER_ALLOWED_ROWS), tuple(PEASHOOTER_ALLOWED_COLS))
+
+
+class Formation:
+    """Скомпилированная расстановка: упорядоченные клетки для каждого растения"""
+
+    def __init__(self, name=None):
+        self.name = name or FORMATION
+        spec = FORMATIONS[self.name]
+        self.occupied = np.zeros((GRID_ROWS, GRID_COLS), dtype=bool)
+
+        # Per-plant limits: PEASHOOTER_ALLOWED_* plus the formation's own constraints
+        limits = {"peashooter": {"rows": PEASHOOTER_ALLOWED_ROWS, "cols": PEASHOOTER_ALLOWED_COLS}}
+        for plant_name, limit in spec.get("constraints", {}).items():
+            limits[plant_name] = {**limits.get(plant_name, {}), **limit}
+
+        self._slots = {}  # {(plant, row or None): [(col, row)]}
+        for plant_name, role in PLANT_ROLES.items():
+            area = spec.get(role) or _default_area(role)
+            rows = area.get("rows") or middle_out_rows()
+            limit = limits.get(plant_name, {})
+            allowed_rows = set(limit.get("rows", range(GRID_ROWS)))
+            allowed_cols = set(limit.get("cols", range(GRID_COLS)))
+            # Column by column, rows in formation order within a column
+            slots = [(col, row) for col in area["cols"] for row in rows
+                     if 0 <= col < GRID_COLS and 0 <= row < GRID_ROWS
+                     and row in allowed_rows and col in allowed_cols]
+            self._slots[(plant_name, None)] = slots
+            for row in range(GRID_ROWS):
+                self._slots[(plant_name, row)] = [slot for slot in slots if slot[1] == row]
+
+        self._cursor = {key: 0 for key in self._slots}
+        # Lists (and index) each cell appears in, to rewind cursors when it is freed
+        self._positions = {}
+        for key, slots in self._slots.items():
+            for index, cell in enumerate(slots):
+                self._positions.setdefault(cell, []).append((key, index))
+
+    def load(self, cells):
+        """Occupancy from the currently planted cells"""
+        self.occupied[:] = False
+        for col, row in cells:
+            if 0 <= col < GRID_COLS and 0 <= row < GRID_ROWS:
+                self.occupied[row, col] = True
+        self._cursor = {key: 0 for key in self._slots}
+
+    def occupy(self, col: int, row: int):
+        if 0 <= col < GRID_COLS and 0 <= row < GRID_ROWS:
+            self.occupied[row, col] = True
+
+    def free(self, col: int, row: int):
+        if 0 <= col < GRID_COLS and 0 <= row < GRID_ROWS:
+            self.occupied[row, col] = False
+            for key, index in self._positions.get((col, row), ()):
+                if index < self._cursor[key]:
+                    self._cursor[key] = index
+
+    def next_slot(self, plant_name: str, row: int = None, skip=()) -> tuple:
+        """
+        Next free (col, row) for a plant in formation order, None if full
+        row: only slots in this row; skip: cells taken by other means (batch plans)
+        """
+        key = (plant_name, row)
+        slots = self._slots.get(key)
+        if not slots:
+            return None
+        # Occupied prefix never needs another look until a cell is freed
+        index = self._cursor[key]
+        while index < len(slots) and self.occupied[slots[index][1], slots[index][0]]:
+            index += 1
+        self._cursor[key] = index
+        for col, slot_row in slots[index:]:
+            if not self.occupied[slot_row, col] and (col, slot_row) not in skip:
+                return col, slot_row
+        return None
+
+    def rows_for(self, plant_name: str) -> set:
+        """Rows where the formation has any slot for the plant"""
+        return {row for _, row in self._slots.get((plant_name, None), ())}
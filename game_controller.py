@@ -8,10 +8,21 @@ import time
 import cv2
 import numpy as np
 from config import *
+from event_log import get_logger
+
+log = get_logger("controller")
 
 class GameController:
     def __init__(self):
         self.last_click_time = 0
+        self.sweep_click_time = 0.0  # Seconds the last collect_collectibles spent clicking
+        self.plant_click_time = 0.0  # Seconds plant() spent clicking since the caller last reset it
+        
+        # Reused conversion buffers: two frames so the previous tick's frame
+        # stays valid while the next one is captured
+        self._frames = [None, None]
+        self._frame_index = 0
+        self._seed_hsv = None  # Scratch HSV buffer for check_seed_ready
         pyautogui.PAUSE = 0.05  # Reduce default pause
         pyautogui.FAILSAFE = True  # Move mouse to corner to stop
     
@@ -24,14 +35,14 @@ class GameController:
             self.last_click_time = time.time()
             return True
         except Exception as e:
-            print(f"❌ Ошибка клика по семени {coord}: {e}")
+            log.error("❌ Ошибка клика по семени %s: %s", coord, e, extra={"key": "click_seed_error"})
             return False
     
     def click_grid(self, col: int, row: int) -> bool:
         """Click on a grid cell"""
         try:
             if not (0 <= row < GRID_ROWS and 0 <= col < GRID_COLS):
-                print(f"❌ Неверные координаты: col={col}, row={row}")
+                log.error("❌ Неверные координаты: col=%d, row=%d", col, row)
                 return False
             
             x, y = GRID[row][col]
@@ -40,11 +51,12 @@ class GameController:
             self.last_click_time = time.time()
             return True
         except Exception as e:
-            print(f"❌ Ошибка клика по ячейке ({col},{row}): {e}")
+            log.error("❌ Ошибка клика по ячейке (%d,%d): %s", col, row, e, extra={"key": "click_grid_error"})
             return False
     
     def plant(self, plant_coord: tuple, grid_col: int, grid_row: int) -> bool:
-        """Plant a plant at specified grid location"""
+        """Plant a plant at specified grid location; the click time is added to plant_click_time"""
+        clicks_started = time.perf_counter()
         try:
             # Click seed
             if not self.click_seed(plant_coord):
@@ -56,8 +68,10 @@ class GameController:
             
             return True
         except Exception as e:
-            print(f"❌ Ошибка посадки: {e}")
+            log.error("❌ Ошибка посадки: %s", e, extra={"key": "plant_error"})
             return False
+        finally:
+            self.plant_click_time += time.perf_counter() - clicks_started
     
     def check_seed_ready(self, coord: tuple) -> bool:
         """
@@ -70,98 +84,186 @@ class GameController:
             # Capture seed icon area
             size = 45
             region = (x - size//2, y - size//2, size, size)
-            screenshot = pyautogui.screenshot(region=region)
-            img = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+            rgb = np.asarray(pyautogui.screenshot(region=region))
             
-            # Convert to HSV
-            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+            # Convert to HSV straight from RGB into the scratch buffer
+            if self._seed_hsv is None or self._seed_hsv.shape != rgb.shape:
+                self._seed_hsv = np.empty_like(rgb)
+            cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV, dst=self._seed_hsv)
             
             # Check average brightness (V channel)
-            avg_brightness = np.mean(hsv[:, :, 2])
+            avg_brightness = cv2.mean(self._seed_hsv)[2]
             
             # If brightness > threshold, seed is ready
             is_ready = avg_brightness > 80
             
             return is_ready
         except Exception as e:
-            print(f"⚠️ Ошибка проверки семени: {e}")
+            log.warning("⚠️ Ошибка проверки семени: %s", e, extra={"key": "seed_check_error"})
             return True  # Assume ready on error
     
-    def collect_collectibles(self, yolo_model, sun_tracker=None):
+    def capture_frame(self):
+        """
+        Capture the whole screen as a BGR frame
+        One frame per tick is shared by calibration and detection
+        The BGR frame lives in a reused buffer and is only valid until the
+        next-but-one capture; copy it to keep it longer
+        """
+        # np.asarray avoids the extra copy np.array made; PIL's own buffer is
+        # the only per-capture allocation left
+        rgb = np.asarray(pyautogui.screenshot())
+        frame = self._frame_buffer(rgb.shape)
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=frame)
+        return frame
+    
+    def _frame_buffer(self, shape):
+        """Next of the two frame buffers, (re)allocated only when the size changes"""
+        self._frame_index ^= 1
+        frame = self._frames[self._frame_index]
+        if frame is None or frame.shape != shape:
+            frame = self._frames[self._frame_index] = np.empty(shape, dtype=np.uint8)
+        return frame
+    
+    def collect_collectibles(self, yolo_model, sun_tracker=None, frame=None, blob_detector=None, exclude=()):
         """
-        Collect suns and coins using YOLO detection
+        Collect suns and coins
+        Classes set to "blob" in COLLECTIBLE_DETECTORS are found by blob_detector
+        (YOLO only cross-checks them periodically), the rest by YOLO
         If sun_tracker is provided, update sun count
-        Returns number of items collected
+        If frame is provided it is used instead of a fresh screenshot
+        exclude: sunflower head positions the blob detector must ignore
+        Returns number of items collected; the time spent clicking (paced by
+        sleeps, not work) is left in sweep_click_time
         """
-        if yolo_model is None:
+        self.sweep_click_time = 0.0
+        blob_labels = set()
+        if blob_detector is not None:
+            blob_labels = {label for label, detector in COLLECTIBLE_DETECTORS.items() if detector == "blob"}
+        yolo_labels = {"sun", "coin"} - blob_labels
+        if yolo_model is None and not blob_labels:
             return 0
         
         try:
-            screenshot = pyautogui.screenshot()
-            frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+            if frame is None:
+                frame = self.capture_frame()
             
-            results = yolo_model.predict(source=frame, conf=YOLO_CONFIDENCE, verbose=False)[0]
+            targets = []  # [(label, x, y)]
+            blob_found = {}
+            if blob_labels:
+                blob_found = blob_detector.detect(frame, exclude, blob_labels)
+                for label in blob_labels:
+                    targets.extend((label, x, y) for x, y in blob_found.get(label, []))
+            
+            cross_check = bool(blob_labels) and blob_detector.cross_check_due()
+            if yolo_model is not None and (yolo_labels or cross_check):
+                yolo_found = self._detect_collectibles(yolo_model, frame)
+                for label in yolo_labels:
+                    targets.extend((label, x, y) for x, y in yolo_found[label])
+                if cross_check:
+                    blob_detector.record_cross_check(
+                        blob_found, {label: yolo_found[label] for label in blob_labels})
             
             collected = 0
             sun_collected = 0
             
-            for box in results.boxes:
-                cls_id = int(box.cls[0])
-                label = yolo_model.names[cls_id]
+            clicks_started = time.perf_counter()
+            for label, x, y in targets:
+                pyautogui.click(int(x), int(y))
+                collected += 1
                 
-                if label in ["sun", "coin"]:
-                    x, y, w, h = box.xywh[0].cpu().numpy()
-                    pyautogui.click(int(x), int(y))
-                    collected += 1
-                    
-                    # Track sun collection
-                    if label == "sun" and sun_tracker is not None:
-                        sun_tracker.add_sun(25)  # Default sun value
-                        sun_collected += 1
-                    
-                    time.sleep(0.05)
+                # Track sun collection
+                if label == "sun" and sun_tracker is not None:
+                    sun_tracker.add_sun(25)  # Default sun value
+                    sun_collected += 1
+                
+                time.sleep(0.05)
+            self.sweep_click_time = time.perf_counter() - clicks_started
             
             if sun_collected > 0 and sun_tracker is not None:
-                print(f"☀️ Собрано солнц: {sun_collected} (+{sun_collected * 25}) | Всего: {sun_tracker.sun_count}")
+                log.info("☀️ Собрано солнц: %d (+%d) | Всего: %d", sun_collected, sun_collected * 25,
+                         sun_tracker.sun_count, extra={"event": "collect",
+                                                       "fields": {"suns": sun_collected, "collected": collected,
+                                                                  "sun": sun_tracker.sun_count}})
             
             return collected
         
         except Exception as e:
-            print(f"⚠️ Ошибка сбора: {e}")
+            log.warning("⚠️ Ошибка сбора: %s", e, extra={"key": "collect_error"})
             return 0
     
-    def detect_zombies(self, yolo_model) -> list:
+    def _detect_collectibles(self, yolo_model, frame) -> dict:
+        """YOLO sun/coin box centers: {"sun": [(x, y)], "coin": [(x, y)]}"""
+        results = yolo_model.predict(source=frame, conf=YOLO_CONFIDENCE, verbose=False)[0]
+        
+        found = {"sun": [], "coin": []}
+        for box in results.boxes:
+            label = yolo_model.names[int(box.cls[0])]
+            if label in found:
+                x, y, w, h = box.xywh[0].cpu().numpy()
+                found[label].append((int(x), int(y)))
+        return found
+    
+    def detect_zombies(self, yolo_model, frame=None) -> list:
         """
         Detect zombie positions using YOLO with improved hitbox detection
+        If frame is provided it is used instead of a fresh screenshot
+        Returns [(col, row, zombie_type)]
+        """
+        return self.points_to_cells(
+            (x, y, zombie_type) for x, y, _, zombie_type in self.detect_zombie_points(yolo_model, frame))
+    
+    def detect_zombie_points(self, yolo_model, frame=None, imgsz=None, conf=YOLO_CONFIDENCE, classifier=None) -> list:
+        """
+        Zombie foot points in pixels: [(x, y, confidence, zombie_type)]
+        imgsz: detector input size (None = model default)
+        Boxes labeled with a ZOMBIE_TYPES name keep that type; generic "zombie"
+        boxes are typed by classifier (one batched call) or get ZOMBIE_DEFAULT_TYPE
         """
         try:
-            screenshot = pyautogui.screenshot()
-            frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+            if frame is None:
+                frame = self.capture_frame()
             
-            results = yolo_model.predict(source=frame, conf=YOLO_CONFIDENCE, verbose=False)[0]
+            options = {"imgsz": imgsz} if imgsz else {}
+            results = yolo_model.predict(source=frame, conf=conf, verbose=False, **options)[0]
             
-            zombies = []
+            points = []
+            generic = []  # Indices of points from generic "zombie" boxes
+            generic_boxes = []
             for box in results.boxes:
                 label = yolo_model.names[int(box.cls[0])]
                 
-                if label == "zombie":
+                if label == "zombie" or label in ZOMBIE_TYPES:
                     x, y, w, h = box.xywh[0].cpu().numpy()
                     
                     # Применяем смещение для более точного определения ряда
                     # Используем нижнюю часть хитбокса зомби
                     adjusted_y = y + (h / 2) + ZOMBIE_ROW_OFFSET
-                    
-                    col, row = self._pixel_to_grid(x, adjusted_y)
-                    
-                    if 0 <= col < GRID_COLS and 0 <= row < GRID_ROWS:
-                        zombies.append((col, row))
+                    zombie_type = label if label in ZOMBIE_TYPES else ZOMBIE_DEFAULT_TYPE
+                    if label == "zombie" and classifier is not None:
+                        generic.append(len(points))
+                        generic_boxes.append((x - w / 2, y - h / 2, x + w / 2, y + h / 2))
+                    points.append((float(x), float(adjusted_y), float(box.conf[0]), zombie_type))
+            
+            for index, zombie_type in zip(generic, classifier.classify(frame, generic_boxes) if generic else ()):
+                x, y, confidence, _ = points[index]
+                points[index] = (x, y, confidence, zombie_type)
             
-            return zombies
+            return points
         
         except Exception as e:
-            print(f"⚠️ Ошибка детекции зомби: {e}")
+            log.warning("⚠️ Ошибка детекции зомби: %s", e, extra={"key": "detect_error"})
             return []
     
+    def points_to_cells(self, points) -> list:
+        """Convert pixel foot points (x, y, zombie_type) to (col, row, zombie_type) grid cells"""
+        zombies = []
+        for x, y, zombie_type in points:
+            col, row = self._pixel_to_grid(x, y)
+            
+            if 0 <= col < GRID_COLS and 0 <= row < GRID_ROWS:
+                zombies.append((col, row, zombie_type))
+        return zombies
+    
     def _pixel_to_grid(self, x: float, y: float) -> tuple:
         """
         Convert pixel coordinates to grid cell
@@ -0,0 +1,65 @@
+"""
+Hot Reload - New strategy code and config values without a restart
+config.py and the strategy modules are re-imported in place. The live
+state moves to a new PlantingStrategy through snapshot()/restore(); the
+detector, frame buffers and input backend are never touched. Every file is
+compiled before anything is reloaded, so a syntax error leaves the
+running code as it was
+"""
+
+import importlib
+import sys
+import config
+from profile_loader import apply_settings
+
+# Reloaded in this order: strategy imports formations
+STRATEGY_MODULES = ("formations", "strategy")
+
+
+def config_values() -> dict:
+    """Current UPPER_CASE settings of the config module"""
+    return {name: value for name, value in vars(config).items() if name.isupper()}
+
+
+def check_syntax():
+    """Compile config and the strategy modules; raises SyntaxError"""
+    for module in [config] + [sys.modules[name] for name in STRATEGY_MODULES]:
+        with open(module.__file__, "r", encoding="utf-8") as f:
+            compile(f.read(), module.__file__, "exec")
+
+
+def reload_config(keep=()):
+    """
+    Re-read config.py and push every value into the project modules
+    keep: names whose current runtime value stays (e.g. calibrated geometry)
+    """
+    kept = {name: getattr(config, name) for name in keep if hasattr(config, name)}
+    importlib.reload(config)
+    values = config_values()
+    values.update(kept)
+    apply_settings(values)
+
+
+def reload_strategy(old):
+    """Re-import the strategy code; returns a new PlantingStrategy with old's state"""
+    for name in STRATEGY_MODULES:
+        importlib.reload(sys.modules[name])
+    strategy = sys.modules["strategy"].PlantingStrategy(old.plant_manager, old.forecaster)
+    strategy.restore(old.snapshot())
+    # Per-tick history the snapshot leaves out
+    strategy.zombie_counts = old.zombie_counts
+    if len(old.row_threat) == len(strategy.row_threat):
+        strategy.row_threat[:] = old.row_threat
+    return strategy
+
+
+def changed_settings(before: dict, after: dict) -> list:
+    """Names whose value differs between two config_values() results"""
+    changed = []
+    for name in sorted(set(before) | set(after)):
+        try:
+            if before.get(name) != after.get(name):
+                changed.append(name)
+        except ValueError:  # Array-like values without a single truth value
+            changed.append(name)
+    return changed
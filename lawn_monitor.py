@@ -0,0 +1,190 @@
+"""
+Lawn Monitor - Per-cell plant presence and damage detection
+A sparse pixel sample per cell detects which cells changed since the last
+frame; only those cells get an HSV histogram that is compared against the
+cell's empty-lawn and freshly-planted references
+"""
+
+import cv2
+import numpy as np
+from config import *
+
+
+class LawnUpdate:
+    """Result of one LawnMonitor.update call"""
+
+    def __init__(self):
+        self.eaten = []  # [(col, row)] planted cells that look like empty lawn again
+        self.damaged = []  # [(col, row)] wall-nuts that no longer look like new ones
+        self.changed_cells = 0  # Cells examined this frame
+
+
+class LawnMonitor:
+    """Следит за клетками газона: съеденные и повреждённые растения"""
+
+    def __init__(self):
+        self.empty_hist = {}  # {(col, row): histogram of the cell without a plant}
+        self.plant_hist = {}  # {(col, row): histogram right after planting}
+        self.pending = {}  # {(col, row): consecutive frames the cell looked empty}
+        self.damaged = set()  # Wall-nuts already reported as damaged
+
+        self._samples = None  # Previous sparse samples, (cells, K, 3)
+        self._geometry = None
+        self._sample_ys = None
+        self._sample_xs = None
+        self._rects = []
+        self.frames = 0
+        self.cells_examined = 0
+
+    def reset(self):
+        """Forget plant references (new level); empty-lawn references stay valid"""
+        self.plant_hist.clear()
+        self.pending.clear()
+        self.damaged.clear()
+        self._samples = None
+
+    def _ensure_geometry(self, frame):
+        """(Re)build cell rectangles and sample grids when geometry changes"""
+        geometry = (id(GRID), CELL_WIDTH, CELL_HEIGHT, frame.shape[:2])
+        if geometry == self._geometry:
+            return
+        self._geometry = geometry
+        self.empty_hist.clear()
+        self.plant_hist.clear()
+        self._samples = None
+
+        # Inner part of each cell: neighbours' leaves and zombie overlap stay out
+        w = int(CELL_WIDTH * LAWN_CELL_INSET)
+        h = int(CELL_HEIGHT * LAWN_CELL_INSET)
+        n = LAWN_SAMPLE_GRID
+        offsets_x = np.linspace(-w // 2, w // 2, n).astype(np.intp)
+        offsets_y = np.linspace(-h // 2, h // 2, n).astype(np.intp)
+        oy, ox = np.meshgrid(offsets_y, offsets_x, indexing="ij")
+
+        height, width = frame.shape[:2]
+        self._rects = []
+        ys, xs = [], []
+        for row in range(GRID_ROWS):
+            for col in range(GRID_COLS):
+                cx, cy = GRID[row][col]
+                x0 = min(max(0, cx - w // 2), width - w)
+                y0 = min(max(0, cy - h // 2), height - h)
+                self._rects.append((x0, y0, w, h))
+                ys.append(np.clip(cy + oy.ravel(), 0, height - 1))
+                xs.append(np.clip(cx + ox.ravel(), 0, width - 1))
+        self._sample_ys = np.stack(ys)
+        self._sample_xs = np.stack(xs)
+
+    def _histogram(self, frame, index):
+        x, y, w, h = self._rects[index]
+        hsv = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 4], [0, 180, 0, 256])
+        cv2.normalize(hist, hist, 1.0, 0.0, cv2.NORM_L1)
+        return hist
+
+    def snapshot(self) -> dict:
+        """Cell references as arrays for a checkpoint"""
+        cells = GRID_ROWS * GRID_COLS
+        state = {"damaged": [list(cell) for cell in self.damaged]}
+        for name, hists in (("empty", self.empty_hist), ("plant", self.plant_hist)):
+            stack = np.zeros((cells, 16, 4), dtype=np.float32)
+            mask = np.zeros(cells, dtype=bool)
+            for (col, row), hist in hists.items():
+                stack[row * GRID_COLS + col] = hist
+                mask[row * GRID_COLS + col] = True
+            state[f"{name}_hist"] = stack
+            state[f"{name}_mask"] = mask
+        return state
+
+    def restore(self, state: dict, frame):
+        """Inverse of snapshot(); frame sets the geometry the references belong to"""
+        self._ensure_geometry(frame)
+        for name, hists in (("empty", self.empty_hist), ("plant", self.plant_hist)):
+            hists.clear()
+            stack = state[f"{name}_hist"]
+            for index in np.flatnonzero(state[f"{name}_mask"]):
+                row, col = divmod(int(index), GRID_COLS)
+                hists[(col, row)] = np.ascontiguousarray(stack[index])
+        self.damaged = {tuple(cell) for cell in state["damaged"]}
+        self.pending.clear()
+        self._samples = None
+
+    def looks_empty(self, frame, cells) -> list:
+        """Cells among cells that match their empty-lawn reference in this frame"""
+        self._ensure_geometry(frame)
+        empty_cells = []
+        for col, row in cells:
+            empty = self.empty_hist.get((col, row))
+            if empty is None or not (0 <= row < GRID_ROWS and 0 <= col < GRID_COLS):
+                continue
+            hist = self._histogram(frame, row * GRID_COLS + col)
+            if cv2.compareHist(hist, empty, cv2.HISTCMP_BHATTACHARYYA) < LAWN_EMPTY_DISTANCE:
+                empty_cells.append((col, row))
+        return empty_cells
+
+    def update(self, frame, plant_types: dict) -> LawnUpdate:
+        """
+        Examine the cells that changed since the previous frame
+        plant_types: {(col, row): plant_name} the strategy believes is planted
+        """
+        result = LawnUpdate()
+        self._ensure_geometry(frame)
+        self.frames += 1
+
+        # Sparse sample of every cell in one fancy-indexing gather
+        samples = frame[self._sample_ys, self._sample_xs].astype(np.int16)
+        if self._samples is None:
+            changed = np.ones(len(self._rects), dtype=bool)
+        else:
+            diff = np.abs(samples - self._samples).mean(axis=(1, 2))
+            changed = diff > LAWN_CHANGE_THRESHOLD
+        self._samples = samples
+
+        # Cells awaiting confirmation, and planted cells without a reference yet
+        for col, row in list(self.pending) + [c for c in plant_types if c not in self.plant_hist]:
+            if 0 <= row < GRID_ROWS and 0 <= col < GRID_COLS:
+                changed[row * GRID_COLS + col] = True
+
+        for index in np.flatnonzero(changed):
+            row, col = divmod(int(index), GRID_COLS)
+            self._examine(frame, index, (col, row), plant_types.get((col, row)), result)
+        result.changed_cells = int(changed.sum())
+        self.cells_examined += result.changed_cells
+
+        # Drop state for cells the strategy no longer considers planted
+        for cell in [c for c in self.plant_hist if c not in plant_types]:
+            del self.plant_hist[cell]
+            self.pending.pop(cell, None)
+            self.damaged.discard(cell)
+        return result
+
+    def _examine(self, frame, index, cell, plant_name, result: LawnUpdate):
+        hist = self._histogram(frame, index)
+        empty = self.empty_hist.get(cell)
+
+        if plant_name is None:
+            # Learn what this cell looks like without a plant
+            self.empty_hist[cell] = hist
+            self.pending.pop(cell, None)
+            return
+
+        if cell not in self.plant_hist:
+            # First look after planting; skip until it differs from bare lawn
+            if empty is None or cv2.compareHist(hist, empty, cv2.HISTCMP_BHATTACHARYYA) > LAWN_EMPTY_DISTANCE:
+                self.plant_hist[cell] = hist
+            return
+
+        if empty is not None and cv2.compareHist(hist, empty, cv2.HISTCMP_BHATTACHARYYA) < LAWN_EMPTY_DISTANCE:
+            # Reported every frame until the strategy drops the plant (it may
+            # wait for zombies in the row); update() then forgets the cell
+            self.pending[cell] = self.pending.get(cell, 0) + 1
+            if self.pending[cell] >= LAWN_CONFIRM_FRAMES:
+                result.eaten.append(cell)
+            return
+        self.pending.pop(cell, None)
+
+        if plant_name in ("wall-nut", "tall-nut") and cell not in self.damaged:
+            distance = cv2.compareHist(hist, self.plant_hist[cell], cv2.HISTCMP_BHATTACHARYYA)
+            if distance > WALLNUT_DAMAGE_DISTANCE:
+                self.damaged.add(cell)
+                result.damaged.append(cell)
@@ -0,0 +1,119 @@
+"""
+Level Monitor - Detects seed selection, play and level end from the frame
+Each frame is reduced to a tiny normalized thumbnail and compared against
+reference screenshots saved for each state. Without a level end reference
+the lawn's green share decides: a green lawn is "playing", and a lawn that
+stops being green during play is only "paused" (pause menu, end screen) -
+the caller decides from the seed bar whether play resumed or a new level began
+"""
+
+import os
+import cv2
+import numpy as np
+from config import *
+
+SEED_SELECT = "seed_select"
+PLAYING = "playing"
+LEVEL_END = "level_end"
+PAUSED = "paused"
+UNKNOWN = "unknown"
+STATES = (SEED_SELECT, PLAYING, LEVEL_END)
+
+
+def _thumbnail(frame) -> np.ndarray:
+    """Zero-mean, unit-norm grayscale thumbnail of a strided view of the frame"""
+    step = LEVEL_FRAME_STRIDE
+    small = cv2.resize(frame[::step, ::step], LEVEL_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32).ravel()
+    thumb -= thumb.mean()
+    return thumb / max(float(np.linalg.norm(thumb)), 1e-6)
+
+
+class LevelMonitor:
+    """Определяет состояние уровня: выбор семян, игра, конец уровня"""
+
+    def __init__(self, directory=LEVEL_STATE_DIR):
+        self.directory = directory
+        self.names = []  # Reference state per row of self.references
+        self.references = None  # (N, D) normalized thumbnails
+
+        self.state = UNKNOWN  # Confirmed state
+        self._candidate = UNKNOWN
+        self._candidate_frames = 0
+
+        self.load_references()
+
+    def load_references(self):
+        """Load <state>.png / <state>_<n>.png reference screenshots"""
+        self.names = []
+        thumbs = []
+        if os.path.isdir(self.directory):
+            for filename in sorted(os.listdir(self.directory)):
+                stem, ext = os.path.splitext(filename)
+                state = stem.rsplit("_", 1)[0] if stem not in STATES else stem
+                if ext.lower() != ".png" or state not in STATES:
+                    continue
+                image = cv2.imread(os.path.join(self.directory, filename), cv2.IMREAD_COLOR)
+                if image is not None:
+                    self.names.append(state)
+                    thumbs.append(_thumbnail(image))
+        self.references = np.stack(thumbs) if thumbs else None
+
+    def save_reference(self, frame, state) -> str:
+        """Save the frame as another reference for a state"""
+        os.makedirs(self.directory, exist_ok=True)
+        count = self.names.count(state)
+        path = os.path.join(self.directory, f"{state}_{count + 1}.png")
+        cv2.imwrite(path, frame)
+        self.load_references()
+        print(f"💾 Эталон состояния '{state}' сохранён: {path}")
+        return path
+
+    def reset(self):
+        self.state = UNKNOWN
+        self._candidate = UNKNOWN
+        self._candidate_frames = 0
+
+    def classify(self, frame) -> str:
+        """State of a single frame (no hysteresis)"""
+        if self.references is not None:
+            scores = self.references @ _thumbnail(frame)
+            best = int(scores.argmax())
+            if scores[best] >= LEVEL_STATE_MIN_SCORE:
+                return self.names[best]
+        return PLAYING if self._lawn_green_share(frame) >= LEVEL_LAWN_GREEN_MIN else UNKNOWN
+
+    def _lawn_green_share(self, frame) -> float:
+        step = LEVEL_FRAME_STRIDE
+        y0 = max(0, GRID_START_Y)
+        x0 = max(0, GRID_START_X)
+        lawn = frame[y0:y0 + GRID_ROWS * CELL_HEIGHT:step, x0:x0 + GRID_COLS * CELL_WIDTH:step]
+        if lawn.size == 0:
+            return 0.0
+        hsv = cv2.cvtColor(lawn, cv2.COLOR_BGR2HSV)
+        green = cv2.inRange(hsv, (35, 80, 60), (85, 255, 255))
+        return cv2.countNonZero(green) / green.size
+
+    @property
+    def lawn_fallback(self) -> bool:
+        """No level end reference: a lawn that stops being green is a pause, not an end"""
+        return LEVEL_END not in self.names
+
+    def update(self, frame):
+        """
+        Feed one frame; returns (previous, new) when the confirmed state
+        changes after LEVEL_CONFIRM_FRAMES agreeing frames, None otherwise
+        """
+        observed = self.classify(frame)
+        if observed == UNKNOWN and self.lawn_fallback and self.state in (PLAYING, PAUSED):
+            observed = PAUSED
+        if observed == self._candidate:
+            self._candidate_frames += 1
+        else:
+            self._candidate = observed
+            self._candidate_frames = 1
+
+        if self._candidate != self.state and self._candidate_frames >= LEVEL_CONFIRM_FRAMES:
+            previous, self.state = self.state, self._candidate
+            return previous, self.state
+        return None
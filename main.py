@@ -4,28 +4,40 @@ With sun tracking system
 """
 
 import time
+
+# Measured before the heavier imports so startup time includes them
+PROCESS_START = time.perf_counter()
+
+import argparse
 import keyboard
 import os
 import sys
 from plant_manager import PlantManager
 from strategy import PlantingStrategy
 from game_controller import GameController
+from model_loader import ModelLoader
+from calibration import Calibrator
+from lawn_monitor import LawnMonitor
+from level_monitor import LevelMonitor, LEVEL_END, PAUSED, PLAYING, SEED_SELECT
+from tracker import DetectionFuser
+from blob_detector import BlobDetector
+from zombie_classifier import ZombieClassifier
+from cell_classifier import CellClassifier
+from sun_forecast import SunForecaster
+from ring_buffer import RingBuffer
+from action_verifier import ActionVerifier
+from profiler import AllocationTracker, SamplingProfiler
+from event_log import dropped_records, flush_logging, get_logger, setup_logging
+from tick_watchdog import TickWatchdog
+import checkpoint
+import hot_reload
+from checkpoint import CheckpointWriter
+from calibration import GEOMETRY_NAMES
+from profile_loader import (ProfileError, find_profile_for_plants, load_profile,
+                            selected_profile, headless_requested)
 from config import *
 
-# Optional: YOLO model
-try:
-    from ultralytics import YOLO
-    yolo_available = os.path.exists(YOLO_MODEL_PATH)
-    if yolo_available:
-        yolo_model = YOLO(YOLO_MODEL_PATH)
-        print("✅ YOLO модель загружена")
-    else:
-        yolo_model = None
-        print("⚠️ YOLO модель не найдена, работа без детекции зомби")
-except ImportError:
-    yolo_model = None
-    yolo_available = False
-    print("⚠️ Ultralytics не установлен, работа без детекции зомби")
+log = get_logger("main")
 
 
 class SunTracker:
@@ -34,11 +46,31 @@ class SunTracker:
         self.sun_count = initial_sun
         self.total_collected = 0
         self.total_spent = 0
+        self.started_at = time.time()
+        
+        # Time series for rolling stats and metrics export
+        self.sun_history = RingBuffer(HISTORY_CAPACITY)  # Sun level per tick
+        self.income_history = RingBuffer(HISTORY_CAPACITY)  # Sun per collection
     
     def add_sun(self, amount=25):
         """Добавить солнца (при сборе)"""
         self.sun_count += amount
         self.total_collected += amount
+        now = time.time()
+        self.income_history.append(now, amount)
+        self.income_history.expire(now - HISTORY_WINDOW)
+    
+    def record(self, now=None):
+        """Записать текущий уровень солнца (раз за тик)"""
+        now = time.time() if now is None else now
+        self.sun_history.append(now, self.sun_count)
+        self.sun_history.expire(now - HISTORY_WINDOW)
+    
+    def income_rate(self, window=FORECAST_RATE_WINDOW, now=None):
+        """Собрано солнца в секунду за последние window секунд"""
+        now = time.time() if now is None else now
+        span = min(window, now - self.started_at)
+        return float(self.income_history.window_sum(now, window)[0]) / span if span > 0 else 0.0
     
     def spend_sun(self, amount):
         """Потратить солнца (при посадке)"""
@@ -48,6 +80,11 @@ class SunTracker:
             return True
         return False
     
+    def refund(self, amount):
+        """Вернуть солнца (посадка не подтвердилась)"""
+        self.sun_count += amount
+        self.total_spent -= amount
+    
     def can_afford(self, cost):
         """Проверить, хватает ли солнц"""
         return self.sun_count >= cost
@@ -57,28 +94,84 @@ class SunTracker:
         self.sun_count = initial_sun
         self.total_collected = 0
         self.total_spent = 0
+        self.started_at = time.time()
+        self.sun_history.clear()
+        self.income_history.clear()
+    
+    def snapshot(self) -> dict:
+        return {"sun_count": self.sun_count, "total_collected": self.total_collected,
+                "total_spent": self.total_spent, "started_at": self.started_at}
+    
+    def restore(self, state):
+        """Восстановить счётчик из контрольной точки"""
+        self.sun_count = state["sun_count"]
+        self.total_collected = state["total_collected"]
+        self.total_spent = state["total_spent"]
+        self.started_at = state["started_at"]
     
     def get_stats(self):
         """Получить статистику"""
         return {
             "current": self.sun_count,
             "collected": self.total_collected,
-            "spent": self.total_spent
+            "spent": self.total_spent,
+            "income_per_min": self.income_rate() * 60,
+            "average": float(self.sun_history.mean()[0]),
         }
 
 
 class PvZAI:
-    def __init__(self):
+    def __init__(self, profile=None, headless=False, resume=False):
+        self.profile = profile  # Validated Profile or None
+        self.headless = headless  # No prompts, start immediately
+        self.resume_requested = resume  # Continue from the last checkpoint
         self.plant_manager = PlantManager()
         self.sun_tracker = SunTracker(initial_sun=50)
-        self.strategy = PlantingStrategy(self.plant_manager)
+        self.forecaster = SunForecaster()
+        self.strategy = PlantingStrategy(self.plant_manager, self.forecaster)
         self.controller = GameController()
+        self.model_loader = ModelLoader(YOLO_MODEL_PATH)
+        self.calibrator = Calibrator()
+        self.lawn_monitor = LawnMonitor()
+        self.level_monitor = LevelMonitor()
+        self.pending_reference = None  # (frame, deadline) after [L], until 1/2/3 is pressed
+        self.fuser = DetectionFuser()
+        self.zombie_classifier = ZombieClassifier()
+        self.cell_classifier = CellClassifier()
+        self.blob_detector = BlobDetector()
+        self.verifier = ActionVerifier()
+        self.profiler = SamplingProfiler()
+        self.alloc_tracker = AllocationTracker()
+        self.watchdog = TickWatchdog()
+        self.checkpoints = CheckpointWriter()
+        self.last_checkpoint = 0.0
         
         self.running = False
         self.setup_complete = False
         self.loop_count = 0
         self.plants_placed = 0
         self.last_sun_check = 0
+        self.action_history = RingBuffer(HISTORY_CAPACITY)  # 1 per executed action
+        self.scheduled_removals = []  # [(time, col, row)] instant plants to clear
+        
+        # Planting throughput while sun is plentiful
+        self.surplus_time = 0.0  # Seconds spent in surplus ticks
+        self.surplus_plants = 0  # Plants placed during surplus ticks
+        self.last_tick_at = None
+        
+        # Multi-level session
+        self.session_started = None  # time.time() of the first tick
+        self.level_started_at = None
+        self.levels_started = 0
+        self.levels_completed = 0
+        self.level_durations = []  # Seconds per completed level
+        self.ready_time = None  # Seconds from process start to end of setup
+        self.first_tick_time = None  # Seconds from process start to first AI tick
+    
+    @property
+    def yolo_model(self):
+        """YOLO model once loaded and warmed up, None until then"""
+        return self.model_loader.get()
         
     def setup(self):
         """Initial setup"""
@@ -86,8 +179,27 @@ class PvZAI:
         print("🌻 PvZ AI - Профессиональная версия")
         print("="*60)
         
+        # Load the model in the background while we ask for the configuration
+        self.model_loader.start(imgsz=self.fuser.imgsz)  # Warm up at the size ticks run at
+        self.zombie_classifier.start()
+        
+        # Calibrate geometry first so seed slots are read at the right place
+        if CALIBRATION_ENABLED:
+            if self.calibrator.has_reference:
+                self.calibrator.calibrate(self.controller.capture_frame())
+            else:
+                print("\n📐 Эталон калибровки не найден: открой уровень и нажми [K]")
+        
         # Load or create plant configuration
-        if self.plant_manager.load_config():
+        if self.profile and self.profile.plants:
+            self.plant_manager.load_profile(self.profile)
+        elif self._recognize_seed_bar():
+            pass
+        elif self.headless:
+            if not self.plant_manager.load_config():
+                print("❌ Headless режим: нет растений ни в профиле, ни в конфигурации")
+                return False
+        elif self.plant_manager.load_config():
             response = input("\nИспользовать эту конфигурацию? (y/n): ").strip().lower()
             if response != 'y':
                 self.plant_manager.setup_interactive()
@@ -99,15 +211,32 @@ class PvZAI:
             print("❌ Нет растений для работы!")
             return False
         
+        self.strategy.start_seed_cooldowns()  # The plants are known only now
         self.setup_complete = True
         return True
     
+    def _recognize_seed_bar(self, frame=None, keep_unmatched=False) -> bool:
+        """Try to read the plant configuration from the seed bar"""
+        if not SEED_RECOGNITION_ENABLED or not self.plant_manager.recognizer.available:
+            return False
+        if frame is None:
+            frame = self.controller.capture_frame()
+        return self.plant_manager.recognize_seed_bar(frame, keep_unmatched)
+    
     def run(self):
         """Main game loop"""
         if not self.setup_complete:
             if not self.setup():
                 return
         
+        if self.resume_requested:
+            self.resume()
+        
+        self.ready_time = time.perf_counter() - PROCESS_START
+        flush_logging()  # Setup messages before the controls banner
+        if not self.model_loader.ready:
+            print("\n⏳ YOLO модель ещё загружается в фоне...")
+        
         print("\n" + "="*60)
         print("🎮 УПРАВЛЕНИЕ")
         print("="*60)
@@ -116,10 +245,20 @@ class PvZAI:
         print("  [P] - Показать карту растений")
         print("  [S] - Показать статистику")
         print("  [C] - Собрать солнца вручную")
+        print("  [F] - Старт/Стоп профайлера")
+        print("  [A] - Старт/Стоп учёта памяти за тик")
+        print("  [K] - Сохранить эталон калибровки (при верных координатах)")
+        print("  [T] - Сохранить шаблоны семян из текущей конфигурации")
+        print("  [L] - Сохранить эталон состояния уровня (выбор семян/игра/конец)")
+        print("  [U] - Перезагрузить стратегию и конфигурацию (без перезапуска)")
         print("  [X] - Выход")
         print("="*60)
         print(f"\n☀️ Начальное солнце: {self.sun_tracker.sun_count}")
-        print("\n⏸️  Нажми [Z] для старта...")
+        if self.headless:
+            self.running = True
+            print("\n🟢 Headless режим: AI запущен")
+        else:
+            print("\n⏸️  Нажми [Z] для старта...")
         
         try:
             while True:
@@ -131,10 +270,7 @@ class PvZAI:
                     time.sleep(0.5)
                 
                 if keyboard.is_pressed("r"):
-                    self.strategy.reset()
-                    self.sun_tracker.reset()
-                    self.loop_count = 0
-                    self.plants_placed = 0
+                    self._reset_level()
                     print(f"🔄 Сброшено | ☀️ Солнце: {self.sun_tracker.sun_count}")
                     time.sleep(0.5)
                 
@@ -147,12 +283,39 @@ class PvZAI:
                     time.sleep(0.5)
                 
                 if keyboard.is_pressed("c"):
-                    if yolo_model:
-                        collected = self.controller.collect_collectibles(yolo_model, self.sun_tracker)
-                        if collected > 0:
-                            print(f"☀️ Собрано вручную: {collected} | Всего: {self.sun_tracker.sun_count}")
-                    else:
-                        print("⚠️ YOLO модель недоступна")
+                    collected = self._collect()
+                    if collected > 0:
+                        print(f"☀️ Собрано вручную: {collected} | Всего: {self.sun_tracker.sun_count}")
+                    elif not self.yolo_model and "blob" not in COLLECTIBLE_DETECTORS.values():
+                        print("⚠️ YOLO модель недоступна" if self.model_loader.ready else "⏳ YOLO модель ещё загружается")
+                    time.sleep(0.5)
+                
+                if keyboard.is_pressed("f"):
+                    self.profiler.toggle()
+                    time.sleep(0.5)
+                
+                if keyboard.is_pressed("a"):
+                    self.alloc_tracker.toggle()
+                    time.sleep(0.5)
+                
+                if keyboard.is_pressed("l"):
+                    self._begin_level_reference()
+                    time.sleep(0.5)
+                
+                if self.pending_reference is not None:
+                    self._poll_level_reference()
+                
+                if keyboard.is_pressed("k"):
+                    self.calibrator.capture_reference(self.controller.capture_frame())
+                    time.sleep(0.5)
+                
+                if keyboard.is_pressed("t"):
+                    self.plant_manager.recognizer.save_templates(
+                        self.controller.capture_frame(), self.plant_manager.plants)
+                    time.sleep(0.5)
+                
+                if keyboard.is_pressed("u"):
+                    self.hot_reload()
                     time.sleep(0.5)
                 
                 if keyboard.is_pressed("x"):
@@ -172,42 +335,369 @@ class PvZAI:
             import traceback
             traceback.print_exc()
         finally:
+            self.profiler.stop()
+            self.alloc_tracker.stop()
+            self.checkpoints.stop()
             self.controller.emergency_stop()
     
     def ai_loop(self):
         """Single iteration of AI logic"""
         try:
+            self.alloc_tracker.begin_tick()
+            tick_started = time.perf_counter()
             self.loop_count += 1
+            if self.first_tick_time is None:
+                self._report_startup()
+            
+            yolo_model = self.yolo_model
+            
+            # One shared frame per tick for calibration, lawn and detection
+            frame = self.controller.capture_frame()
+            
+            # Cheap calibration drift check
+            if frame is not None and CALIBRATION_ENABLED:
+                self.calibrator.recheck(frame)
             
-            # Collect suns and coins
-            if yolo_model and time.time() - self.last_sun_check > 2.0:
-                self.controller.collect_collectibles(yolo_model, self.sun_tracker)
+            # Seed selection / level end: reset on level start, don't play meanwhile
+            if frame is not None and LEVEL_MONITOR_ENABLED and not self._track_level(frame):
+                self.alloc_tracker.end_tick()
+                time.sleep(LOOP_DELAY)
+                return
+            
+            # Confirm or roll back last ticks' plantings
+            self._verify_actions(frame)
+            self._process_removals()
+            
+            # Seed bar recognition (cached until the seed bar changes)
+            if frame is not None:
+                self._recognize_seed_bar(frame, keep_unmatched=True)
+            
+            # Collect suns and coins (blob classes work before the model is ready)
+            # Detection counts toward the tick; the clicks are paced by sleeps and do not
+            sweep_time = 0.0
+            if self.watchdog.sun_sweep_due(self.last_sun_check, time.time()):
+                self._collect(frame)
                 self.last_sun_check = time.time()
+                sweep_time = self.controller.sweep_click_time
             
-            # Detect zombies
+            # Detect zombies, fused over the last frames into stable tracks
             zombies = []
-            if yolo_model:
-                zombies = self.controller.detect_zombies(yolo_model)
+            use_cells = ZOMBIE_DETECTOR == "cells" and self.cell_classifier.available and frame is not None
+            if use_cells or yolo_model:
+                now = time.time()
+                if self.fuser.detection_due(now, self.watchdog.detect_interval(self.fuser.detect_interval)):
+                    if use_cells:
+                        points = self.cell_classifier.detect_points(frame)
+                    else:
+                        points = self.controller.detect_zombie_points(
+                            yolo_model, frame, self.watchdog.detector_imgsz(self.fuser.imgsz),
+                            self.fuser.detector_confidence, self.zombie_classifier)
+                    self.fuser.update(points, now)
+                else:
+                    self.fuser.advance(now)
+                zombies = self.controller.points_to_cells(self.fuser.positions())
             
-            # Get next action from strategy
-            action = self.strategy.get_next_action(zombies, self.sun_tracker.sun_count)
+            # Reconcile believed plants with what is actually on the lawn
+            if frame is not None and LAWN_MONITOR_ENABLED:
+                lawn = self.lawn_monitor.update(frame, self.strategy.plant_types)
+                self.strategy.reconcile_lawn(lawn)
             
-            if action:
-                self.execute_action(action)
+            # Income forecast for spend/save decisions
+            self.sun_tracker.record()
+            self.forecaster.update(
+                self.sun_tracker.sun_count,
+                self.sun_tracker.income_rate(),
+                self.strategy.count_plants("sunflower")
+            )
+            
+            # Ranked batch of actions, executed back-to-back
+            sun_count = self.sun_tracker.sun_count
+            actions = self.strategy.get_next_actions(zombies, sun_count)
+            # Seed screenshots count toward the budget; planting clicks are paced by sleeps and do not
+            self.controller.plant_click_time = 0.0
+            placed = sum(1 for action in actions if self.execute_action(action, frame))
+            self.watchdog.end_tick(time.perf_counter() - tick_started - sweep_time - self.controller.plant_click_time)
+            self._record_throughput(sun_count, placed)
+            
+            # Crash-safe snapshot; encoding and the file write happen off-thread
+            if CHECKPOINT_ENABLED and time.time() - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+                self.checkpoints.submit(self._checkpoint_snapshot())
+                self.last_checkpoint = time.time()
             
             # Status update every 10 loops
             if self.loop_count % 10 == 0:
-                zombie_rows = sorted(set(r for c, r in zombies))
+                zombie_rows = sorted(set(r for c, r, _ in zombies))
                 zombie_info = f"Ряды: {zombie_rows}" if zombie_rows else "Нет"
-                print(f"🔄 Loop {self.loop_count} | ☀️ {self.sun_tracker.sun_count} | 🧟 {len(zombies)} ({zombie_info}) | 🌱 {self.plants_placed}")
+                log.info("🔄 Loop %d | ☀️ %d | 🧟 %d (%s) | 🌱 %d", self.loop_count, self.sun_tracker.sun_count,
+                         len(zombies), zombie_info, self.plants_placed,
+                         extra={"event": "status", "fields": {"loop": self.loop_count, "sun": self.sun_tracker.sun_count,
+                                                              "zombies": len(zombies), "zombie_rows": zombie_rows,
+                                                              "plants": self.plants_placed}})
             
+            self.alloc_tracker.end_tick()
             time.sleep(LOOP_DELAY)
         
         except Exception as e:
-            print(f"⚠️ Ошибка в цикле: {e}")
+            log.warning("⚠️ Ошибка в цикле: %s", e, extra={"event": "error", "key": "loop_error"})
+    
+    def _report_startup(self):
+        """Report startup-to-first-tick timing"""
+        self.first_tick_time = time.perf_counter() - PROCESS_START
+        if self.session_started is None:  # A resumed session keeps its start times
+            self.session_started = self.level_started_at = time.time()
+        model_info = (f"{self.model_loader.load_time:.1f} с" if self.model_loader.ready
+                      else "ещё загружается")
+        log.info("⏱️ Запуск → готовность: %.1f с | запуск → первый тик: %.1f с | модель: %s",
+                 self.ready_time, self.first_tick_time, model_info,
+                 extra={"event": "startup", "fields": {"ready": self.ready_time, "first_tick": self.first_tick_time}})
+    
+    def hot_reload(self) -> bool:
+        """
+        Re-read config.py, the profile and the strategy code in place
+        Plants, sun, zombie tracks, the detector and frame buffers carry over
+        """
+        started = time.perf_counter()
+        before = hot_reload.config_values()
+        try:
+            hot_reload.check_syntax()
+            profile = load_profile(self.profile.path) if self.profile is not None else None
+            # Calibrated geometry is runtime state, not a setting from the file
+            hot_reload.reload_config(GEOMETRY_NAMES if self.calibrator.calibrated else ())
+            if profile is not None:
+                profile.apply()
+                self.profile = profile
+            self.strategy = hot_reload.reload_strategy(self.strategy)
+            self.fuser.set_profile(FUSION_PROFILE)
+        except (SyntaxError, ProfileError) as e:
+            log.error("❌ Перезагрузка отменена, работает прежний код: %s", e, extra={"event": "reload_failed"})
+            return False
+        except Exception as e:
+            log.error("❌ Ошибка перезагрузки: %s", e, exc_info=True, extra={"event": "reload_failed"})
+            return False
+        
+        changed = hot_reload.changed_settings(before, hot_reload.config_values())
+        elapsed = (time.perf_counter() - started) * 1000
+        details = f": {', '.join(changed[:8])}{' ...' if len(changed) > 8 else ''}" if changed else ""
+        log.info("♻️ Стратегия и конфигурация перезагружены за %.0f мс | изменено параметров: %d%s",
+                 elapsed, len(changed), details, extra={"event": "reload", "fields": {"changed": changed}})
+        return True
+    
+    def _checkpoint_snapshot(self) -> dict:
+        """Everything a restarted process needs to continue the level"""
+        return {
+            "session": {
+                "time": time.time(),
+                "seeds": sorted(self.plant_manager.plants),
+                "loop_count": self.loop_count,
+                "plants_placed": self.plants_placed,
+                "levels_started": self.levels_started,
+                "levels_completed": self.levels_completed,
+                "level_durations": list(self.level_durations),
+                "level_started_at": self.level_started_at,
+                "session_started": self.session_started,
+                "scheduled_removals": [list(removal) for removal in self.scheduled_removals],
+            },
+            "strategy": self.strategy.snapshot(),
+            "sun": self.sun_tracker.snapshot(),
+            "tracks": self.fuser.snapshot(),
+            "lawn": self.lawn_monitor.snapshot(),
+        }
+    
+    def resume(self, path=None) -> bool:
+        """
+        Continue the level from the last checkpoint
+        The current frame decides whether the level is still on and which
+        believed plants were eaten while the bot was down
+        """
+        started = time.perf_counter()
+        snapshot = checkpoint.load(path)
+        if snapshot is None:
+            print("📂 Контрольной точки нет, начинаем уровень с нуля")
+            return False
+        
+        session = snapshot["session"]
+        age = time.time() - session["time"]
+        if age > CHECKPOINT_MAX_AGE:
+            print(f"📂 Контрольная точка устарела ({age:.0f} с), начинаем уровень с нуля")
+            return False
+        
+        frame = self.controller.capture_frame()
+        if frame is not None and LEVEL_MONITOR_ENABLED and self.level_monitor.classify(frame) in (SEED_SELECT, LEVEL_END):
+            print("📂 Уровень не идёт, контрольная точка пропущена")
+            return False
+        if set(session["seeds"]) != set(self.plant_manager.plants):
+            print(f"⚠️ Семена отличаются от контрольной точки: {session['seeds']}")
+        
+        self.strategy.restore(snapshot["strategy"])
+        self.sun_tracker.restore(snapshot["sun"])
+        self.fuser.restore(snapshot["tracks"])
+        self.loop_count = session["loop_count"]
+        self.plants_placed = session["plants_placed"]
+        self.levels_started = session["levels_started"]
+        self.levels_completed = session["levels_completed"]
+        self.level_durations = list(session["level_durations"])
+        self.level_started_at = session["level_started_at"]
+        self.session_started = session["session_started"]
+        self.scheduled_removals = [tuple(removal) for removal in session["scheduled_removals"]]
+        
+        # Plants eaten during the downtime look like bare lawn again
+        eaten = []
+        if frame is not None:
+            self.lawn_monitor.restore(snapshot["lawn"], frame)
+            eaten = self.lawn_monitor.looks_empty(frame, sorted(self.strategy.placed_plants))
+            for col, row in eaten:
+                self.strategy.remove_plant(col, row)
+        
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"📂 Уровень продолжен за {elapsed:.1f} мс (точка {age:.0f} с назад) | "
+              f"🌱 {len(self.strategy.placed_plants)} | ☀️ {self.sun_tracker.sun_count} | "
+              f"🧟 треков {len(self.fuser.tracks)}" + (f" | съедено за простой: {eaten}" if eaten else ""))
+        return True
+    
+    def _collect(self, frame=None) -> int:
+        """Collect suns and coins with the configured detector per class"""
+        sunflowers = [GRID[row][col] for (col, row), name in self.strategy.plant_types.items()
+                      if name == "sunflower"]
+        return self.controller.collect_collectibles(
+            self.yolo_model, self.sun_tracker, frame, self.blob_detector, sunflowers)
+    
+    def _reset_level(self):
+        """Reset per-level state; the model, buffers and references stay warm"""
+        self.strategy.reset()
+        self.sun_tracker.reset()
+        self.lawn_monitor.reset()
+        self.fuser.reset()
+        self.forecaster.reset()
+        self.verifier.reset()
+        self.scheduled_removals.clear()
+        self.loop_count = 0
+        self.plants_placed = 0
+        self.surplus_time = 0.0
+        self.surplus_plants = 0
+    
+    def _track_level(self, frame) -> bool:
+        """Follow level transitions; returns False while there is nothing to play"""
+        change = self.level_monitor.update(frame)
+        if change:
+            previous, state = change
+            if state == LEVEL_END:
+                self._finish_level()
+            elif state == SEED_SELECT:
+                log.info("🌱 Выбор семян...", extra={"event": "seed_select"})
+            elif state == PAUSED:
+                log.info("⏸️ Газон не виден, игра на паузе", extra={"event": "level_pause"})
+            elif state == PLAYING and previous in (SEED_SELECT, LEVEL_END):
+                self._start_level(frame)
+            elif state == PLAYING and previous == PAUSED:
+                # Without references only a changed seed bar tells a new level from a pause
+                if self._recognize_seed_bar(frame, keep_unmatched=True):
+                    self._finish_level()
+                    self._start_level(frame)
+                else:
+                    log.info("▶️ Игра продолжается", extra={"event": "level_resume"})
+            elif state == PLAYING and self.levels_started == 0:
+                self.levels_started = 1  # Session started mid-level
+        return self.level_monitor.state not in (SEED_SELECT, LEVEL_END, PAUSED)
+    
+    def _finish_level(self):
+        self.checkpoints.discard()  # Nothing to resume in a finished level
+        self.levels_completed += 1
+        duration = time.time() - self.level_started_at if self.level_started_at else 0.0
+        self.level_durations.append(duration)
+        log.info("🏁 Уровень пройден за %.0f с | Уровней: %d | %.1f/час",
+                 duration, self.levels_completed, self.levels_per_hour,
+                 extra={"event": "level_end", "fields": {"duration": duration, "levels": self.levels_completed}})
     
-    def execute_action(self, action: dict):
-        """Execute a planting action"""
+    def _start_level(self, frame):
+        """New level detected: reset state and pick the plants for it"""
+        self._reset_level()
+        self.levels_started += 1
+        self.level_started_at = time.time()
+        log.info("\n🎬 Уровень %d начался", self.levels_started,
+                 extra={"event": "level_start", "fields": {"level": self.levels_started}})
+        
+        # The seed bar decides the plants; a profile with the same seed bar brings its settings
+        self._recognize_seed_bar(frame)
+        match = find_profile_for_plants(self.plant_manager.plants)
+        if match is not None and (self.profile is None or match.path != self.profile.path):
+            match.apply()
+            self.profile = match
+            self.plant_manager.load_profile(match)
+            log.info("🗂️ Профиль '%s' выбран по панели семян", match.name,
+                     extra={"event": "profile", "fields": {"profile": match.name}})
+            if CALIBRATION_ENABLED and self.calibrator.has_reference:
+                self.calibrator.calibrate(frame)
+        elif match is None and self.profile is not None and self.profile.plants:
+            # No recognition: back to the configured plants
+            self.plant_manager.load_profile(self.profile)
+        self.strategy.start_seed_cooldowns()  # For the final plant set
+    
+    @property
+    def levels_per_hour(self) -> float:
+        if self.session_started is None:
+            return 0.0
+        hours = (time.time() - self.session_started) / 3600
+        return self.levels_completed / hours if hours > 0 else 0.0
+    
+    def _begin_level_reference(self):
+        """Capture the screen; its state is picked with 1/2/3 without stopping the loop"""
+        # A copy: capture buffers are reused while the loop keeps running
+        self.pending_reference = (self.controller.capture_frame().copy(), time.time() + LEVEL_REFERENCE_TIMEOUT)
+        print(f"\n📸 Состояние экрана: [1] выбор семян, [2] игра, [3] конец уровня "
+              f"({LEVEL_REFERENCE_TIMEOUT:.0f} с)")
+    
+    def _poll_level_reference(self):
+        """Save the captured screen once its state key is pressed; give up after the timeout"""
+        frame, deadline = self.pending_reference
+        for key, state in (("1", SEED_SELECT), ("2", PLAYING), ("3", LEVEL_END)):
+            if keyboard.is_pressed(key):
+                self.pending_reference = None
+                self.level_monitor.save_reference(frame, state)
+                return
+        if time.time() >= deadline:
+            self.pending_reference = None
+            print("  ❌ Состояние не выбрано, эталон не сохранён")
+    
+    def _record_throughput(self, sun_count: int, placed: int):
+        """Accumulate plants placed per second of ticks that started with surplus sun"""
+        now = time.time()
+        if self.last_tick_at is not None and sun_count >= SUN_SURPLUS_THRESHOLD:
+            # Gaps longer than a few ticks are pauses, not play time
+            self.surplus_time += min(now - self.last_tick_at, 5 * LOOP_DELAY + 1.0)
+            self.surplus_plants += placed
+        self.last_tick_at = now
+    
+    @property
+    def surplus_plants_per_min(self) -> float:
+        return self.surplus_plants / self.surplus_time * 60 if self.surplus_time > 0 else 0.0
+    
+    def _verify_actions(self, frame):
+        """Apply verification results for optimistically committed actions"""
+        confirmed, rolled_back = self.verifier.verify(frame)
+        for pending in rolled_back:
+            self.strategy.rollback_plant(pending.col, pending.row, pending.plant)
+            self.sun_tracker.refund(pending.cost)
+            self.plants_placed -= 1
+            log.info("↩️ %s → (%d,%d) не подтвердилось, откат | ☀️ +%d",
+                     pending.plant, pending.col, pending.row, pending.cost,
+                     extra={"event": "rollback", "fields": {"plant": pending.plant, "col": pending.col,
+                                                            "row": pending.row, "cost": pending.cost}})
+    
+    def _process_removals(self):
+        """Clear instant-kill plants whose effect is over"""
+        now = time.time()
+        due = [r for r in self.scheduled_removals if r[0] <= now]
+        if due:
+            self.scheduled_removals = [r for r in self.scheduled_removals if r[0] > now]
+            for _, col, row in due:
+                self.strategy.remove_plant(col, row)
+    
+    def execute_action(self, action: dict, frame=None) -> bool:
+        """
+        Execute a planting action, returns True if it was planted
+        State is committed optimistically and verified on the next ticks;
+        frame is the tick's frame from before the clicks
+        """
         try:
             plant_name = action["plant"]
             col = action["col"]
@@ -217,46 +707,57 @@ class PvZAI:
             # Get plant data
             plant_data = self.plant_manager.get_plant(plant_name)
             if not plant_data:
-                print(f"❌ Растение {plant_name} недоступно")
-                return
+                log.warning("❌ Растение %s недоступно", plant_name, extra={"key": ("unavailable", plant_name)})
+                return False
             
             # Get plant cost
-            plant_cost = PLANT_COSTS.get(plant_name, 0)
+            plant_cost = self.plant_manager.get_cost(plant_name)
             
             # Check if we can afford it
             if not self.sun_tracker.can_afford(plant_cost):
-                print(f"⏳ Недостаточно солнц для {plant_name} (нужно {plant_cost}, есть {self.sun_tracker.sun_count})")
-                return
+                log.info("⏳ Недостаточно солнц для %s (нужно %d, есть %d)",
+                         plant_name, plant_cost, self.sun_tracker.sun_count, extra={"key": ("no_sun", plant_name)})
+                return False
             
-            # Check if seed is ready
-            if not self.controller.check_seed_ready(plant_data["coord"]):
-                print(f"⏳ {plant_name} перезаряжается")
-                return
+            # Check if seed is ready (degraded: the strategy's cooldown prediction only)
+            seed_coord = self.plant_manager.seed_coord(plant_name)
+            if self.watchdog.check_seeds_visually and not self.controller.check_seed_ready(seed_coord):
+                log.info("⏳ %s перезаряжается", plant_name, extra={"key": ("recharging", plant_name)})
+                return False
             
             # Plant it
             success = self.controller.plant(
-                plant_data["coord"],
+                seed_coord,
                 col,
                 row
             )
             
             if success:
-                # Spend sun
+                # Tentatively commit; ActionVerifier confirms or rolls back
                 self.sun_tracker.spend_sun(plant_cost)
                 
-                self.strategy.mark_planted(col, row)
+                self.strategy.mark_planted(col, row, plant_name)
                 self.plants_placed += 1
+                now = time.time()
+                self.action_history.append(now, 1)
+                self.action_history.expire(now - HISTORY_WINDOW)
+                self.verifier.begin(frame, action, seed_coord, plant_cost)
                 
                 emoji = self._get_plant_emoji(plant_name)
-                print(f"{emoji} {plant_name} → ({col},{row}) | {reason} | ☀️ -{plant_cost} (осталось: {self.sun_tracker.sun_count})")
+                log.info("%s %s → (%d,%d) | %s | ☀️ -%d (осталось: %d)",
+                         emoji, plant_name, col, row, reason, plant_cost, self.sun_tracker.sun_count,
+                         extra={"event": "plant", "fields": {"plant": plant_name, "col": col, "row": row,
+                                                             "reason": reason, "cost": plant_cost,
+                                                             "sun": self.sun_tracker.sun_count}})
                 
-                # Remove plant marker for instant-kill plants
+                # Remove plant marker for instant-kill plants once the effect is over
                 if plant_name in ["cherry bomb", "jalapeno", "squash", "potato mine"]:
-                    time.sleep(3)  # Wait for effect
-                    self.strategy.remove_plant(col, row)
+                    self.scheduled_removals.append((time.time() + 3, col, row))
+            return success
         
         except Exception as e:
-            print(f"❌ Ошибка выполнения действия: {e}")
+            log.error("❌ Ошибка выполнения действия: %s", e, extra={"event": "error", "key": "action_error"})
+            return False
     
     def _get_plant_emoji(self, plant_name: str) -> str:
         """Get emoji for plant"""
@@ -277,8 +778,32 @@ class PvZAI:
         }
         return emojis.get(plant_name, "🌱")
     
+    def get_metrics(self) -> dict:
+        """Snapshot of counters and rolling time series for export"""
+        now = time.time()
+        self.action_history.expire(now - HISTORY_WINDOW)
+        return {
+            "time": now,
+            "loops": self.loop_count,
+            "plants_placed": self.plants_placed,
+            "levels_completed": self.levels_completed,
+            "levels_per_hour": self.levels_per_hour,
+            "level_durations": list(self.level_durations),
+            "surplus_plants_per_min": self.surplus_plants_per_min,
+            "sun": self.sun_tracker.get_stats(),
+            "threat_per_row": self.strategy.row_threat.tolist(),
+            "watchdog": self.watchdog.metrics(now),
+            "series": {
+                "sun": self.sun_tracker.sun_history.to_dict(),
+                "income": self.sun_tracker.income_history.to_dict(),
+                "zombies_per_row": self.strategy.zombie_counts.to_dict(),
+                "actions": self.action_history.to_dict(),
+            },
+        }
+    
     def print_stats(self):
         """Print current statistics"""
+        flush_logging()  # Queued log lines first, then the screen
         sun_stats = self.sun_tracker.get_stats()
         
         print("\n" + "="*60)
@@ -287,19 +812,76 @@ class PvZAI:
         print(f"  Циклов выполнено: {self.loop_count}")
         print(f"  Растений посажено: {self.plants_placed}")
         print(f"  Занятых клеток: {len(self.strategy.placed_plants)}")
+        print(f"  Посадок подтверждено/откачено: {self.verifier.confirmed}/{self.verifier.rolled_back}")
+        print(f"  Посадок в минуту при избытке солнца: {self.surplus_plants_per_min:.1f}")
+        print(f"  Действий за минуту: {self.action_history.rate(time.time(), 60.0)[0] * 60:.0f}")
+        print(f"  Детекция: профиль {self.fuser.profile} (imgsz {self.fuser.imgsz}), треков: {len(self.fuser.confirmed())}")
+        print(f"  Сторож тиков: {self.watchdog.name} | опозданий {self.watchdog.late_ticks}/{self.watchdog.ticks} "
+              f"(бюджет {self.watchdog.budget * 1000:.0f} мс) | понижений {self.watchdog.degradations}, "
+              f"восстановлений {self.watchdog.recoveries}")
+        if self.checkpoints.writes:
+            print(f"  Контрольные точки: {self.checkpoints.writes} | последняя {self.checkpoints.last_size / 1024:.1f} КБ "
+                  f"за {self.checkpoints.last_write_ms:.1f} мс")
+        print(f"  Уровень: {self.level_monitor.state} | пройдено {self.levels_completed} "
+              f"({self.levels_per_hour:.1f}/час)")
         print(f"  Фаза: {'Производство солнца' if self.strategy.production_phase else 'Защита'}")
+        if self.first_tick_time is not None:
+            print(f"  Запуск → первый тик: {self.first_tick_time:.1f} с")
+        if self.alloc_tracker.ticks:
+            print(f"  Память за тик: пик {self.alloc_tracker.average_peak / 1024:.1f} КБ, "
+                  f"не освобождено {self.alloc_tracker.average_net / 1024:+.1f} КБ")
+        if self.model_loader.load_time is not None:
+            print(f"  Загрузка модели: {self.model_loader.load_time:.1f} с")
+        if dropped_records():
+            print(f"  Журнал: потеряно записей {dropped_records()} (очередь переполнена)")
         print()
         print("☀️ СОЛНЦЕ:")
         print(f"  Текущее: {sun_stats['current']}")
         print(f"  Собрано: {sun_stats['collected']}")
         print(f"  Потрачено: {sun_stats['spent']}")
         print(f"  Баланс: {sun_stats['current'] + sun_stats['spent']}")
+        print(f"  Средний уровень: {sun_stats['average']:.0f} (за {HISTORY_WINDOW / 60:.0f} мин)")
+        print(f"  Собрано: {sun_stats['income_per_min']:.0f}/мин за {FORECAST_RATE_WINDOW:.0f} с")
+        print(f"  Прогноз дохода: {self.forecaster.income_rate * 60:.0f}/мин "
+              f"(модель {self.forecaster.modeled_rate * 60:.0f}/мин)")
+        sun_recall = self.blob_detector.recall("sun")
+        if sun_recall is not None:
+            print(f"  Солнца без YOLO: найдено {sun_recall * 100:.0f}% от YOLO ({self.blob_detector.cross_checks} сверок)")
+        if self.strategy.saving_for:
+            print(f"  Копим на: {self.strategy.saving_for}")
         print("="*60 + "\n")
 
 
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="PvZ AI")
+    parser.add_argument("--profile", help="имя профиля в configs/ или путь к JSON (или PVZ_PROFILE)")
+    parser.add_argument("--headless", action="store_true", help="без вопросов, старт сразу (или PVZ_HEADLESS=1)")
+    parser.add_argument("--resume", action="store_true", help="продолжить уровень с последней контрольной точки")
+    parser.add_argument("--log-level", help="уровень журнала: DEBUG, INFO, WARNING (по умолчанию LOG_LEVEL)")
+    parser.add_argument("--log-json", help="файл журнала JSON lines (по умолчанию LOG_JSON_PATH)")
+    return parser.parse_args(argv)
+
+
 def main():
     """Entry point"""
-    ai = PvZAI()
+    args = parse_args()
+    
+    profile = None
+    profile_name = selected_profile(args.profile)
+    if profile_name:
+        try:
+            profile = load_profile(profile_name)
+        except ProfileError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        profile.apply()
+        print(f"✅ Профиль '{profile.name}' загружен из {profile.path}")
+    
+    # After the profile: it may change the log settings
+    setup_logging(level=args.log_level, json_path=args.log_json)
+    
+    ai = PvZAI(profile=profile, headless=headless_requested(args.headless), resume=args.resume)
     ai.run()
 
 
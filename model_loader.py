@@ -0,0 +1,94 @@
+"""
+Model Loader - Lazy, backgrounded YOLO loading
+Ultralytics is imported and the model is built and warmed up in a background
+thread so the interactive setup is not blocked by it
+"""
+
+import os
+import threading
+import time
+from config import *
+from event_log import get_logger
+
+log = get_logger("model")
+
+
+class ModelLoader:
+    """Загружает YOLO модель в фоне и сообщает о готовности"""
+
+    def __init__(self, model_path=YOLO_MODEL_PATH):
+        self.model_path = model_path
+        self.model = None
+        self.error = None
+        self.load_time = None  # Seconds from start() to ready
+        self.imgsz = None  # Input size of the warm-up inference (None = model default)
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        """True once loading has finished (successfully or not)"""
+        return self._ready.is_set()
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def start(self, imgsz=None):
+        """
+        Start loading in a background thread (no-op if already started)
+        imgsz: input size the model will be run at, so the warm-up covers it
+        """
+        if self._thread is not None:
+            return
+        self.imgsz = imgsz
+        self._thread = threading.Thread(target=self._load, name="pvz-model-loader", daemon=True)
+        self._thread.start()
+
+    def get(self):
+        """Return the model if it is ready, None otherwise. Never blocks"""
+        return self.model if self._ready.is_set() else None
+
+    def wait(self, timeout=None):
+        """Block until loading finishes. Returns the model or None"""
+        self.start()
+        self._ready.wait(timeout)
+        return self.get()
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            if not os.path.exists(self.model_path):
+                self.error = "YOLO модель не найдена, работа без детекции зомби"
+                return
+
+            try:
+                from ultralytics import YOLO
+            except ImportError:
+                self.error = "Ultralytics не установлен, работа без детекции зомби"
+                return
+
+            model = YOLO(self.model_path)
+            self._warm_up(model)
+            self.model = model
+        except Exception as e:
+            self.error = f"Ошибка загрузки YOLO: {e}"
+        finally:
+            self.load_time = time.perf_counter() - started
+            self._ready.set()
+            self._report()
+
+    def _warm_up(self, model):
+        """Run one dummy inference so the first real tick doesn't pay for it"""
+        import numpy as np
+        height, width = YOLO_WARMUP_SHAPE
+        dummy = np.zeros((height, width, 3), dtype=np.uint8)
+        options = {"imgsz": self.imgsz} if self.imgsz else {}
+        model.predict(source=dummy, conf=YOLO_CONFIDENCE, verbose=False, **options)
+
+    def _report(self):
+        if self.model is not None:
+            log.info("\n✅ YOLO модель загружена и прогрета за %.1f с", self.load_time,
+                     extra={"event": "model_ready", "fields": {"path": self.model_path, "load_time": self.load_time}})
+        else:
+            log.warning("\n⚠️ %s", self.error, extra={"event": "model_error", "fields": {"path": self.model_path}})
@@ -5,13 +5,69 @@ Improved version with dynamic slot count
 
 import json
 import os
-from config import SEED_SLOTS, PLANT_COSTS
+from config import SEED_SLOTS, PLANT_COSTS, PLANT_COOLDOWNS, PLANT_INITIAL_COOLDOWNS
+from event_log import flush_logging, get_logger
+from seed_recognizer import SeedRecognizer
+
+log = get_logger("plants")
 
 class PlantManager:
     def __init__(self):
         self.plants = {}  # {plant_name: {"slot": slot_num, "coord": (x,y)}}
         self.config_file = "plant_config.json"
         self.slot_count = 6  # Default slot count
+        
+        # Lookup tables rebuilt whenever the plant set changes
+        self.costs = {}  # {plant_name: sun cost}
+        self.cooldowns = {}  # {plant_name: recharge seconds}
+        self.initial_cooldowns = {}  # {plant_name: seconds before first use}
+        
+        self.recognizer = SeedRecognizer()
+    
+    def _build_lookups(self):
+        """Precompute per-plant cost and cooldown tables for the hot path"""
+        self.costs = {name: PLANT_COSTS.get(name, 0) for name in self.plants}
+        self.cooldowns = {name: PLANT_COOLDOWNS.get(name, 0.0) for name in self.plants}
+        self.initial_cooldowns = {name: PLANT_INITIAL_COOLDOWNS.get(name, 0.0) for name in self.plants}
+    
+    def load_profile(self, profile):
+        """Take plants and lookup tables from a validated Profile (no prompts)"""
+        self.plants = {name: dict(data) for name, data in profile.plants.items()}
+        self.slot_count = profile.slot_count
+        self.costs = dict(profile.costs)
+        self.cooldowns = dict(profile.cooldowns)
+        self.initial_cooldowns = dict(profile.initial_cooldowns)
+        self.log_summary(f"✅ Растения загружены из профиля '{profile.name}'")
+        return bool(self.plants)
+    
+    def recognize_seed_bar(self, frame, keep_unmatched=False):
+        """
+        Populate plants from the seed bar visible in a frame (no prompts)
+        keep_unmatched: keep configured plants whose slot matched nothing,
+        so a recharging (darkened) packet doesn't drop out mid-level
+        Returns True if the plant configuration changed
+        """
+        recognized = self.recognizer.recognize(frame)
+        if not recognized:
+            return False
+        
+        plants = dict(recognized)
+        if keep_unmatched:
+            matched_slots = {data["slot"] for data in recognized.values()}
+            for name, data in self.plants.items():
+                if name not in plants and data["slot"] not in matched_slots:
+                    plants[name] = data
+        
+        old_slots = {name: data["slot"] for name, data in self.plants.items()}
+        new_slots = {name: data["slot"] for name, data in plants.items()}
+        if new_slots == old_slots:
+            return False
+        
+        self.plants = plants
+        self.slot_count = max(new_slots.values())
+        self._build_lookups()
+        self.log_summary("🔎 Панель семян распознана")
+        return True
     
     def setup_interactive(self):
         """Interactive setup for plant configuration"""
@@ -109,6 +165,7 @@ class PlantManager:
                 except Exception as e:
                     print(f"  ❌ Ошибка: {e}")
         
+        self._build_lookups()
         self.save_config()
         self.print_summary()
     
@@ -141,6 +198,7 @@ class PlantManager:
                     self.plants = config_data
                     self.slot_count = len(self.plants)
                 
+                self._build_lookups()
                 print(f"✅ Конфигурация загружена из {self.config_file}")
                 self.print_summary()
                 return True
@@ -148,8 +206,19 @@ class PlantManager:
             print(f"⚠️ Не удалось загрузить: {e}")
         return False
     
+    def _plant_lines(self):
+        """One line per configured plant, in slot order"""
+        lines = []
+        for name, data in sorted(self.plants.items(), key=lambda x: x[1]["slot"]):
+            slot = data["slot"]
+            coord = self.seed_coord(name)
+            cost = self.costs.get(name, PLANT_COSTS.get(name, "?"))
+            lines.append(f"  ✅ Слот {slot}: {name:15} | {coord} | {cost} sun")
+        return lines
+    
     def print_summary(self):
-        """Print current plant configuration"""
+        """Print current plant configuration (interactive setup and CLI)"""
+        flush_logging()
         print("\n" + "="*60)
         print("📋 ТЕКУЩАЯ КОНФИГУРАЦИЯ")
         print("="*60)
@@ -160,20 +229,41 @@ class PlantManager:
             return
         
         print("\n🟢 Доступные растения:")
-        for name, data in sorted(self.plants.items(), key=lambda x: x[1]["slot"]):
-            slot = data["slot"]
-            coord = data["coord"]
-            cost = PLANT_COSTS.get(name, "?")
-            print(f"  ✅ Слот {slot}: {name:15} | {coord} | {cost} sun")
+        for line in self._plant_lines():
+            print(line)
         
         print("="*60 + "\n")
     
+    def log_summary(self, title):
+        """Plant configuration as one log record, for changes while the bot runs"""
+        lines = self._plant_lines() or ["  ⚠️ Нет настроенных растений"]
+        log.info("%s (слотов: %d)\n%s", title, self.slot_count, "\n".join(lines),
+                 extra={"event": "plants", "fields": {"slots": self.slot_count,
+                                                      "plants": {name: data["slot"] for name, data in self.plants.items()}}})
+    
     def get_plant(self, plant_name):
         """Get plant data if it exists"""
         if plant_name in self.plants:
             return self.plants[plant_name]
         return None
     
+    def seed_coord(self, plant_name):
+        """
+        Click position of a plant's seed packet
+        Resolved from SEED_SLOTS on every call, so a recalibration or window
+        move applies at once; the stored coord is the fallback for unknown slots
+        """
+        data = self.plants[plant_name]
+        return SEED_SLOTS.get(data["slot"], data["coord"])
+    
+    def get_cost(self, plant_name):
+        """Get sun cost of a plant"""
+        return self.costs.get(plant_name, 0)
+    
+    def get_cooldown(self, plant_name):
+        """Get recharge time of a plant in seconds"""
+        return self.cooldowns.get(plant_name, 0.0)
+    
     def get_all_available(self):
         """Get list of all available plants"""
         return list(self.plants.keys())
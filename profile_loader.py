@@ -0,0 +1,334 @@
+"""
+Profile Loader - Validated, non-interactive configuration profiles
+A profile is a JSON file combining the plant configuration with window, grid,
+timing and strategy settings from config.py. Profiles are selected with
+--profile or the PVZ_PROFILE environment variable
+"""
+
+import json
+import os
+import sys
+import config
+from config import *
+
+PROFILE_ENV_VAR = "PVZ_PROFILE"
+HEADLESS_ENV_VAR = "PVZ_HEADLESS"
+
+
+class ProfileError(ValueError):
+    """Raised when a profile file is missing or does not match the schema"""
+
+
+# ===== VALIDATORS =====
+# Each validator returns the normalized value or raises ValueError
+
+def _int(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("ожидалось целое число")
+    return value
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("ожидалось число")
+    return value
+
+
+def _bool(value):
+    if not isinstance(value, bool):
+        raise ValueError("ожидалось true/false")
+    return value
+
+
+def _int_list(value):
+    if not isinstance(value, list):
+        raise ValueError("ожидался список целых чисел")
+    return [_int(v) for v in value]
+
+
+def _int_tuple(length):
+    def validate(value):
+        if not isinstance(value, list) or len(value) != length:
+            raise ValueError(f"ожидался список из {length} целых чисел")
+        return tuple(_int(v) for v in value)
+    return validate
+
+
+def _choice(options):
+    def validate(value):
+        if value not in options:
+            raise ValueError(f"ожидалось одно из: {', '.join(sorted(options))}")
+        return value
+    return validate
+
+
+_point = _int_tuple(2)
+_region = _int_tuple(4)
+
+
+def _seed_slots(value):
+    if not isinstance(value, dict) or not value:
+        raise ValueError("ожидался объект {номер слота: [x, y]}")
+    slots = {}
+    for key, coord in value.items():
+        try:
+            slot = int(key)
+        except ValueError:
+            raise ValueError(f"неверный номер слота {key!r}")
+        slots[slot] = _point(coord)
+    return dict(sorted(slots.items()))
+
+
+def _grid(value):
+    if not isinstance(value, list) or not value:
+        raise ValueError("ожидался список рядов")
+    return [[_point(cell) for cell in row] for row in value]
+
+
+SCHEMA = {
+    "window": {
+        "GAME_WINDOW_X": _int,
+        "GAME_WINDOW_Y": _int,
+        "SEED_SLOTS": _seed_slots,
+        "SUN_COUNTER_REGION": _region,
+    },
+    "grid": {
+        "GRID_ROWS": _int,
+        "GRID_COLS": _int,
+        "GRID": _grid,
+        "CELL_WIDTH": _int,
+        "CELL_HEIGHT": _int,
+        "GRID_START_X": _int,
+        "GRID_START_Y": _int,
+        "ZOMBIE_ROW_OFFSET": _int,
+    },
+    "timing": {
+        "LOOP_DELAY": _number,
+        "CLICK_DELAY": _number,
+        "STATUS_CHECK_COOLDOWN": _number,
+        "YOLO_CHECK_INTERVAL": _number,
+        "FUSION_PROFILE": _choice(FUSION_PROFILES),
+        "ZOMBIE_DETECTOR": _choice(("yolo", "cells")),
+        "SUN_SWEEP_INTERVAL": _number,
+        "WATCHDOG_ENABLED": _bool,
+        "TICK_BUDGET": _number,
+    },
+    "strategy": {
+        "INITIAL_SUNFLOWERS": _int,
+        "ADDITIONAL_SUNFLOWERS": _int,
+        "ECONOMY_THRESHOLD": _int,
+        "SUNFLOWER_COLUMN": _int,
+        "OFFENSE_START_COLUMN": _int,
+        "OFFENSE_END_COLUMN": _int,
+        "ZOMBIE_MEMORY_TIME": _number,
+        "PANIC_COLUMN": _int,
+        "DEFENSE_TRIGGER_COLUMN": _int,
+        "AGGRESSIVE_MODE": _bool,
+        "MIN_SUN_FOR_OFFENSE": _int,
+        "PEASHOOTER_ALLOWED_ROWS": _int_list,
+        "PEASHOOTER_ALLOWED_COLS": _int_list,
+        "PLANT_EATEN_THRESHOLD": _int,
+        "CHERRY_BOMB_3X3_THRESHOLD": _int,
+        "CHERRY_BOMB_CLOSE_DISTANCE": _int,
+        "JALAPENO_ROW_THRESHOLD": _int,
+        "SKY_SUN_INTERVAL": _number,
+        "SAVE_HORIZON": _number,
+        "FORMATION": _choice(FORMATIONS),
+    },
+}
+
+TOP_LEVEL_KEYS = {"name", "plants"} | set(SCHEMA)
+
+
+class Profile:
+    """Validated profile with lookup tables precomputed at load time"""
+
+    def __init__(self, name, path, settings, plants, slot_count):
+        self.name = name
+        self.path = path
+        self.settings = settings  # {CONFIG_NAME: value} overrides for config.py
+        self.plants = plants  # {plant_name: {"slot": slot_num, "coord": (x,y)}}
+        self.slot_count = slot_count
+
+        # Lookup tables, built once so the hot path only does dict lookups
+        self.costs = {name: PLANT_COSTS.get(name, 0) for name in plants}
+        self.cooldowns = {name: PLANT_COOLDOWNS.get(name, 0.0) for name in plants}
+        self.initial_cooldowns = {name: PLANT_INITIAL_COOLDOWNS.get(name, 0.0) for name in plants}
+
+    def apply(self):
+        """Push the profile's settings into config and every module using them"""
+        apply_settings(self.settings)
+
+
+def resolve_profile_path(name_or_path: str) -> str:
+    """Accept either a path to a JSON file or a profile name in PROFILES_DIR"""
+    if os.path.isfile(name_or_path):
+        return name_or_path
+    candidate = os.path.join(PROFILES_DIR, name_or_path)
+    if not candidate.endswith(".json"):
+        candidate += ".json"
+    if os.path.isfile(candidate):
+        return candidate
+    raise ProfileError(f"Профиль не найден: {name_or_path}")
+
+
+def load_profile(name_or_path: str) -> Profile:
+    """Load and validate a profile. Raises ProfileError listing every problem"""
+    path = resolve_profile_path(name_or_path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ProfileError(f"Не удалось прочитать {path}: {e}")
+
+    if not isinstance(data, dict):
+        raise ProfileError(f"{path}: ожидался JSON объект")
+
+    errors = []
+    for key in data:
+        if key not in TOP_LEVEL_KEYS:
+            errors.append(f"неизвестный раздел '{key}'")
+
+    settings = {}
+    for section, fields in SCHEMA.items():
+        values = data.get(section, {})
+        if not isinstance(values, dict):
+            errors.append(f"{section}: ожидался объект")
+            continue
+        for key, value in values.items():
+            if key not in fields:
+                errors.append(f"{section}.{key}: неизвестный параметр")
+                continue
+            try:
+                settings[key] = fields[key](value)
+            except ValueError as e:
+                errors.append(f"{section}.{key}: {e}")
+
+    errors.extend(_check_consistency(settings))
+    plants, slot_count = _parse_plants(data.get("plants"), settings, errors)
+
+    if errors:
+        details = "\n".join(f"  - {e}" for e in errors)
+        raise ProfileError(f"Профиль {path} содержит ошибки:\n{details}")
+
+    name = data.get("name") or os.path.splitext(os.path.basename(path))[0]
+    return Profile(name, path, settings, plants, slot_count)
+
+
+def _check_consistency(settings: dict) -> list:
+    """Cross-field checks that a per-field validator can't do"""
+    errors = []
+    rows = settings.get("GRID_ROWS", GRID_ROWS)
+    cols = settings.get("GRID_COLS", GRID_COLS)
+
+    grid = settings.get("GRID")
+    if grid is not None:
+        if len(grid) != rows or any(len(row) != cols for row in grid):
+            errors.append(f"grid.GRID: ожидалась сетка {rows}×{cols}")
+    elif "GRID_ROWS" in settings or "GRID_COLS" in settings:
+        if rows != len(GRID) or cols != len(GRID[0]):
+            errors.append("grid: при изменении размеров нужно задать GRID")
+
+    if any(not 0 <= r < rows for r in settings.get("PEASHOOTER_ALLOWED_ROWS", [])):
+        errors.append("strategy.PEASHOOTER_ALLOWED_ROWS: ряд вне сетки")
+    if any(not 0 <= c < cols for c in settings.get("PEASHOOTER_ALLOWED_COLS", [])):
+        errors.append("strategy.PEASHOOTER_ALLOWED_COLS: колонка вне сетки")
+
+    start = settings.get("OFFENSE_START_COLUMN", OFFENSE_START_COLUMN)
+    end = settings.get("OFFENSE_END_COLUMN", OFFENSE_END_COLUMN)
+    if not 0 <= start <= end < cols:
+        errors.append("strategy: OFFENSE_START_COLUMN..OFFENSE_END_COLUMN вне сетки")
+    return errors
+
+
+def _parse_plants(section, settings: dict, errors: list):
+    """Validate the plants section (same layout as plant_config.json)"""
+    if section is None:
+        return {}, 0
+    if not isinstance(section, dict) or not isinstance(section.get("plants", {}), dict):
+        errors.append("plants: ожидался объект {slot_count, plants}")
+        return {}, 0
+
+    seed_slots = settings.get("SEED_SLOTS", SEED_SLOTS)
+    plants = {}
+    used_slots = {}
+    for name, entry in section.get("plants", {}).items():
+        if name not in PLANT_COSTS:
+            errors.append(f"plants.{name}: неизвестное растение")
+            continue
+        if not isinstance(entry, dict) or "slot" not in entry:
+            errors.append(f"plants.{name}: ожидался объект со 'slot'")
+            continue
+        try:
+            slot = _int(entry["slot"])
+            coord = _point(entry["coord"]) if "coord" in entry else seed_slots.get(slot)
+        except ValueError as e:
+            errors.append(f"plants.{name}: {e}")
+            continue
+        if coord is None:
+            errors.append(f"plants.{name}: слот {slot} отсутствует в SEED_SLOTS")
+            continue
+        if slot in used_slots:
+            errors.append(f"plants.{name}: слот {slot} уже занят {used_slots[slot]}")
+            continue
+        used_slots[slot] = name
+        plants[name] = {"slot": slot, "coord": coord}
+
+    slot_count = section.get("slot_count", len(plants))
+    try:
+        slot_count = _int(slot_count)
+    except ValueError as e:
+        errors.append(f"plants.slot_count: {e}")
+    return plants, slot_count
+
+
+def find_profile_for_plants(plants: dict):
+    """
+    First valid profile in PROFILES_DIR whose plants occupy the same slots
+    plants: {plant_name: {"slot": slot_num, ...}}, e.g. a recognized seed bar
+    """
+    wanted = {name: data["slot"] for name, data in plants.items()}
+    if not wanted or not os.path.isdir(PROFILES_DIR):
+        return None
+    for filename in sorted(os.listdir(PROFILES_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            profile = load_profile(os.path.join(PROFILES_DIR, filename))
+        except ProfileError:
+            continue
+        if {name: data["slot"] for name, data in profile.plants.items()} == wanted:
+            return profile
+    return None
+
+
+def apply_settings(settings: dict):
+    """
+    Set config values at runtime
+    Project modules use `from config import *`, so besides config itself every
+    project module that bound one of the names gets the new value as well
+    """
+    project_dir = os.path.dirname(os.path.abspath(config.__file__))
+    modules = [config]
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, "__file__", None)
+        if module is config or not module_file:
+            continue
+        if os.path.dirname(os.path.abspath(module_file)) == project_dir:
+            modules.append(module)
+
+    for name, value in settings.items():
+        if not hasattr(config, name):
+            raise ProfileError(f"Неизвестный параметр конфигурации: {name}")
+        for module in modules:
+            if module is config or name in vars(module):
+                setattr(module, name, value)
+
+
+def selected_profile(cli_value=None):
+    """Profile chosen on the command line, falling back to the environment"""
+    return cli_value or os.environ.get(PROFILE_ENV_VAR) or None
+
+
+def headless_requested(cli_flag=False) -> bool:
+    return cli_flag or os.environ.get(HEADLESS_ENV_VAR, "").lower() in ("1", "true", "yes")
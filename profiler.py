@@ -0,0 +1,214 @@
+"""
+Sampling Profiler - Low-overhead stack sampling for the running AI
+Samples the main thread from a background thread and writes folded stacks
+(flamegraph.pl / speedscope compatible). AllocationTracker reports memory
+allocated per AI tick with tracemalloc
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from config import *
+
+
+class SamplingProfiler:
+    """Периодически снимает стек главного потока и агрегирует по подсистемам"""
+
+    # Source file -> subsystem name used as the root frame of each folded stack
+    SUBSYSTEMS = {
+        "game_controller.py": "game_controller",
+        "strategy.py": "strategy",
+        "plant_manager.py": "strategy",
+    }
+    # Anything running inside these packages is attributed to the detector
+    DETECTOR_PACKAGES = ("ultralytics", "torch", "torchvision")
+
+    def __init__(self, interval=PROFILER_INTERVAL, output_dir=PROFILER_OUTPUT_DIR):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.target_thread_id = threading.main_thread().ident
+        self.stacks = Counter()  # {folded_stack: sample_count}
+        self.subsystem_samples = Counter()  # {subsystem: sample_count}
+        self.total_samples = 0
+        self.started_at = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start sampling the main thread"""
+        if self.running:
+            return
+        self.stacks.clear()
+        self.subsystem_samples.clear()
+        self.total_samples = 0
+        self.started_at = time.time()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="pvz-profiler", daemon=True)
+        self._thread.start()
+        print(f"🔬 Профайлер запущен (интервал {self.interval * 1000:.1f} мс)")
+
+    def stop(self):
+        """Stop sampling and dump collected stacks. Returns output path or None"""
+        if not self.running:
+            return None
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        return self.dump()
+
+    def toggle(self):
+        """Start if stopped, stop and dump if running"""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            self._record(frame)
+            del frame
+
+    def _record(self, frame):
+        """Fold a single stack sample and attribute it to a subsystem"""
+        names = []
+        subsystem = None
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            names.append(f"{code.co_name} ({filename})")
+            # Innermost match wins: the first frame we see is the deepest one
+            if subsystem is None:
+                subsystem = self._classify(code.co_filename, filename)
+            frame = frame.f_back
+        names.reverse()
+
+        subsystem = subsystem or "main"
+        self.stacks[subsystem + ";" + ";".join(names)] += 1
+        self.subsystem_samples[subsystem] += 1
+        self.total_samples += 1
+
+    def _classify(self, path: str, filename: str):
+        if filename in self.SUBSYSTEMS:
+            return self.SUBSYSTEMS[filename]
+        parts = path.replace("\\", "/").split("/")
+        if any(package in parts for package in self.DETECTOR_PACKAGES):
+            return "detector"
+        return None
+
+    def dump(self):
+        """Write folded stacks to disk. Returns output path or None"""
+        if not self.stacks:
+            print("🔬 Профайлер: нет сэмплов")
+            return None
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started_at))
+            path = os.path.join(self.output_dir, f"pvz_{stamp}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except Exception as e:
+            print(f"⚠️ Не удалось сохранить профиль: {e}")
+            return None
+
+        self.print_summary()
+        print(f"💾 Профиль сохранён в {path}")
+        return path
+
+    def print_summary(self):
+        """Print sample share per subsystem"""
+        duration = time.time() - self.started_at
+        print("\n" + "="*60)
+        print(f"🔬 ПРОФИЛЬ ({self.total_samples} сэмплов за {duration:.1f} с)")
+        print("="*60)
+        for subsystem, count in self.subsystem_samples.most_common():
+            share = 100.0 * count / self.total_samples
+            print(f"  {subsystem:16} {count:7} ({share:5.1f}%)")
+        print("="*60 + "\n")
+
+
+class AllocationTracker:
+    """Память, выделяемая за тик (tracemalloc): пик и прирост"""
+
+    def __init__(self, top=ALLOC_REPORT_TOP):
+        self.top = top
+        self.tracking = False
+        self.ticks = 0
+        self.peak_sum = 0  # Sum over ticks of peak bytes above the tick start
+        self.peak_max = 0
+        self.net_sum = 0  # Sum over ticks of bytes still held at tick end
+        self._tick_start = 0
+        self._snapshot = None
+
+    def start(self):
+        if self.tracking:
+            return
+        tracemalloc.start(ALLOC_TRACE_FRAMES)
+        self.ticks = self.peak_sum = self.peak_max = self.net_sum = 0
+        self._snapshot = tracemalloc.take_snapshot()
+        self.tracking = True
+        print("🧮 Учёт выделений памяти включён")
+
+    def stop(self):
+        """Stop tracing and print the per-tick report"""
+        if not self.tracking:
+            return
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.tracking = False
+        self.print_summary(snapshot.compare_to(self._snapshot, "lineno"))
+        self._snapshot = None
+
+    def toggle(self):
+        if self.tracking:
+            self.stop()
+        else:
+            self.start()
+
+    def begin_tick(self):
+        if self.tracking:
+            tracemalloc.reset_peak()
+            self._tick_start = tracemalloc.get_traced_memory()[0]
+
+    def end_tick(self):
+        if not self.tracking:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        peak -= self._tick_start
+        self.ticks += 1
+        self.peak_sum += peak
+        self.peak_max = max(self.peak_max, peak)
+        self.net_sum += current - self._tick_start
+
+    @property
+    def average_peak(self) -> float:
+        """Average transient bytes per tick (largest live extra memory within the tick)"""
+        return self.peak_sum / self.ticks if self.ticks else 0.0
+
+    @property
+    def average_net(self) -> float:
+        """Average bytes per tick that were not freed by the end of the tick"""
+        return self.net_sum / self.ticks if self.ticks else 0.0
+
+    def print_summary(self, growth=None):
+        print("\n" + "="*60)
+        print(f"🧮 ПАМЯТЬ ЗА ТИК ({self.ticks} тиков)")
+        print("="*60)
+        print(f"  Пик за тик: в среднем {self.average_peak / 1024:.1f} КБ, максимум {self.peak_max / 1024:.1f} КБ")
+        print(f"  Не освобождено за тик: {self.average_net / 1024:+.1f} КБ")
+        if growth:
+            print("  Рост по строкам кода:")
+            for stat in growth[:self.top]:
+                print(f"    {stat.size_diff / 1024:+9.1f} КБ  {stat.traceback}")
+        print("="*60 + "\n")
@@ -0,0 +1,153 @@
+"""
+Ring Buffer - Fixed-size NumPy-backed time series
+O(1) append, O(1) sum/mean of the live samples via a running total, expiry
+that only touches the samples being dropped, and read-only sums over a
+shorter trailing window. Each window length asked for keeps its own running
+sum and start index, updated on append and eviction; as time moves forward
+the start only advances, so a window sum is amortized O(1)
+"""
+
+import numpy as np
+
+
+class _Window:
+    """Running sum of the samples at or after the last cutoff of one window length"""
+
+    __slots__ = ("start", "cutoff", "sum")
+
+    def __init__(self, start, cutoff, total):
+        self.start = start  # Absolute index of the first sample in the window
+        self.cutoff = cutoff
+        self.sum = total
+
+
+class RingBuffer:
+    """Кольцевой буфер временного ряда (метки времени + значения)"""
+
+    def __init__(self, capacity: int, width: int = 1, dtype=np.float64):
+        self.capacity = capacity
+        self.width = width
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, width), dtype=dtype)
+        self._sum = np.zeros(width, dtype=np.float64)
+        self._start = 0  # Absolute index of the oldest live sample
+        self._end = 0  # Absolute index one past the newest sample
+        self._windows = {}  # {window length: _Window}, created on first use
+
+    def __len__(self):
+        return self._end - self._start
+
+    def clear(self):
+        self._sum[:] = 0
+        self._start = self._end = 0
+        self._windows.clear()
+
+    def append(self, t: float, value):
+        """Add a sample; the oldest one is evicted when the buffer is full"""
+        if self._end - self._start == self.capacity:
+            self._drop_oldest()
+        i = self._end % self.capacity
+        self.times[i] = t
+        self.values[i] = value
+        self._sum += self.values[i]
+        self._end += 1
+        for state in self._windows.values():
+            state.sum += self.values[i]
+
+    def _drop_oldest(self):
+        oldest = self.values[self._start % self.capacity]
+        self._sum -= oldest
+        for state in self._windows.values():
+            if state.start == self._start:
+                state.sum -= oldest
+                state.start += 1
+        self._start += 1
+        if self._start == self._end:
+            self._sum[:] = 0  # Reset float drift whenever the buffer empties
+            for state in self._windows.values():
+                state.sum[:] = 0
+
+    def expire(self, cutoff: float):
+        """Drop samples older than cutoff (amortized O(1): each sample is dropped once)"""
+        while self._start < self._end and self.times[self._start % self.capacity] < cutoff:
+            self._drop_oldest()
+
+    def sum(self) -> np.ndarray:
+        """Sum of live samples per column"""
+        return self._sum.copy()
+
+    def mean(self) -> np.ndarray:
+        n = len(self)
+        return self._sum / n if n else np.zeros(self.width)
+
+    def latest(self):
+        """(time, values) of the newest sample or None"""
+        if not len(self):
+            return None
+        i = (self._end - 1) % self.capacity
+        return self.times[i], self.values[i].copy()
+
+    @property
+    def oldest_time(self):
+        return self.times[self._start % self.capacity] if len(self) else None
+
+    def _first_index(self, cutoff: float) -> int:
+        """Absolute index of the first live sample at or after cutoff (binary search)"""
+        lo, hi = self._start, self._end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[mid % self.capacity] < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slice_sum(self, first: int) -> np.ndarray:
+        """Sum per column of the samples from absolute index first to the newest (O(n))"""
+        if first == self._end:
+            return np.zeros(self.width)
+        if first == self._start:
+            return self._sum.copy()
+        a = first % self.capacity
+        n = self._end - first
+        if a + n <= self.capacity:
+            return self.values[a:a + n].sum(axis=0, dtype=np.float64)
+        return (self.values[a:].sum(axis=0, dtype=np.float64)
+                + self.values[:a + n - self.capacity].sum(axis=0, dtype=np.float64))
+
+    def window_sum(self, now: float, window: float) -> np.ndarray:
+        """
+        Sum per column of the samples of the last `window` seconds; nothing is dropped
+        Amortized O(1) while now does not go back; otherwise the window is rebuilt
+        """
+        cutoff = now - window
+        state = self._windows.get(window)
+        if state is None or cutoff < state.cutoff:
+            first = self._first_index(cutoff)
+            state = self._windows[window] = _Window(first, cutoff, self._slice_sum(first))
+        state.cutoff = cutoff
+        while state.start < self._end and self.times[state.start % self.capacity] < cutoff:
+            state.sum -= self.values[state.start % self.capacity]
+            state.start += 1
+        if state.start == self._end:
+            state.sum[:] = 0  # Reset float drift whenever the window empties
+        return state.sum.copy()
+
+    def rate(self, now: float, window: float) -> np.ndarray:
+        """Per-second rate of the samples over the last `window` seconds"""
+        if window <= 0:
+            return np.zeros(self.width)
+        return self.window_sum(now, window) / window
+
+    def to_arrays(self):
+        """Chronological (times, values) copies of the live samples"""
+        idx = np.arange(self._start, self._end) % self.capacity
+        return self.times[idx], self.values[idx]
+
+    def to_dict(self) -> dict:
+        """JSON-friendly export for metrics"""
+        times, values = self.to_arrays()
+        return {
+            "times": times.tolist(),
+            "values": values[:, 0].tolist() if self.width == 1 else values.tolist(),
+        }
@@ -0,0 +1,155 @@
+"""
+Seed Recognizer - Identifies the plant in each seed slot from one frame
+All slot crops are compared against all seed-packet templates in a single
+batched normalized cross-correlation (one matrix product)
+"""
+
+import os
+import cv2
+import numpy as np
+from config import *
+
+
+def _features(crops) -> np.ndarray:
+    """
+    Stack BGR crops into zero-mean, unit-norm feature rows of shape (N, D)
+    Normalizing removes uniform brightness changes (e.g. recharge darkening)
+    """
+    w, h = SEED_FEATURE_SIZE
+    rows = np.empty((len(crops), w * h * 3), dtype=np.float32)
+    for i, crop in enumerate(crops):
+        rows[i] = cv2.resize(crop, (w, h), interpolation=cv2.INTER_AREA).ravel()
+    rows -= rows.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    rows /= np.maximum(norms, 1e-6)
+    return rows
+
+
+class SeedRecognizer:
+    """Распознавание растений в слотах по шаблонам семян"""
+
+    def __init__(self, template_dir=SEED_TEMPLATE_DIR):
+        self.template_dir = template_dir
+        self.names = []  # Template plant names, row order of self.templates
+        self.templates = None  # (M, D) normalized template features
+
+        # Cache: result is reused until the seed bar looks different
+        self._signature = None
+        self._result = None
+        self.recognitions = 0
+
+        self.load_templates()
+
+    @property
+    def available(self) -> bool:
+        return self.templates is not None
+
+    def load_templates(self):
+        """Load <plant name>.png seed-packet templates"""
+        self.names = []
+        crops = []
+        if os.path.isdir(self.template_dir):
+            for filename in sorted(os.listdir(self.template_dir)):
+                name, ext = os.path.splitext(filename)
+                if ext.lower() != ".png" or name not in PLANT_COSTS:
+                    continue
+                image = cv2.imread(os.path.join(self.template_dir, filename), cv2.IMREAD_COLOR)
+                if image is not None:
+                    self.names.append(name)
+                    crops.append(image)
+        self.templates = _features(crops) if crops else None
+        self._signature = None
+        self._result = None
+
+    def save_templates(self, frame, plants: dict) -> int:
+        """
+        Save the current slot crops as templates for the given plant config
+        plants: {plant_name: {"slot": slot_num, "coord": (x,y)}}
+        """
+        os.makedirs(self.template_dir, exist_ok=True)
+        saved = 0
+        for name, data in plants.items():
+            crop = self._crop(frame, SEED_SLOTS.get(data["slot"], data["coord"]))
+            if crop is not None:
+                cv2.imwrite(os.path.join(self.template_dir, f"{name}.png"), crop)
+                saved += 1
+        self.load_templates()
+        print(f"💾 Сохранено шаблонов семян: {saved} в {self.template_dir}")
+        return saved
+
+    def _crop(self, frame, coord):
+        """View of the seed packet centered on coord, None if out of frame"""
+        w, h = SEED_PACKET_SIZE
+        x, y = coord
+        x0, y0 = x - w // 2, y - h // 2
+        if x0 < 0 or y0 < 0 or y0 + h > frame.shape[0] or x0 + w > frame.shape[1]:
+            return None
+        return frame[y0:y0 + h, x0:x0 + w]
+
+    def _slot_crops(self, frame):
+        slots, crops = [], []
+        for slot, coord in sorted(SEED_SLOTS.items()):
+            crop = self._crop(frame, coord)
+            if crop is not None:
+                slots.append(slot)
+                crops.append(crop)
+        return slots, crops
+
+    def seed_bar_changed(self, frame) -> bool:
+        """Cheap check whether the seed bar differs from the cached recognition"""
+        if self._signature is None:
+            return True
+        _, crops = self._slot_crops(frame)
+        if len(crops) != len(self._signature):
+            return True
+        signature = self._signature_of(crops)
+        similarity = np.einsum("ij,ij->i", signature, self._signature)
+        # Empty (flat) slots normalize to zero vectors; flat in both means unchanged
+        both_flat = ~signature.any(axis=1) & ~self._signature.any(axis=1)
+        similarity[both_flat] = 1.0
+        return bool(similarity.min() < SEED_BAR_CHANGE_THRESHOLD)
+
+    def _signature_of(self, crops) -> np.ndarray:
+        """Tiny per-slot normalized grayscale thumbnails"""
+        thumbs = np.stack([
+            cv2.resize(cv2.cvtColor(c, cv2.COLOR_BGR2GRAY), (4, 6), interpolation=cv2.INTER_AREA)
+            for c in crops
+        ]).reshape(len(crops), -1).astype(np.float32)
+        thumbs -= thumbs.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(thumbs, axis=1, keepdims=True)
+        thumbs /= np.maximum(norms, 1e-6)
+        thumbs[norms[:, 0] < 1.0] = 0.0
+        return thumbs
+
+    def recognize(self, frame):
+        """
+        Identify plants in every slot. Cached until the seed bar changes
+        Returns {plant_name: {"slot": slot_num, "coord": (x,y)}} or None
+        """
+        if not self.available:
+            return None
+        if self._result is not None and not self.seed_bar_changed(frame):
+            return self._result
+
+        slots, crops = self._slot_crops(frame)
+        if not crops:
+            return None
+
+        # (N slots, M templates) correlation in one product
+        scores = _features(crops) @ self.templates.T
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(slots)), best]
+
+        # Each plant may occupy only one slot: keep the strongest match
+        plants = {}
+        for i in np.argsort(-best_scores):
+            if best_scores[i] < SEED_MATCH_MIN_SCORE:
+                continue
+            name = self.names[best[i]]
+            if name not in plants:
+                plants[name] = {"slot": slots[i], "coord": tuple(SEED_SLOTS[slots[i]])}
+
+        self._signature = self._signature_of(crops)
+        self._result = plants
+        self.recognitions += 1
+        return plants
@@ -5,14 +5,42 @@ More aggressive zombie detection and response
 """
 
 import time
+import numpy as np
 from config import *
+from ring_buffer import RingBuffer
+from formations import Formation, formation_key, middle_out_rows
+from event_log import flush_logging, get_logger
 from typing import List, Tuple, Set
 
+log = get_logger("strategy")
+
+
+def zombie_threat(col: int, zombie_type: str) -> float:
+    """HP-weighted threat: damage per second needed to stop the zombie before the house"""
+    stats = ZOMBIE_TYPES.get(zombie_type) or ZOMBIE_TYPES[ZOMBIE_DEFAULT_TYPE]
+    return stats["hp"] * stats["speed"] / (max(0, col) + 1)
+
+
 class PlantingStrategy:
-    def __init__(self, plant_manager):
+    def __init__(self, plant_manager, forecaster=None):
         self.plant_manager = plant_manager
+        self.forecaster = forecaster  # SunForecaster or None (spend greedily)
+        self.saving_for = None  # Plant we are currently saving sun for
+        self.saved_up_for = None  # Plant we finished saving for, bought first
         self.placed_plants = set()  # Set of (col, row) tuples
+        self.plant_types = {}  # {(col, row): plant_name}
+        self.lane_dps = np.zeros(GRID_ROWS)  # Shooter damage per second per row
+        self._formation = None  # Compiled FORMATION, rebuilt when its settings change
+        self._formation_key = None
+        self.damaged_walls = set()  # Wall-nuts flagged as damaged by the lawn monitor
         self.last_plant_time = {}  # Track when each cell was last planted
+        self.seed_ready_at = {}  # {plant_name: time the seed packet is recharged}
+        
+        # Cells and seeds taken by actions already chosen in the current batch
+        self._reserved_cells = set()
+        self._reserved_seeds = set()
+        self._answered_rows = set()  # Emergency rows already handled by the batch
+        self._reserved_dps = np.zeros(GRID_ROWS)  # DPS of shooters planned by the batch
         
         # Strategy phases
         self.production_phase = True  # Start with sun production
@@ -23,6 +51,8 @@ class PlantingStrategy:
         # Zombie tracking
         self.active_zombie_rows = set()  # Rows where zombies have appeared
         self.zombie_history = {}  # {row: last_seen_time}
+        self.zombie_counts = RingBuffer(HISTORY_CAPACITY, width=GRID_ROWS)  # Zombies per row per tick
+        self.row_threat = np.zeros(GRID_ROWS)  # HP-weighted threat per row this tick
         self.row_defense_started = set()  # Rows where we started defense
         
         # All rows should be defended by default
@@ -31,56 +61,282 @@ class PlantingStrategy:
     def reset(self):
         """Reset strategy state for new level"""
         self.placed_plants.clear()
+        self.plant_types.clear()
+        self.formation.load(self.placed_plants)
+        self.lane_dps[:] = 0
+        self.damaged_walls.clear()
         self.last_plant_time.clear()
+        self.start_seed_cooldowns()
         self.production_phase = True
         self.sunflowers_needed = 3
         self.sunflowers_planted = 0
         self.defense_started = False
         self.active_zombie_rows.clear()
         self.zombie_history.clear()
+        self.zombie_counts.clear()
+        self.row_threat[:] = 0
         self.row_defense_started.clear()
         self.rows_to_defend = set(range(GRID_ROWS))
-        print("🔄 Стратегия сброшена")
+        self.saving_for = None
+        self.saved_up_for = None
+        log.info("🔄 Стратегия сброшена")
+    
+    def start_seed_cooldowns(self):
+        """Level start: seeds with an initial cooldown are not ready yet"""
+        now = time.time()
+        self.seed_ready_at = {
+            name: now + seconds
+            for name, seconds in self.plant_manager.initial_cooldowns.items() if seconds > 0
+        }
+    
+    def is_seed_ready(self, plant_name: str) -> bool:
+        """Plant is in the seed bar, predicted recharged and not used by this batch"""
+        return (self.plant_manager.has_plant(plant_name)
+                and plant_name not in self._reserved_seeds
+                and time.time() >= self.seed_ready_at.get(plant_name, 0.0))
     
     def is_cell_empty(self, col: int, row: int) -> bool:
         """Check if a grid cell is empty"""
-        return (col, row) not in self.placed_plants
+        return (col, row) not in self.placed_plants and (col, row) not in self._reserved_cells
     
-    def mark_planted(self, col: int, row: int):
+    def mark_planted(self, col: int, row: int, plant_name: str = None):
         """Mark a cell as planted"""
+        now = time.time()
         self.placed_plants.add((col, row))
-        self.last_plant_time[(col, row)] = time.time()
+        self.formation.occupy(col, row)
+        self.last_plant_time[(col, row)] = now
+        if plant_name:
+            self._update_lane(col, row, -1)  # Plant it replaces, if any
+            self.plant_types[(col, row)] = plant_name
+            self._update_lane(col, row, +1)
+            self.seed_ready_at[plant_name] = now + self.plant_manager.get_cooldown(plant_name)
+            if plant_name == self.saved_up_for:
+                self.saved_up_for = None  # Bought, by whichever phase planted it
+            if plant_name == "sunflower":
+                self._sunflower_planted()
+    
+    def _sunflower_planted(self):
+        """Count an executed sunflower; the first one past the initial three starts the economy phase"""
+        self.sunflowers_planted += 1
+        if self.sunflowers_planted > self.sunflowers_needed == 3:
+            log.info("💰 Хорошая экономика! Добавляем ещё 2 подсолнуха...", extra={"event": "economy"})
+            self.sunflowers_needed = 5
+            self.production_phase = True
     
     def remove_plant(self, col: int, row: int):
         """Remove plant marker (e.g., after it's eaten or explodes)"""
         if (col, row) in self.placed_plants:
             self.placed_plants.remove((col, row))
+            self.formation.free(col, row)
+        self._update_lane(col, row, -1)
+        self.plant_types.pop((col, row), None)
+        self.damaged_walls.discard((col, row))
+    
+    def restore_plants(self, plants: dict):
+        """Replace the believed lawn with {(col, row): plant_name} (None = unknown plant)"""
+        self.placed_plants = set(plants)
+        self.plant_types = {cell: name for cell, name in plants.items() if name}
+        self.formation.load(self.placed_plants)
+        self.lane_dps[:] = 0
+        for col, row in plants:
+            self._update_lane(col, row, +1)
+    
+    def _update_lane(self, col: int, row: int, sign: int):
+        """Add (+1) or remove (-1) the DPS of the plant at (col, row) from its row"""
+        dps = PLANT_DPS.get(self.plant_types.get((col, row)), 0.0)
+        if dps:
+            self.lane_dps[row] += sign * dps
+    
+    @property
+    def formation(self) -> Formation:
+        """Compiled formation; recompiled (with current occupancy) after a settings change"""
+        key = formation_key()
+        if key != self._formation_key:
+            self._formation = Formation()
+            self._formation.load(self.placed_plants)
+            self._formation_key = key
+        return self._formation
+    
+    def _formation_slot(self, plant_name: str, row: int = None) -> tuple:
+        """Next free formation slot for a plant, skipping cells this batch already took"""
+        return self.formation.next_slot(plant_name, row, self._reserved_cells)
+    
+    def lane_deficit(self) -> np.ndarray:
+        """Row threat (at least LANE_BASE_THREAT) minus shooter DPS, batch plans included"""
+        return np.maximum(self.row_threat, LANE_BASE_THREAT) - self.lane_dps - self._reserved_dps
+    
+    def _lane_slot(self, rows, shooters, min_deficit=None, fallback=False) -> tuple:
+        """
+        (plant, col, row) for the next shooter: the row with the largest DPS
+        deficit among rows (ties keep the given order) where one of shooters
+        (in order) still has a free formation slot
+        min_deficit: skip rows whose deficit is not above it
+        fallback: a row without formation slots (e.g. outside PEASHOOTER_ALLOWED_ROWS)
+        takes the first shooter in any free offense cell instead of being skipped
+        """
+        if not shooters:
+            return None
+        deficit = self.lane_deficit()
+        for row in sorted(rows, key=lambda r: -deficit[r]):
+            if min_deficit is not None and deficit[row] <= min_deficit:
+                break
+            for plant_name in shooters:
+                slot = self._formation_slot(plant_name, row)
+                if slot is not None:
+                    return plant_name, slot[0], row
+            if fallback:
+                for col in range(OFFENSE_START_COLUMN, OFFENSE_END_COLUMN + 1):
+                    if self.is_cell_empty(col, row):
+                        log.info("🎯 Ряд %d вне расстановки, %s в свободную клетку (%d,%d)",
+                                 row, shooters[0], col, row, extra={"key": ("lane_fallback", row)})
+                        return shooters[0], col, row
+            log.debug("⏭️ Ряд %d пропущен: нет места для %s", row, ", ".join(shooters),
+                      extra={"key": ("lane_skip", row)})
+        return None
+    
+    def rollback_plant(self, col: int, row: int, plant_name: str):
+        """Undo mark_planted for a planting the game did not accept"""
+        self.remove_plant(col, row)
+        self.seed_ready_at.pop(plant_name, None)
+        if plant_name == "sunflower" and self.sunflowers_planted > 0:
+            self.sunflowers_planted -= 1
     
-    def update_zombie_tracking(self, zombies: List[Tuple[int, int]]):
+    def snapshot(self) -> dict:
+        """Level state as plain values for a checkpoint (per-row zombie counts as arrays)"""
+        zombie_times, zombie_counts = self.zombie_counts.to_arrays()
+        return {
+            "plants": [[col, row, self.plant_types.get((col, row))] for col, row in self.placed_plants],
+            "last_plant_time": [[col, row, t] for (col, row), t in self.last_plant_time.items()],
+            "damaged_walls": [list(cell) for cell in self.damaged_walls],
+            "seed_ready_at": dict(self.seed_ready_at),
+            "production_phase": self.production_phase,
+            "sunflowers_needed": self.sunflowers_needed,
+            "sunflowers_planted": self.sunflowers_planted,
+            "defense_started": self.defense_started,
+            "active_zombie_rows": sorted(self.active_zombie_rows),
+            "zombie_history": [[row, t] for row, t in self.zombie_history.items()],
+            "zombie_times": zombie_times,
+            "zombie_counts": zombie_counts,
+            "row_defense_started": sorted(self.row_defense_started),
+            "saving_for": self.saving_for,
+            "saved_up_for": self.saved_up_for,
+        }
+    
+    def restore(self, state: dict):
+        """Inverse of snapshot(); cooldowns and sightings are wall-clock times and stay valid"""
+        self.restore_plants({(col, row): name for col, row, name in state["plants"]})
+        self.last_plant_time = {(col, row): t for col, row, t in state["last_plant_time"]}
+        self.damaged_walls = {tuple(cell) for cell in state["damaged_walls"]}
+        self.seed_ready_at = dict(state["seed_ready_at"])
+        self.production_phase = state["production_phase"]
+        self.sunflowers_needed = state["sunflowers_needed"]
+        self.sunflowers_planted = state["sunflowers_planted"]
+        self.defense_started = state["defense_started"]
+        self.active_zombie_rows = set(state["active_zombie_rows"])
+        self.zombie_history = {row: t for row, t in state["zombie_history"]}
+        self.zombie_counts.clear()
+        for t, counts in zip(state["zombie_times"], state["zombie_counts"]):
+            self.zombie_counts.append(t, counts)
+        self.row_defense_started = set(state["row_defense_started"])
+        self.saving_for = state["saving_for"]
+        self.saved_up_for = state["saved_up_for"]
+    
+    def reconcile_lawn(self, update):
         """
-        Update which rows have zombies
-        zombies: list of (col, row) tuples
+        Apply what the lawn monitor actually sees
+        A plant is only considered eaten in a row where zombies were seen recently
+        """
+        for col, row in update.eaten:
+            if (col, row) in self.placed_plants and row in self.active_zombie_rows:
+                name = self.plant_types.get((col, row), "растение")
+                log.info("💀 %s в (%d,%d) съеден", name, col, row,
+                         extra={"event": "eaten", "fields": {"plant": name, "col": col, "row": row}})
+                self.remove_plant(col, row)
+        
+        for col, row in update.damaged:
+            if (col, row) in self.placed_plants:
+                self.damaged_walls.add((col, row))
+                log.info("🩹 Орех в (%d,%d) повреждён, нужна замена", col, row,
+                         extra={"event": "damaged", "fields": {"col": col, "row": row}})
+    
+    @staticmethod
+    def _typed(zombies) -> List[Tuple[int, int, str]]:
+        """(col, row, zombie_type) triples; plain (col, row) cells are ZOMBIE_DEFAULT_TYPE"""
+        return [z if len(z) > 2 else (z[0], z[1], ZOMBIE_DEFAULT_TYPE) for z in zombies]
+    
+    def update_zombie_tracking(self, zombies: List[Tuple[int, int, str]]):
+        """
+        Update which rows have zombies and how threatened each row is
+        zombies: list of (col, row, zombie_type) tuples
         """
         current_time = time.time()
         
-        # Update active rows
-        for col, row in zombies:
+        counts = np.zeros(GRID_ROWS)
+        threat = np.zeros(GRID_ROWS)
+        for col, row, zombie_type in zombies:
             if 0 <= row < GRID_ROWS:
-                self.active_zombie_rows.add(row)
+                counts[row] += 1
+                threat[row] += zombie_threat(col, zombie_type)
                 self.zombie_history[row] = current_time
+        self.row_threat = threat
         
-        # Remove rows where zombies haven't been seen for ZOMBIE_MEMORY_TIME
-        rows_to_remove = []
-        for row, last_seen in self.zombie_history.items():
-            if current_time - last_seen > ZOMBIE_MEMORY_TIME:
-                rows_to_remove.append(row)
+        # Rolling per-row totals; samples older than ZOMBIE_MEMORY_TIME expire
+        self.zombie_counts.append(current_time, counts)
+        self.zombie_counts.expire(current_time - ZOMBIE_MEMORY_TIME)
+        seen = self.zombie_counts.sum()
         
-        for row in rows_to_remove:
-            if row in self.active_zombie_rows:
+        for row in range(GRID_ROWS):
+            if seen[row] > 0:
+                self.active_zombie_rows.add(row)
+            else:
                 self.active_zombie_rows.discard(row)
-            del self.zombie_history[row]
+                self.zombie_history.pop(row, None)
     
-    def get_next_action(self, zombies: List[Tuple[int, int]], sun_count: int) -> dict:
+    def get_next_action(self, zombies: list, sun_count: int) -> dict:
+        """Single best action (first of the ranked batch) or None"""
+        actions = self.get_next_actions(zombies, sun_count, max_actions=1)
+        return actions[0] if actions else None
+    
+    def get_next_actions(self, zombies: list, sun_count: int,
+                         max_actions: int = MAX_ACTIONS_PER_TICK) -> list:
+        """
+        Ranked batch of non-conflicting planting actions for this tick
+        zombies: (col, row, zombie_type) or plain (col, row) cells
+        Each chosen action reserves its cell and seed packet and spends its
+        cost from the sun budget before the next one is planned, so the batch
+        can be executed back-to-back
+        """
+        zombies = self._typed(zombies)
+        
+        # Update zombie tracking
+        self.update_zombie_tracking(zombies)
+        
+        # Zombie density and area-attack kill values for this tick
+        density = self._build_density(zombies)
+        
+        # Decided once per tick on the real sun count, not per planned action
+        saving = self._check_saving(density, sun_count)
+        
+        actions = []
+        try:
+            while len(actions) < max_actions:
+                action = self._plan_action(zombies, sun_count, density, saving)
+                if action is None:
+                    break
+                actions.append(action)
+                sun_count -= self.plant_manager.get_cost(action["plant"])
+                self._reserved_cells.add((action["col"], action["row"]))
+                self._reserved_seeds.add(action["plant"])
+                self._reserved_dps[action["row"]] += PLANT_DPS.get(action["plant"], 0.0)
+        finally:
+            self._reserved_cells.clear()
+            self._reserved_seeds.clear()
+            self._answered_rows.clear()
+            self._reserved_dps[:] = 0
+        return actions
+    
+    def _plan_action(self, zombies: List[Tuple[int, int, str]], sun_count: int, density: np.ndarray,
+                     saving: bool = False) -> dict:
         """
         Determine next planting action based on game state
         
@@ -90,171 +346,348 @@ class PlantingStrategy:
         3. Если появляются зомби - приоритет рядам с зомби
         4. Аварийная защита при близких зомби
         
+        saving: hold sun for a better plant (_check_saving) instead of buying shooters
+        Planning has no side effects on counters: mark_planted() updates them
+        once an action is executed
+        
         Returns:
             dict with "action", "plant", "col", "row" or None if no action needed
         """
         
-        # Update zombie tracking
-        self.update_zombie_tracking(zombies)
-        
         # Phase 0: Emergency defense (zombies too close)
-        emergency = self._check_emergency(zombies, sun_count)
+        emergency = self._check_emergency(zombies, sun_count, density)
         if emergency:
             return emergency
         
+        # Phase 0.5: Area attack once enough zombies are bunched up
+        area_attack = self._plan_area_attack(density, sun_count)
+        if area_attack:
+            return area_attack
+        
         # Phase 1: Plant initial 3 sunflowers in column 0
         if self.production_phase and self.sunflowers_planted < self.sunflowers_needed:
             sun_prod = self._plan_initial_sunflowers(sun_count)
             if sun_prod:
                 return sun_prod
-            else:
-                # All initial sunflowers planted - START DEFENSE IMMEDIATELY
-                print("🌻 3 подсолнуха посажено! Начинаем защиту ВСЕХ рядов!")
-                self.production_phase = False
-                self.defense_started = True
+        if self.production_phase and self._sunflowers_done():
+            # All initial sunflowers planted - START DEFENSE IMMEDIATELY
+            log.info("🌻 Подсолнухов посажено: %d! Начинаем защиту ВСЕХ рядов!", self.sunflowers_planted,
+                     extra={"event": "defense_start"})
+            self.production_phase = False
+            self.defense_started = True
         
         # Phase 2: AGGRESSIVE DEFENSE - plant shooters in all rows
-        if self.defense_started and sun_count >= MIN_SUN_FOR_OFFENSE:
+        if self.defense_started and sun_count >= MIN_SUN_FOR_OFFENSE and not saving:
+            preferred = self.saved_up_for
+            
             # Priority 1: Rows with zombies
             if self.active_zombie_rows:
-                offensive = self._plan_targeted_offense(sun_count)
+                offensive = self._plan_targeted_offense(sun_count, preferred)
                 if offensive:
                     return offensive
             
             # Priority 2: All other rows (proactive defense)
-            proactive = self._plan_proactive_defense(sun_count)
+            proactive = self._plan_proactive_defense(sun_count, preferred)
             if proactive:
                 return proactive
         
         # Phase 3: If we have good economy (300+ sun), plant 2 more sunflowers
+        # (the phase switch happens in mark_planted once the sunflower is in)
         if sun_count >= ECONOMY_THRESHOLD and self.sunflowers_needed == 3 and self.sunflowers_planted >= 3:
-            print("💰 Хорошая экономика! Добавляем ещё 2 подсолнуха...")
-            self.sunflowers_needed = 5
-            self.production_phase = True
-            return self._plan_additional_sunflowers(sun_count)
+            additional = self._plan_additional_sunflowers(sun_count)
+            if additional:
+                return additional
         
         # Phase 4: Defensive reinforcement (walls)
         defensive = self._plan_defense(zombies, sun_count)
         if defensive:
             return defensive
         
+        # Phase 4.5: Potato mines in the formation's mine field
+        mine = self._plan_mines(zombies, sun_count)
+        if mine:
+            return mine
+        
+        # Phase 5: Back up damaged wall-nuts
+        replacement = self._plan_wall_replacement(sun_count)
+        if replacement:
+            return replacement
+        
         return None
     
-    def _check_emergency(self, zombies: List[Tuple[int, int]], sun_count: int) -> dict:
-        """Check for emergency situations requiring immediate action"""
+    def _sunflowers_done(self) -> bool:
+        """No more initial sunflowers will be planted (a recharging seed is not done)"""
+        if not self.plant_manager.has_plant("sunflower"):
+            return True
+        # Slots this batch reserved are still pending sunflowers, not a full column
+        return (self.sunflowers_planted >= self.sunflowers_needed
+                or self.formation.next_slot("sunflower") is None)
+    
+    def _build_density(self, zombies: List[Tuple[int, int, str]]) -> np.ndarray:
+        """
+        Zombie count per cell as a (GRID_ROWS, GRID_COLS) array
+        Zombies within CHERRY_BOMB_CLOSE_DISTANCE in front of a shooter count twice
+        """
+        density = np.zeros((GRID_ROWS, GRID_COLS), dtype=np.float32)
+        if not zombies:
+            return density
+        
+        cells = np.array([zombie[:2] for zombie in zombies], dtype=np.intp).reshape(-1, 2)
+        cols, rows = cells[:, 0], cells[:, 1]
+        np.add.at(density, (rows, cols), 1.0)
+        
+        # Front-most shooter per row (-1 if none)
+        front = np.full(GRID_ROWS, -1, dtype=np.intp)
+        for (col, row), name in self.plant_types.items():
+            if name in SHOOTER_PLANTS and col > front[row]:
+                front[row] = col
+        gap = cols - front[rows]
+        close = (front[rows] >= 0) & (gap >= 0) & (gap <= CHERRY_BOMB_CLOSE_DISTANCE)
+        np.add.at(density, (rows[close], cols[close]), 1.0)
+        return density
+    
+    @staticmethod
+    def _box_sum_3x3(density: np.ndarray) -> np.ndarray:
+        """3×3 convolution with a ones kernel: cherry bomb kill value per center cell"""
+        padded = np.pad(density, 1)
+        rows, cols = density.shape
+        total = np.zeros_like(density)
+        for dr in range(3):
+            for dc in range(3):
+                total += padded[dr:dr + rows, dc:dc + cols]
+        return total
+    
+    def _empty_mask(self) -> np.ndarray:
+        """Boolean (GRID_ROWS, GRID_COLS) array of cells we can plant into"""
+        mask = np.ones((GRID_ROWS, GRID_COLS), dtype=bool)
+        for col, row in self.placed_plants | self._reserved_cells:
+            mask[row, col] = False
+        return mask
+    
+    def _plan_area_attack(self, density: np.ndarray, sun_count: int, near=None) -> dict:
+        """
+        Cherry bomb / jalapeno placement with the highest kill value
+        Held back until the value reaches CHERRY_BOMB_3X3_THRESHOLD /
+        JALAPENO_ROW_THRESHOLD. near=(col, row) restricts the search to
+        placements that hit that zombie and ignores the thresholds (emergency)
+        """
+        has_cherry = self.is_seed_ready("cherry bomb") and sun_count >= self.plant_manager.get_cost("cherry bomb")
+        has_jalapeno = self.is_seed_ready("jalapeno") and sun_count >= self.plant_manager.get_cost("jalapeno")
+        if not (has_cherry or has_jalapeno) or not density.any():
+            return None
+        
+        empty = self._empty_mask()
+        candidates = []  # (kill value, plant, col, row)
+        
+        if has_cherry:
+            scores = np.where(empty, self._box_sum_3x3(density), -1.0)
+            threshold = CHERRY_BOMB_3X3_THRESHOLD
+            if near is not None:
+                # Only centers within one cell of the zombie we must hit
+                zc, zr = near
+                window = np.full_like(scores, -1.0)
+                r0, c0 = max(0, zr - 1), max(0, zc - 1)
+                window[r0:zr + 2, c0:zc + 2] = scores[r0:zr + 2, c0:zc + 2]
+                scores, threshold = window, 0
+            row, col = np.unravel_index(int(scores.argmax()), scores.shape)
+            if scores[row, col] > 0 and scores[row, col] >= threshold:
+                candidates.append((float(scores[row, col]), "cherry bomb", int(col), int(row)))
+        
+        if has_jalapeno:
+            row_values = density.sum(axis=1)
+            row_values[~empty.any(axis=1)] = -1.0
+            threshold = JALAPENO_ROW_THRESHOLD
+            if near is not None:
+                keep = row_values[near[1]]
+                row_values[:] = -1.0
+                row_values[near[1]] = keep
+                threshold = 0
+            row = int(row_values.argmax())
+            if row_values[row] > 0 and row_values[row] >= threshold:
+                # The whole row burns; put it on the busiest empty cell of the row
+                cells = np.where(empty[row], density[row], -1.0)
+                candidates.append((float(row_values[row]), "jalapeno", int(cells.argmax()), row))
+        
+        if not candidates:
+            return None
+        
+        # Ties go to the cherry bomb (cheaper, shorter recharge)
+        value, plant_name, col, row = max(candidates, key=lambda c: c[0])
+        emoji = "💣" if plant_name == "cherry bomb" else "🌶️"
+        label = "🚨 EMERGENCY" if near is not None else f"{emoji} Скопление"
+        return {
+            "action": "plant",
+            "plant": plant_name,
+            "col": col,
+            "row": row,
+            "reason": f"{label} - {plant_name} (ценность {value:.0f})"
+        }
+    
+    def count_plants(self, plant_name: str) -> int:
+        """Number of planted plants of a type"""
+        return sum(1 for name in self.plant_types.values() if name == plant_name)
+    
+    def _check_saving(self, density: np.ndarray, sun_count: int) -> bool:
+        """
+        Decide whether to hold sun for a better plant the forecaster says we
+        can afford within SAVE_HORIZON seconds. Never saves while a row with
+        zombies has no shooter at all
+        """
+        target = None
+        if self.forecaster is not None and self.defense_started:
+            defended_rows = {row for (col, row), name in self.plant_types.items() if name in SHOOTER_PLANTS}
+            if not self.active_zombie_rows - defended_rows:
+                # A forming cluster is worth a cherry bomb soon
+                cluster = self._box_sum_3x3(density).max() if density.any() else 0
+                if cluster >= CHERRY_BOMB_3X3_THRESHOLD - 1 and self.plant_manager.has_plant("cherry bomb"):
+                    target = "cherry bomb"
+                elif self.plant_manager.has_plant("repeater"):
+                    target = "repeater"
+                
+                if target is not None:
+                    cost = self.plant_manager.get_cost(target)
+                    if sun_count >= cost or not self.forecaster.can_afford_within(cost, SAVE_HORIZON):
+                        target = None
+        
+        if target != self.saving_for:
+            if target is not None:
+                eta = self.forecaster.time_to_afford(self.plant_manager.get_cost(target))
+                log.info("💰 Копим на %s (~%.0f с)", target, eta,
+                         extra={"event": "saving", "fields": {"plant": target, "eta": eta}})
+            elif sun_count >= self.plant_manager.get_cost(self.saving_for):
+                self.saved_up_for = self.saving_for
+            self.saving_for = target
+        return target is not None
+    
+    @staticmethod
+    def _preferred_first(shooters: list, preferred: str) -> list:
+        """Move the plant we saved up for to the front of a (name, cost) list"""
+        if preferred is None:
+            return shooters
+        return sorted(shooters, key=lambda shooter: shooter[0] != preferred)
+    
+    def _check_emergency(self, zombies: List[Tuple[int, int, str]], sun_count: int, density: np.ndarray = None) -> dict:
+        """
+        Check for emergency situations requiring immediate action
+        A row is in danger when the HP-weighted threat of its zombies up to
+        EMERGENCY_THREAT_COLUMN reaches EMERGENCY_THREAT: one bucket head
+        further out can be as urgent as a basic zombie at PANIC_COLUMN
+        """
         
-        # Find dangerous zombies (col <= PANIC_COLUMN)
-        dangerous = [(c, r) for c, r in zombies if c <= PANIC_COLUMN]
+        threat = np.zeros(GRID_ROWS)
+        nearest = {}  # {row: column of the closest zombie}
+        for c, r, zombie_type in zombies:
+            if c <= EMERGENCY_THREAT_COLUMN:
+                threat[r] += zombie_threat(c, zombie_type)
+                nearest[r] = min(c, nearest.get(r, c))
         
+        # Dangerous rows not yet handled by this batch, most threatened first
+        dangerous = sorted((r for r in nearest if threat[r] >= EMERGENCY_THREAT and r not in self._answered_rows),
+                           key=lambda r: -threat[r])
         if not dangerous:
             return None
         
-        print(f"⚠️ ОПАСНОСТЬ! Зомби в колонке {dangerous[0][0]}")
+        # Printed every tick while the danger lasts: rate-limited per row
+        row = dangerous[0]
+        log.warning("⚠️ ОПАСНОСТЬ! Ряд %d: угроза %.0f HP/с, зомби в колонке %d", row, threat[row], nearest[row],
+                    extra={"event": "emergency", "key": ("emergency", row),
+                           "fields": {"row": row, "threat": float(threat[row]), "col": nearest[row]}})
+        
+        if density is None:
+            density = self._build_density(zombies)
+        
+        # Try to use instant-kill plants against the closest zombie of each row
+        for r in dangerous:
+            action = self._emergency_action(nearest[r], r, sun_count, density)
+            if action:
+                self._answered_rows.add(r)
+                return action
         
-        # Try to use instant-kill plants
-        for c, r in dangerous:
-            # Cherry Bomb
-            if self.plant_manager.has_plant("cherry bomb") and sun_count >= 150:
+        return None
+    
+    def _emergency_action(self, c: int, r: int, sun_count: int, density: np.ndarray) -> dict:
+        """Instant-kill or blocking plant against the zombie at (c, r)"""
+        # Cherry Bomb / Jalapeno placed where they also hit the most other zombies
+        area_attack = self._plan_area_attack(density, sun_count, near=(c, r))
+        if area_attack:
+            return area_attack
+        
+        # Squash
+        if self.is_seed_ready("squash") and sun_count >= 50:
+            if self.is_cell_empty(max(0, c-1), r):
                 return {
                     "action": "plant",
-                    "plant": "cherry bomb",
-                    "col": c,
+                    "plant": "squash",
+                    "col": max(0, c-1),
                     "row": r,
-                    "reason": "🚨 EMERGENCY - Cherry Bomb"
+                    "reason": "🚨 EMERGENCY - Squash"
                 }
-            
-            # Jalapeno (clears entire row)
-            if self.plant_manager.has_plant("jalapeno") and sun_count >= 125:
+        
+        # Wall-nut as last resort
+        if self.is_seed_ready("wall-nut") and sun_count >= 50:
+            if self.is_cell_empty(max(0, c-1), r):
                 return {
                     "action": "plant",
-                    "plant": "jalapeno",
-                    "col": c,
+                    "plant": "wall-nut",
+                    "col": max(0, c-1),
                     "row": r,
-                    "reason": "🚨 EMERGENCY - Jalapeno"
+                    "reason": "🚨 EMERGENCY - Wall-nut"
                 }
-            
-            # Squash
-            if self.plant_manager.has_plant("squash") and sun_count >= 50:
-                if self.is_cell_empty(max(0, c-1), r):
-                    return {
-                        "action": "plant",
-                        "plant": "squash",
-                        "col": max(0, c-1),
-                        "row": r,
-                        "reason": "🚨 EMERGENCY - Squash"
-                    }
-            
-            # Wall-nut as last resort
-            if self.plant_manager.has_plant("wall-nut") and sun_count >= 50:
-                if self.is_cell_empty(max(0, c-1), r):
-                    return {
-                        "action": "plant",
-                        "plant": "wall-nut",
-                        "col": max(0, c-1),
-                        "row": r,
-                        "reason": "🚨 EMERGENCY - Wall-nut"
-                    }
         
         return None
     
     def _plan_initial_sunflowers(self, sun_count: int) -> dict:
         """
-        Plant first 3 sunflowers in column 0
-        Priority order: rows 2, 1, 3 (middle rows first)
+        Plant first 3 sunflowers in the formation's sunflower slots
+        Classic formation: column 0, rows 2, 1, 3 (middle rows first)
         """
         
-        if not self.plant_manager.has_plant("sunflower"):
+        if not self.is_seed_ready("sunflower"):
             return None
         
-        if sun_count < 50:
+        if sun_count < 50 or self.sunflowers_planted >= self.sunflowers_needed:
             return None
         
-        # Plant order: middle rows first for better coverage
-        priority_rows = [2, 1, 3, 0, 4]
-        
-        for row in priority_rows:
-            if self.sunflowers_planted >= self.sunflowers_needed:
-                break
-            
-            if self.is_cell_empty(0, row):
-                self.sunflowers_planted += 1
-                return {
-                    "action": "plant",
-                    "plant": "sunflower",
-                    "col": 0,
-                    "row": row,
-                    "reason": f"☀️ Подсолнух {self.sunflowers_planted}/{self.sunflowers_needed}"
-                }
+        slot = self._formation_slot("sunflower")
+        if slot is None:
+            return None
         
-        return None
+        col, row = slot
+        return {
+            "action": "plant",
+            "plant": "sunflower",
+            "col": col,
+            "row": row,
+            "reason": f"☀️ Подсолнух {self.sunflowers_planted + 1}/{self.sunflowers_needed}"
+        }
     
     def _plan_additional_sunflowers(self, sun_count: int) -> dict:
-        """Plant additional 2 sunflowers (rows 0 and 4)"""
+        """Plant additional 2 sunflowers (classic formation: rows 0 and 4)"""
         
-        if not self.plant_manager.has_plant("sunflower"):
+        if not self.is_seed_ready("sunflower"):
             return None
         
         if sun_count < 50:
             return None
         
-        # Plant in rows 0 and 4 (top and bottom)
-        for row in [0, 4]:
-            if self.is_cell_empty(0, row):
-                self.sunflowers_planted += 1
-                return {
-                    "action": "plant",
-                    "plant": "sunflower",
-                    "col": 0,
-                    "row": row,
-                    "reason": f"☀️ Доп. подсолнух {self.sunflowers_planted}/5"
-                }
+        slot = self._formation_slot("sunflower")
+        if slot is None:
+            return None
         
-        return None
+        col, row = slot
+        return {
+            "action": "plant",
+            "plant": "sunflower",
+            "col": col,
+            "row": row,
+            "reason": f"☀️ Доп. подсолнух {self.sunflowers_planted + 1}/5"
+        }
     
-    def _plan_targeted_offense(self, sun_count: int) -> dict:
+    def _plan_targeted_offense(self, sun_count: int, preferred: str = None) -> dict:
         """
         Plant offensive plants in rows where zombies have been detected
         HIGHER PRIORITY than proactive defense
+        Only rows whose threat exceeds their shooters' DPS, largest deficit first
         """
         
         if not self.active_zombie_rows:
@@ -267,43 +700,41 @@ class PlantingStrategy:
             ("peashooter", 100),
         ]
         
-        # Sort active rows by priority (rows with recent zombies first)
+        # Sort active rows by priority (HP-weighted threat, then most recent zombies)
         sorted_rows = sorted(
             self.active_zombie_rows,
-            key=lambda r: self.zombie_history.get(r, 0),
+            key=lambda r: (self.row_threat[r], self.zombie_history.get(r, 0)),
             reverse=True
         )
         
-        for plant_name, cost in shooters:
-            if not self.plant_manager.has_plant(plant_name):
-                continue
-            
-            if sun_count < cost:
-                continue
-            
-            # Plant from column 1 to OFFENSE_END_COLUMN in active zombie rows
-            for row in sorted_rows:
-                # Mark that we started defense in this row
-                if row not in self.row_defense_started:
-                    self.row_defense_started.add(row)
-                    print(f"🎯 Зомби обнаружены в ряду {row}! СРОЧНАЯ защита...")
-                
-                for col in range(OFFENSE_START_COLUMN, OFFENSE_END_COLUMN + 1):
-                    if self.is_cell_empty(col, row):
-                        return {
-                            "action": "plant",
-                            "plant": plant_name,
-                            "col": col,
-                            "row": row,
-                            "reason": f"🎯 ЗОМБИ в ряду {row}!"
-                        }
+        shooters = self._preferred_first(shooters, preferred)
         
-        return None
+        # Mark that we started defense in these rows
+        for row in sorted_rows:
+            if row not in self.row_defense_started:
+                self.row_defense_started.add(row)
+                log.info("🎯 Зомби обнаружены в ряду %d! СРОЧНАЯ защита...", row,
+                         extra={"event": "row_defense", "fields": {"row": row}})
+        
+        available = [name for name, cost in shooters if self.is_seed_ready(name) and sun_count >= cost]
+        slot = self._lane_slot(sorted_rows, available, min_deficit=0.0, fallback=True)
+        if slot is None:
+            return None
+        
+        plant_name, col, row = slot
+        return {
+            "action": "plant",
+            "plant": plant_name,
+            "col": col,
+            "row": row,
+            "reason": f"🎯 ЗОМБИ в ряду {row}! (не хватает {self.lane_deficit()[row]:.0f} HP/с)"
+        }
     
-    def _plan_proactive_defense(self, sun_count: int) -> dict:
+    def _plan_proactive_defense(self, sun_count: int, preferred: str = None) -> dict:
         """
         НОВАЯ ФУНКЦИЯ: Проактивная защита всех рядов
         Сажаем горохострелы во всех рядах, даже если зомби ещё не видели
+        Next shooter goes to the row with the largest DPS deficit
         """
         
         # Try different shooters in order of preference
@@ -313,66 +744,60 @@ class PlantingStrategy:
             ("repeater", 200),
         ]
         
-        for plant_name, cost in shooters:
-            if not self.plant_manager.has_plant(plant_name):
-                continue
-            
-            if sun_count < cost:
-                continue
-            
-            # Plant in all rows, prioritizing middle rows
-            priority_rows = [2, 1, 3, 0, 4]
-            
-            for row in priority_rows:
-                if row not in self.rows_to_defend:
-                    continue
-                
-                # Plant from column 1 to OFFENSE_END_COLUMN
-                for col in range(OFFENSE_START_COLUMN, OFFENSE_END_COLUMN + 1):
-                    if self.is_cell_empty(col, row):
-                        return {
-                            "action": "plant",
-                            "plant": plant_name,
-                            "col": col,
-                            "row": row,
-                            "reason": f"🛡️ Защита ряда {row}"
-                        }
+        shooters = self._preferred_first(shooters, preferred)
         
-        return None
+        # All rows, middle rows first on equal deficit
+        priority_rows = [row for row in middle_out_rows() if row in self.rows_to_defend]
+        available = [name for name, cost in shooters if self.is_seed_ready(name) and sun_count >= cost]
+        slot = self._lane_slot(priority_rows, available)
+        if slot is None:
+            return None
+        
+        plant_name, col, row = slot
+        return {
+            "action": "plant",
+            "plant": plant_name,
+            "col": col,
+            "row": row,
+            "reason": f"🛡️ Защита ряда {row}"
+        }
     
-    def _plan_defense(self, zombies: List[Tuple[int, int]], sun_count: int) -> dict:
-        """Plan defensive plant placement for rows with close zombies"""
+    def _plan_defense(self, zombies: List[Tuple[int, int, str]], sun_count: int) -> dict:
+        """
+        Plan defensive plant placement for rows with zombies
+        The formation's wall line is built as soon as a zombie walks toward it;
+        zombies past it (col <= DEFENSE_TRIGGER_COLUMN) get a wall right in front
+        """
         
-        # Find rows with zombies approaching (col <= DEFENSE_TRIGGER_COLUMN)
-        approaching = {}  # {row: closest_col}
-        for c, r in zombies:
-            if c <= DEFENSE_TRIGGER_COLUMN and r < GRID_ROWS:
-                if r not in approaching or c < approaching[r]:
-                    approaching[r] = c
+        nearest = {}  # {row: closest_col}
+        for c, r, _ in zombies:
+            if r < GRID_ROWS:
+                nearest[r] = min(c, nearest.get(r, c))
         
-        if not approaching:
+        if not nearest:
             return None
         
-        # Place defensive plants in front of approaching zombies
-        for row, zombie_col in approaching.items():
-            defense_col = max(0, zombie_col - 1)
+        # Place defensive plants in front of approaching zombies, most threatened rows first
+        for row in sorted(nearest, key=lambda r: -self.row_threat[r]):
+            zombie_col = nearest[row]
             
             # Try Tall-nut first, then Wall-nut
-            if self.plant_manager.has_plant("tall-nut") and sun_count >= 125:
-                if self.is_cell_empty(defense_col, row):
-                    return {
-                        "action": "plant",
-                        "plant": "tall-nut",
-                        "col": defense_col,
-                        "row": row,
-                        "reason": f"🛡️ Барьер в ряду {row}"
-                    }
-            
-            if self.plant_manager.has_plant("wall-nut") and sun_count >= 50:
+            for plant_name, cost in (("tall-nut", 125), ("wall-nut", 50)):
+                if not self.is_seed_ready(plant_name) or sun_count < cost:
+                    continue
+                
+                slot = self._formation_slot(plant_name, row)
+                if slot is not None and slot[0] < zombie_col:
+                    defense_col = slot[0]
+                elif zombie_col <= DEFENSE_TRIGGER_COLUMN:
+                    defense_col = max(0, zombie_col - 1)
+                else:
+                    continue
+                
                 if self.is_cell_empty(defense_col, row):
                     return {
                         "action": "plant",
-                        "plant": "wall-nut",
+                        "plant": plant_name,
                         "col": defense_col,
                         "row": row,
                         "reason": f"🛡️ Барьер в ряду {row}"
@@ -380,8 +805,55 @@ class PlantingStrategy:
         
         return None
     
+    def _plan_mines(self, zombies: List[Tuple[int, int, str]], sun_count: int) -> dict:
+        """Potato mine in a formation mine slot at least MINE_LEAD_CELLS ahead of a zombie"""
+        
+        if not self.is_seed_ready("potato mine") or sun_count < self.plant_manager.get_cost("potato mine"):
+            return None
+        
+        nearest = {}  # {row: closest_col}
+        for c, r, _ in zombies:
+            nearest[r] = min(c, nearest.get(r, c))
+        
+        for row in sorted(nearest, key=lambda r: -self.row_threat[r]):
+            slot = self._formation_slot("potato mine", row)
+            if slot is not None and nearest[row] - slot[0] >= MINE_LEAD_CELLS:
+                return {
+                    "action": "plant",
+                    "plant": "potato mine",
+                    "col": slot[0],
+                    "row": row,
+                    "reason": f"💥 Мина в ряду {row}"
+                }
+        
+        return None
+    
+    def _plan_wall_replacement(self, sun_count: int) -> dict:
+        """Plant a fresh wall-nut right behind a damaged one (zombies walk toward column 0)"""
+        
+        if not self.damaged_walls:
+            return None
+        
+        if not self.is_seed_ready("wall-nut") or sun_count < 50:
+            return None
+        
+        # Most advanced damaged wall first: it is the one being eaten
+        for col, row in sorted(self.damaged_walls, reverse=True):
+            behind = col - 1
+            if behind >= 0 and self.is_cell_empty(behind, row):
+                return {
+                    "action": "plant",
+                    "plant": "wall-nut",
+                    "col": behind,
+                    "row": row,
+                    "reason": f"🩹 Замена ореха в ряду {row}"
+                }
+        
+        return None
+    
     def print_grid_state(self):
         """Print visual representation of planted grid with zombie rows highlighted"""
+        flush_logging()
         print("\n🗺️ Текущая карта растений:")
         print("   ", end="")
         for col in range(GRID_COLS):
@@ -405,8 +877,11 @@ class PlantingStrategy:
         print()
         if self.active_zombie_rows:
             print(f"🧟 Активные ряды с зомби: {sorted(self.active_zombie_rows)}")
+            threats = ", ".join(f"{row}: {self.row_threat[row]:.0f}" for row in sorted(self.active_zombie_rows))
+            print(f"⚔️ Угроза по рядам (HP/с): {threats}")
         else:
             print("✅ Зомби не обнаружены")
         print(f"🌻 Подсолнухов: {self.sunflowers_planted}/{self.sunflowers_needed}")
         print(f"🛡️ Защита начата: {'Да' if self.defense_started else 'Нет'}")
+        print(f"📐 Расстановка: {self.formation.name}")
         print()
@@ -0,0 +1,72 @@
+"""
+Sun Forecaster - Models sun income to drive spend/save decisions
+Income is modelled from planted sunflowers and sky sun, then blended with the
+observed collection rate from SunTracker's income history. All queries are O(1)
+"""
+
+import math
+import time
+from config import *
+
+
+class SunForecaster:
+    """Прогноз дохода солнца: когда хватит на растение и сколько будет к моменту T"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget observations (new level)"""
+        self.sun_count = 0
+        self.sunflowers = 0
+        self.observed_rate = 0.0  # Sun/second actually collected (rolling window)
+        self.started_at = None
+        self._last_time = None
+
+    @property
+    def modeled_rate(self) -> float:
+        """Sun/second expected from sunflowers and sky drops"""
+        rate = self.sunflowers * SUN_VALUE / SUNFLOWER_SUN_INTERVAL
+        if SKY_SUN_INTERVAL > 0:
+            rate += SUN_VALUE / SKY_SUN_INTERVAL
+        return rate
+
+    @property
+    def income_rate(self) -> float:
+        """
+        Blended income in sun/second
+        The model dominates at level start; observations take over as they accumulate
+        """
+        if self.started_at is None:
+            return self.modeled_rate
+        elapsed = self._last_time - self.started_at
+        weight = min(1.0, elapsed / FORECAST_WARMUP) if FORECAST_WARMUP > 0 else 1.0
+        return weight * self.observed_rate + (1.0 - weight) * self.modeled_rate
+
+    def update(self, sun_count: int, observed_rate: float, sunflowers: int, now: float = None):
+        """
+        Feed the latest sun state (once per tick)
+        observed_rate: collected sun/second over FORECAST_RATE_WINDOW
+        """
+        now = time.time() if now is None else now
+        if self.started_at is None:
+            self.started_at = now
+        self._last_time = now
+        self.sun_count = sun_count
+        self.sunflowers = sunflowers
+        self.observed_rate = observed_rate
+
+    def time_to_afford(self, cost: int) -> float:
+        """Seconds until `cost` sun is available (0 if already, inf if never)"""
+        missing = cost - self.sun_count
+        if missing <= 0:
+            return 0.0
+        rate = self.income_rate
+        return missing / rate if rate > 0 else math.inf
+
+    def affordable_by(self, seconds: float) -> float:
+        """Sun expected to be available `seconds` from now"""
+        return self.sun_count + self.income_rate * seconds
+
+    def can_afford_within(self, cost: int, seconds: float) -> bool:
+        return self.affordable_by(seconds) >= cost
@@ -0,0 +1,35 @@
+"""
+Shared fixtures - the tests import project modules from the repository root
+and never touch the real screen, mouse or keyboard (same stubs as the benchmarks)
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import install_stubs
+
+install_stubs()
+
+import pytest
+from config import SEED_SLOTS
+from plant_manager import PlantManager
+from strategy import PlantingStrategy
+from sun_forecast import SunForecaster
+
+
+@pytest.fixture
+def plant_manager():
+    manager = PlantManager()
+    manager.plants = {name: {"slot": slot, "coord": SEED_SLOTS[slot]}
+                      for slot, name in enumerate(["sunflower", "peashooter", "wall-nut", "cherry bomb"], 1)}
+    manager._build_lookups()
+    return manager
+
+
+@pytest.fixture
+def strategy(plant_manager):
+    return PlantingStrategy(plant_manager, SunForecaster())
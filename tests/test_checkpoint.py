@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import checkpoint
+from tracker import DetectionFuser
+
+
+def test_round_trip_keeps_plain_values_and_arrays():
+    snapshot = {
+        "session": {"time": 12.5, "seeds": ["sunflower", "peashooter"], "removals": [[1.0, 2, 3]]},
+        "lawn": {"damaged": [[1, 2]], "empty_hist": np.arange(12, dtype=np.float32).reshape(3, 4)},
+    }
+    restored = checkpoint.decode(checkpoint.encode(snapshot))
+    assert restored["session"] == snapshot["session"]
+    assert restored["lawn"]["damaged"] == [[1, 2]]
+    np.testing.assert_array_equal(restored["lawn"]["empty_hist"], snapshot["lawn"]["empty_hist"])
+    assert restored["lawn"]["empty_hist"].dtype == np.float32
+
+
+def test_decode_rejects_corrupt_data():
+    with pytest.raises(ValueError):
+        checkpoint.decode(b"not a checkpoint")
+
+
+def test_write_and_load(tmp_path):
+    path = str(tmp_path / "level.npz")
+    checkpoint.write_atomic(path, checkpoint.encode({"session": {"loops": 3}}))
+    assert checkpoint.load(path)["session"] == {"loops": 3}
+    assert checkpoint.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_strategy_keeps_zombie_rows_after_restore(strategy, plant_manager):
+    strategy.update_zombie_tracking([(8, 2, "basic"), (7, 4, "basic")])
+    strategy.mark_planted(0, 1, "sunflower")
+    assert strategy.active_zombie_rows == {2, 4}
+
+    data = checkpoint.decode(checkpoint.encode({"strategy": strategy.snapshot()}))
+    restored = type(strategy)(plant_manager, strategy.forecaster)
+    restored.restore(data["strategy"])
+    # The first tick after a resume must not forget rows seen before the checkpoint
+    restored.update_zombie_tracking([])
+    assert restored.active_zombie_rows == {2, 4}
+    assert restored.plant_types == {(0, 1): "sunflower"}
+
+
+def test_fuser_snapshot_copies_type_votes():
+    fuser = DetectionFuser()
+    fuser.update([(500.0, 300.0, 0.9, "conehead")], 1.0)
+    snapshot = fuser.snapshot()
+    votes = snapshot["tracks"][0][-1]
+    fuser.tracks[0].type_votes["buckethead"] = 5.0
+    assert "buckethead" not in votes
+
+    restored = DetectionFuser()
+    restored.restore(snapshot)
+    assert restored.tracks[0].type_votes == votes
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from config import GRID_ROWS, LANE_BASE_THREAT, PLANT_DPS, ZOMBIE_TYPES
+from strategy import zombie_threat
+
+
+def test_every_row_starts_with_the_base_threat(strategy):
+    np.testing.assert_allclose(strategy.lane_deficit(), np.full(GRID_ROWS, LANE_BASE_THREAT))
+
+
+def test_threat_is_hp_weighted_and_grows_near_the_house():
+    bucket = ZOMBIE_TYPES["buckethead"]
+    assert zombie_threat(8, "buckethead") == pytest.approx(bucket["hp"] * bucket["speed"] / 9)
+    assert zombie_threat(2, "basic") > zombie_threat(8, "basic")
+    assert zombie_threat(8, "unknown type") == zombie_threat(8, "basic")
+
+
+def test_shooters_pay_off_their_row_deficit(strategy):
+    strategy.update_zombie_tracking([(8, 2, "buckethead")])
+    threat = zombie_threat(8, "buckethead")
+    assert strategy.lane_deficit()[2] == pytest.approx(threat)
+
+    strategy.mark_planted(2, 2, "peashooter")
+    assert strategy.lane_deficit()[2] == pytest.approx(threat - PLANT_DPS["peashooter"])
+    strategy.rollback_plant(2, 2, "peashooter")
+    assert strategy.lane_deficit()[2] == pytest.approx(threat)
+
+
+def test_next_shooter_goes_to_the_largest_deficit(strategy):
+    strategy.update_zombie_tracking([(8, 2, "basic"), (8, 3, "buckethead")])
+    plant, col, row = strategy._lane_slot(range(GRID_ROWS), ["peashooter"])
+    assert (plant, row) == ("peashooter", 3)
+
+    # A shooter already planned by this tick's batch counts too
+    strategy._reserved_dps[3] += 100.0
+    assert strategy._lane_slot(range(GRID_ROWS), ["peashooter"])[2] != 3
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from config import LEVEL_CONFIRM_FRAMES
+from level_monitor import LEVEL_END, PAUSED, PLAYING, SEED_SELECT, UNKNOWN, LevelMonitor
+
+FRAME_SHAPE = (1080, 1920, 3)
+
+
+def lawn():
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    frame[:] = (40, 180, 60)  # Lawn green (BGR)
+    return frame
+
+
+def end_screen():
+    frame = np.full(FRAME_SHAPE, 90, dtype=np.uint8)
+    frame[::2, :, 2] = 200  # Some structure for the thumbnail correlation
+    frame[:, ::3, 0] = 10
+    return frame
+
+
+def feed(monitor, frame, count=LEVEL_CONFIRM_FRAMES):
+    changes = [monitor.update(frame) for _ in range(count)]
+    return [change for change in changes if change]
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    return LevelMonitor(directory=str(tmp_path))
+
+
+def test_state_changes_only_after_confirm_frames(monitor):
+    assert feed(monitor, lawn(), LEVEL_CONFIRM_FRAMES - 1) == []
+    assert monitor.state == UNKNOWN
+    assert feed(monitor, lawn(), 1) == [(UNKNOWN, PLAYING)]
+
+
+def test_covered_lawn_without_references_is_a_pause(monitor):
+    assert monitor.lawn_fallback
+    feed(monitor, lawn())
+    assert feed(monitor, end_screen()) == [(PLAYING, PAUSED)]
+    # Staying covered never turns into a level end
+    assert feed(monitor, end_screen(), 10) == []
+    assert feed(monitor, lawn()) == [(PAUSED, PLAYING)]
+
+
+def test_level_end_reference_ends_the_level(monitor):
+    monitor.save_reference(end_screen(), LEVEL_END)
+    assert not monitor.lawn_fallback
+    feed(monitor, lawn())
+    assert monitor.classify(end_screen()) == LEVEL_END
+    assert feed(monitor, end_screen()) == [(PLAYING, LEVEL_END)]
+
+
+def test_seed_select_reference_alone_keeps_the_pause_fallback(monitor):
+    monitor.save_reference(end_screen(), SEED_SELECT)
+    feed(monitor, lawn())
+    blank = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    assert monitor.classify(blank) == UNKNOWN
+    assert feed(monitor, blank) == [(PLAYING, PAUSED)]
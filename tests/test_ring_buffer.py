@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from ring_buffer import RingBuffer
+
+
+def brute_sum(samples, cutoff, width):
+    return sum((value for t, value in samples if t >= cutoff), np.zeros(width))
+
+
+def test_append_sum_and_mean():
+    buffer = RingBuffer(4)
+    for t, value in enumerate([1, 2, 3]):
+        buffer.append(float(t), value)
+    assert len(buffer) == 3
+    assert buffer.sum()[0] == 6
+    assert buffer.mean()[0] == 2
+    assert buffer.latest() == (2.0, np.array([3.0]))
+
+
+def test_full_buffer_evicts_oldest():
+    buffer = RingBuffer(3)
+    for t in range(5):
+        buffer.append(float(t), t)
+    times, values = buffer.to_arrays()
+    assert times.tolist() == [2.0, 3.0, 4.0]
+    assert buffer.sum()[0] == 9
+    assert buffer.oldest_time == 2.0
+
+
+def test_expire_drops_only_old_samples():
+    buffer = RingBuffer(8, width=2)
+    for t in range(6):
+        buffer.append(float(t), [t, 1])
+    buffer.expire(3.0)
+    assert len(buffer) == 3
+    assert buffer.sum().tolist() == [12.0, 3.0]
+    buffer.expire(10.0)
+    assert len(buffer) == 0
+    assert buffer.sum().tolist() == [0.0, 0.0]
+
+
+def test_window_sum_does_not_drop_samples():
+    buffer = RingBuffer(8)
+    for t in range(6):
+        buffer.append(float(t), 1)
+    assert buffer.window_sum(5.0, 2.0)[0] == 3
+    assert buffer.rate(5.0, 2.0)[0] == 1.5
+    assert len(buffer) == 6
+    assert buffer.window_sum(5.0, 10.0)[0] == 6
+
+
+def test_window_sum_rebuilds_when_time_goes_back():
+    buffer = RingBuffer(8)
+    for t in range(6):
+        buffer.append(float(t), 1)
+    assert buffer.window_sum(10.0, 2.0)[0] == 0
+    assert buffer.window_sum(5.0, 2.0)[0] == 3
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_window_sum_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    capacity, width = int(rng.integers(1, 16)), int(rng.integers(1, 4))
+    buffer = RingBuffer(capacity, width)
+    samples = []
+    now = 0.0
+    for _ in range(300):
+        op = rng.random()
+        if op < 0.5:
+            now += float(rng.random())
+            value = rng.integers(0, 10, width)
+            buffer.append(now, value)
+            samples = (samples + [(now, value)])[-capacity:]
+        elif op < 0.6:
+            cutoff = now - float(rng.random() * 5)
+            buffer.expire(cutoff)
+            samples = [s for s in samples if s[0] >= cutoff]
+        elif op < 0.62:
+            buffer.clear()
+            samples = []
+        else:
+            query = now + float(rng.random()) * (0.3 if rng.random() < 0.9 else -3.0)
+            window = float(rng.choice([1.0, 2.5, 6.0]))
+            assert np.allclose(buffer.window_sum(query, window), brute_sum(samples, query - window, width))
+        assert np.allclose(buffer.sum(), brute_sum(samples, -np.inf, width))
@@ -0,0 +1,125 @@
+"""
+Tick Watchdog - Latency budget per AI tick with graceful degradation
+Every tick's work time is compared with TICK_BUDGET. After
+WATCHDOG_ESCALATE_TICKS late ticks in a row the bot drops one level of
+optional work; after WATCHDOG_RECOVER_TICKS ticks with headroom it climbs
+back one level. Levels are cumulative:
+
+    0 normal
+    1 no_sun_sweep          sun/coin sweep only every WATCHDOG_SUN_INTERVAL
+    2 low_res               detector input capped at WATCHDOG_LOW_IMGSZ
+    3 reuse_tracks          detector every WATCHDOG_DETECT_INTERVAL, fused tracks in between
+    4 predicted_cooldowns   no seed screenshots, the strategy's cooldown prediction only
+"""
+
+import time
+from config import *
+from event_log import get_logger
+
+log = get_logger("watchdog")
+
+LEVEL_NAMES = ("normal", "no_sun_sweep", "low_res", "reuse_tracks", "predicted_cooldowns")
+NO_SUN_SWEEP, LOW_RES, REUSE_TRACKS, PREDICTED_COOLDOWNS = 1, 2, 3, 4
+
+
+class TickWatchdog:
+    """Понижает нагрузку, когда тики не укладываются в бюджет, и возвращает её при запасе"""
+
+    def __init__(self, budget=None):
+        self._budget = budget  # None: TICK_BUDGET, which profiles may change
+        self.level = 0
+        self.late_streak = 0  # Consecutive ticks over budget
+        self.calm_streak = 0  # Consecutive ticks within budget × WATCHDOG_HEADROOM
+        self.late_ticks = 0
+        self.ticks = 0
+        self.degradations = 0
+        self.recoveries = 0
+        self.changes = [0] * len(LEVEL_NAMES)  # Times each level was entered
+        self.time_in_level = [0.0] * len(LEVEL_NAMES)
+        self._level_since = None
+
+    @property
+    def budget(self) -> float:
+        return TICK_BUDGET if self._budget is None else self._budget
+
+    @property
+    def name(self) -> str:
+        return LEVEL_NAMES[self.level]
+
+    def end_tick(self, elapsed: float, now=None):
+        """Record one tick's work time (seconds, sleep excluded) and adjust the level"""
+        self.ticks += 1
+        if self._level_since is None:
+            self._level_since = time.time() if now is None else now
+        if not WATCHDOG_ENABLED:
+            return
+        if elapsed > self.budget:
+            self.late_ticks += 1
+            self.late_streak += 1
+            self.calm_streak = 0
+        elif elapsed <= self.budget * WATCHDOG_HEADROOM:
+            self.calm_streak += 1
+            self.late_streak = 0
+        else:
+            # Within budget but without headroom: hold the current level
+            self.late_streak = 0
+            self.calm_streak = 0
+
+        if self.late_streak >= WATCHDOG_ESCALATE_TICKS and self.level < len(LEVEL_NAMES) - 1:
+            self._set_level(self.level + 1, f"тик {elapsed * 1000:.0f} мс > {self.budget * 1000:.0f} мс", now)
+            self.late_streak = 0
+        elif self.calm_streak >= WATCHDOG_RECOVER_TICKS and self.level > 0:
+            self._set_level(self.level - 1, f"тик {elapsed * 1000:.0f} мс, есть запас", now)
+            self.calm_streak = 0
+
+    def _set_level(self, level, reason, now=None):
+        now = time.time() if now is None else now
+        self.time_in_level[self.level] += now - self._level_since
+        self._level_since = now
+        previous, self.level = self.level, level
+        self.changes[level] += 1
+        if level > previous:
+            self.degradations += 1
+        else:
+            self.recoveries += 1
+        emoji = "🐢" if level > previous else "🐇"
+        log.warning("%s Сторож тиков: %s → %s (%s)", emoji, LEVEL_NAMES[previous], LEVEL_NAMES[level], reason,
+                    extra={"event": "watchdog", "fields": {"from": LEVEL_NAMES[previous], "to": LEVEL_NAMES[level],
+                                                           "reason": reason}})
+
+    # ----- What the tick may do at the current level -----
+
+    def sun_sweep_due(self, last_sweep: float, now: float) -> bool:
+        interval = WATCHDOG_SUN_INTERVAL if self.level >= NO_SUN_SWEEP else SUN_SWEEP_INTERVAL
+        return now - last_sweep > interval
+
+    def detector_imgsz(self, imgsz):
+        """Detector input size: capped while degraded (None = model default)"""
+        if self.level >= LOW_RES:
+            return min(imgsz, WATCHDOG_LOW_IMGSZ) if imgsz else WATCHDOG_LOW_IMGSZ
+        return imgsz
+
+    def detect_interval(self, interval: float) -> float:
+        """Seconds between detector runs; fused tracks cover the ticks in between"""
+        return max(interval, WATCHDOG_DETECT_INTERVAL) if self.level >= REUSE_TRACKS else interval
+
+    @property
+    def check_seeds_visually(self) -> bool:
+        """False: trust the strategy's cooldown prediction instead of a seed screenshot"""
+        return self.level < PREDICTED_COOLDOWNS
+
+    def metrics(self, now=None) -> dict:
+        now = time.time() if now is None else now
+        time_in_level = list(self.time_in_level)
+        if self._level_since is not None:
+            time_in_level[self.level] += now - self._level_since
+        return {
+            "level": self.name,
+            "budget_ms": self.budget * 1000,
+            "late_ticks": self.late_ticks,
+            "ticks": self.ticks,
+            "degradations": self.degradations,
+            "recoveries": self.recoveries,
+            "changes": dict(zip(LEVEL_NAMES, self.changes)),
+            "time_in_level": dict(zip(LEVEL_NAMES, time_in_level)),
+        }
@@ -0,0 +1,174 @@
+"""
+Detection Fuser - Temporal smoothing of zombie detections
+Detections from the last frames are merged into tracks. A track's confidence
+decays while it goes unseen and its position is extrapolated from its
+velocity, so a zombie the detector misses for a frame or two (low input
+resolution, skipped frames) stays visible to the strategy
+"""
+
+import numpy as np
+from config import *
+
+
+class Track:
+    """One zombie followed across frames (pixel coordinates)"""
+
+    __slots__ = ("x", "y", "vx", "confidence", "hits", "misses", "last_seen", "zombie_type", "type_votes")
+
+    def __init__(self, x, y, confidence, now, zombie_type=ZOMBIE_DEFAULT_TYPE):
+        self.x = x
+        self.y = y
+        self.vx = 0.0  # Pixels/second, zombies walk left (negative)
+        self.confidence = confidence
+        self.hits = 1
+        self.misses = 0
+        self.last_seen = now
+        self.zombie_type = zombie_type
+        self.type_votes = {zombie_type: confidence}  # Confidence-weighted type votes
+
+    def vote(self, zombie_type, confidence):
+        """Add a classification; the track keeps the type with the most votes"""
+        self.type_votes[zombie_type] = self.type_votes.get(zombie_type, 0.0) + confidence
+        self.zombie_type = max(self.type_votes, key=self.type_votes.get)
+
+
+class DetectionFuser:
+    """Слияние детекций зомби за последние кадры в устойчивые треки"""
+
+    def __init__(self, profile=None):
+        self.tracks = []
+        self.last_update = None
+        self.last_detection = None  # Time of the last real detector run
+        self.set_profile(profile or FUSION_PROFILE)
+
+    def set_profile(self, name):
+        """Switch the accuracy/speed trade-off (see FUSION_PROFILES)"""
+        settings = FUSION_PROFILES[name]
+        self.profile = name
+        self.imgsz = settings["imgsz"]
+        self.detect_interval = settings["detect_interval"]
+        self.window = settings["window"]
+        self.half_life = settings["half_life"]
+        self.min_confidence = settings["min_confidence"]
+        self.detector_confidence = settings["detector_confidence"]
+
+    def reset(self):
+        self.tracks = []
+        self.last_update = None
+        self.last_detection = None
+
+    def snapshot(self) -> dict:
+        """Tracks as plain values for a checkpoint"""
+        return {
+            "tracks": [[t.x, t.y, t.vx, t.confidence, t.hits, t.misses, t.last_seen, t.zombie_type, dict(t.type_votes)]
+                       for t in self.tracks],
+            "last_update": self.last_update,
+            "last_detection": self.last_detection,
+        }
+
+    def restore(self, state: dict):
+        """Inverse of snapshot(); the next update extrapolates tracks over the gap"""
+        self.tracks = []
+        for x, y, vx, confidence, hits, misses, last_seen, zombie_type, type_votes in state["tracks"]:
+            track = Track(x, y, confidence, last_seen, zombie_type)
+            track.vx, track.hits, track.misses = vx, hits, misses
+            track.type_votes = dict(type_votes)
+            self.tracks.append(track)
+        self.last_update = state["last_update"]
+        self.last_detection = state["last_detection"]
+
+    def detection_due(self, now, interval=None) -> bool:
+        """
+        Whether the detector should run this tick (fewer runs on faster profiles)
+        interval: override of the profile's detect_interval
+        """
+        interval = self.detect_interval if interval is None else interval
+        return self.last_detection is None or now - self.last_detection >= interval
+
+    def _predict(self, now):
+        """Move tracks along their velocity and decay their confidence"""
+        if self.last_update is None:
+            self.last_update = now
+            return
+        dt = now - self.last_update
+        self.last_update = now
+        if dt <= 0:
+            return
+        decay = 0.5 ** (dt / self.half_life) if self.half_life > 0 else 0.0
+        for track in self.tracks:
+            track.x += track.vx * dt
+            track.confidence *= decay
+
+    def update(self, detections, now):
+        """
+        Merge one detector run into the tracks
+        detections: [(x, y, confidence, zombie_type)] zombie foot points in pixels
+        """
+        self._predict(now)
+        self.last_detection = now
+
+        unmatched = list(range(len(detections)))
+        if self.tracks and detections:
+            points = np.array([detection[:2] for detection in detections], dtype=np.float32)
+            track_points = np.array([(t.x, t.y) for t in self.tracks], dtype=np.float32)
+            dx = np.abs(points[:, None, 0] - track_points[None, :, 0])
+            dy = np.abs(points[:, None, 1] - track_points[None, :, 1])
+
+            # Same row band and within FUSION_MATCH_DISTANCE cells horizontally
+            cost = dx / CELL_WIDTH
+            cost[(dy > CELL_HEIGHT / 2) | (cost > FUSION_MATCH_DISTANCE)] = np.inf
+
+            # Greedy assignment, closest pairs first
+            used_tracks = set()
+            taken = set()
+            for flat in np.argsort(cost, axis=None):
+                d, t = divmod(int(flat), len(self.tracks))
+                if not np.isfinite(cost[d, t]):
+                    break
+                if d in taken or t in used_tracks:
+                    continue
+                taken.add(d)
+                used_tracks.add(t)
+                self._merge(self.tracks[t], detections[d], now)
+            unmatched = [d for d in unmatched if d not in taken]
+        else:
+            used_tracks = set()
+
+        for index, track in enumerate(self.tracks):
+            if index not in used_tracks:
+                track.misses += 1
+
+        for d in unmatched:
+            x, y, confidence, zombie_type = detections[d]
+            self.tracks.append(Track(x, y, confidence, now, zombie_type))
+
+        # Forget tracks unseen for the whole window of detector runs
+        self.tracks = [t for t in self.tracks if t.misses < self.window]
+
+    def _merge(self, track, detection, now):
+        x, y, confidence, zombie_type = detection
+        dt = now - track.last_seen
+        if dt > 0:
+            # Smoothed velocity; zombies never walk right, noise aside
+            measured = (x - (track.x - track.vx * dt)) / dt
+            track.vx = min(0.0, 0.5 * track.vx + 0.5 * measured)
+        track.x = 0.5 * track.x + 0.5 * x
+        track.y = 0.5 * track.y + 0.5 * y
+        # Independent evidence: 1 - (1 - a)(1 - b)
+        track.confidence = 1.0 - (1.0 - track.confidence) * (1.0 - confidence)
+        track.vote(zombie_type, confidence)
+        track.hits += 1
+        track.misses = 0
+        track.last_seen = now
+
+    def advance(self, now):
+        """Tick without a detector run: only extrapolate and decay"""
+        self._predict(now)
+
+    def confirmed(self):
+        """Tracks stable enough for the strategy"""
+        return [t for t in self.tracks if t.confidence >= self.min_confidence]
+
+    def positions(self):
+        """[(x, y, zombie_type)] pixel foot points of confirmed tracks"""
+        return [(t.x, t.y, t.zombie_type) for t in self.confirmed()]
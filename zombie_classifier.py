@@ -0,0 +1,79 @@
+"""
+Zombie Classifier - Zombie type for generic "zombie" detector boxes
+With a YOLO classification model (ZOMBIE_CLASSIFIER_PATH) all crops of a frame
+are classified in one batched call. Without it, the armor color in the top
+of the box separates coneheads and bucketheads from basic zombies
+"""
+
+import os
+import cv2
+import numpy as np
+from config import *
+from event_log import get_logger
+from model_loader import ModelLoader
+
+log = get_logger("zombie_classifier")
+
+
+class ZombieClassifier:
+    """Определяет тип зомби по вырезкам из кадра"""
+
+    def __init__(self, model_path=ZOMBIE_CLASSIFIER_PATH):
+        # The classifier is optional: only load it when the file exists
+        self.loader = ModelLoader(model_path) if model_path and os.path.exists(model_path) else None
+
+    def start(self):
+        if self.loader is not None:
+            self.loader.start(imgsz=ZOMBIE_CROP_SIZE)
+
+    @property
+    def model(self):
+        return self.loader.get() if self.loader is not None else None
+
+    def classify(self, frame, boxes) -> list:
+        """
+        Zombie type per box
+        boxes: [(x0, y0, x1, y1)] pixel boxes of generic zombie detections
+        """
+        if not boxes:
+            return []
+        crops = [self._crop(frame, box) for box in boxes]
+        model = self.model
+        if model is not None:
+            return self._classify_model(model, crops)
+        return [self._classify_armor(crop) for crop in crops]
+
+    def _crop(self, frame, box):
+        height, width = frame.shape[:2]
+        x0, y0, x1, y1 = box
+        x0, x1 = max(0, int(x0)), min(width, int(x1))
+        y0, y1 = max(0, int(y0)), min(height, int(y1))
+        return frame[y0:max(y0 + 1, y1), x0:max(x0 + 1, x1)]
+
+    def _classify_model(self, model, crops) -> list:
+        """One batched classifier call for all crops"""
+        size = (ZOMBIE_CROP_SIZE, ZOMBIE_CROP_SIZE)
+        batch = [cv2.resize(crop, size, interpolation=cv2.INTER_AREA) for crop in crops]
+        try:
+            results = model.predict(source=batch, imgsz=ZOMBIE_CROP_SIZE, verbose=False)
+        except Exception as e:
+            log.warning("⚠️ Ошибка классификации зомби: %s", e, extra={"key": "zombie_classifier_error"})
+            return [ZOMBIE_DEFAULT_TYPE] * len(crops)
+        types = []
+        for result in results:
+            name = result.names[int(result.probs.top1)]
+            types.append(name if name in ZOMBIE_TYPES else ZOMBIE_DEFAULT_TYPE)
+        return types
+
+    def _classify_armor(self, crop) -> str:
+        """Cone or bucket color in the head region, basic otherwise"""
+        head = crop[:max(1, int(crop.shape[0] * ZOMBIE_HEAD_FRACTION))]
+        if head.size == 0:
+            return ZOMBIE_DEFAULT_TYPE
+        hsv = cv2.cvtColor(np.ascontiguousarray(head), cv2.COLOR_BGR2HSV)
+        best, best_share = ZOMBIE_DEFAULT_TYPE, 0.0
+        for zombie_type, spec in ZOMBIE_ARMOR_COLORS.items():
+            share = cv2.countNonZero(cv2.inRange(hsv, spec["lower"], spec["upper"])) / (head.shape[0] * head.shape[1])
+            if share >= spec["min_share"] and share > best_share:
+                best, best_share = zombie_type, share
+        return best